@@ -1,4 +1,7 @@
+import os
 import sys
+import abc
+import importlib.util
 import cv2
 import numpy as np
 from datetime import datetime, timedelta
@@ -24,6 +27,8 @@ from collections import Counter, deque
 import time
 import random
 import math
+import queue
+from array import array
 import threading
 
 # --- EXTERNAL LIBRARY IMPORTS ---
@@ -64,18 +69,22 @@ try:
 except ImportError:
     VOICE_AVAILABLE = False
 
-# Emotion detection
+# Emotion detection: FER pulls in TensorFlow, so it is only imported once FERBackend is chosen
+FER_AVAILABLE = importlib.util.find_spec('fer') is not None
+
 try:
-    from fer import FER
+    import onnxruntime as ort
 
-    FER_AVAILABLE = True
+    ONNX_RUNTIME_AVAILABLE = True
 except ImportError:
-    FER_AVAILABLE = False
+    ONNX_RUNTIME_AVAILABLE = False
 
 # Plotting
 try:
     from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
     from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+    from matplotlib.patches import Polygon
     import matplotlib.pyplot as plt
 
     plt.style.use('seaborn-v0_8-darkgrid')
@@ -86,7 +95,21 @@ except ImportError:
 # --- CONFIGURATION CONSTANTS (Tuned for Stability) ---
 CONFIDENCE_THRESHOLD = 0.55
 SMOOTHING_WINDOW_SIZE = 75
-DETECTION_INTERVAL = 5
+DETECTION_MIN_INTERVAL = 0.1  # seconds between model runs while the scene keeps changing
+DETECTION_MAX_STALENESS = 2.0  # a static scene is still re-checked this often
+EMOTION_MOOD_SCORES = {
+    'happy': 95, 'surprise': 65, 'neutral': 50,
+    'disgust': 25, 'angry': 30, 'fear': 15, 'sad': 5
+}
+
+# --- EMOTION MODEL BACKEND ---
+# EMOCARE_BACKEND: auto (ONNX models if present, else FER), onnx, dnn (ONNX on cv2.dnn), fer or none
+EMOTION_BACKEND = os.environ.get('EMOCARE_BACKEND', 'auto').lower()
+MODEL_DIR = Path(os.environ.get('EMOCARE_MODEL_DIR', Path(__file__).resolve().parent / 'models'))
+EMOTION_MODEL_FILES = ('emotion-ferplus-12-int8.onnx', 'emotion-ferplus-8.onnx')  # FER+ (ONNX model zoo)
+FACE_MODEL_FILES = ('face_detection_yunet_2023mar_int8.onnx', 'face_detection_yunet_2023mar.onnx')  # YuNet
+USE_INT8_MODELS = os.environ.get('EMOCARE_INT8', '1') != '0'  # quantized files first when present
+INFERENCE_THREADS = int(os.environ.get('EMOCARE_THREADS', 0)) or max(1, (os.cpu_count() or 2) // 2)
 
 # --- ZEN FLOW CONFIG ---
 ZEN_FLOW_GRAVITY = 0.25
@@ -1124,14 +1147,39 @@ class ForestSoundscapeMixer(QWidget):
 # ============================================================================
 
 class DatabaseManager:
-    """SQLite database for session storage and analytics"""
+    """SQLite database for session storage and analytics.
+
+    Log calls only enqueue a row; a write-behind thread owns one WAL-mode connection and
+    commits queued rows in executemany batches every FLUSH_INTERVAL_MS or FLUSH_ROWS rows.
+    """
+
+    FLUSH_INTERVAL_MS = 250
+    FLUSH_ROWS = 200
+    QUEUE_MAX = 10000
+
+    INSERTS = {
+        'emotions': 'INSERT INTO emotions (session_id, timestamp, emotion, confidence) VALUES (?, ?, ?, ?)',
+        'messages': 'INSERT INTO messages (session_id, timestamp, role, message, emotion) VALUES (?, ?, ?, ?, ?)',
+        'alerts': 'INSERT INTO alerts (session_id, timestamp, alert_type, description) VALUES (?, ?, ?, ?)',
+    }
 
     def __init__(self, db_path="emocare_sessions.db"):
         self.db_path = db_path
         self.init_database()
 
+        self.dropped_rows = 0
+        self._closed = False
+        self._warned_closed = False
+        self._queue = queue.Queue(maxsize=self.QUEUE_MAX)
+        self._writer = threading.Thread(target=self._write_loop, name="emocare-db-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
@@ -1174,11 +1222,16 @@ class DatabaseManager:
                 FOREIGN KEY (session_id) REFERENCES sessions (id)
             )
         ''')
+        # Rows are appended in time order, so (session_id, id) serves both per-session
+        # scans and "rows since the last refresh" lookups
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_emotions_session ON emotions (session_id, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_session ON alerts (session_id, id)')
         conn.commit()
         conn.close()
 
     def create_session(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         timestamp = datetime.now().isoformat()
         cursor.execute('''
@@ -1190,7 +1243,9 @@ class DatabaseManager:
         return session_id
 
     def end_session(self, session_id, dominant_emotion, avg_mood):
-        conn = sqlite3.connect(self.db_path)
+        self.flush()
+
+        conn = self._connect()
         cursor = conn.cursor()
         end_time = datetime.now().isoformat()
 
@@ -1214,38 +1269,92 @@ class DatabaseManager:
         conn.commit()
         conn.close()
 
+    def _accepting(self, table):
+        """False (with a one-time warning) once close() has stopped the writer."""
+        if not self._closed:
+            return True
+        if not self._warned_closed:
+            self._warned_closed = True
+            print(f"EmoCare DB writer: ignoring {table} rows logged after close()")
+        return False
+
     def log_emotion(self, session_id, emotion, confidence):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO emotions (session_id, timestamp, emotion, confidence)
-            VALUES (?, ?, ?, ?)
-        ''', (session_id, datetime.now().isoformat(), emotion, confidence))
-        conn.commit()
-        conn.close()
+        if not self._accepting('emotions'):
+            return
+        # Several per second: never block the GUI thread, shed rows if the writer falls behind
+        try:
+            self._queue.put_nowait(('emotions', (session_id, datetime.now().isoformat(), emotion, confidence)))
+        except queue.Full:
+            self.dropped_rows += 1
 
     def log_message(self, session_id, role, message, emotion):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO messages (session_id, timestamp, role, message, emotion)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (session_id, datetime.now().isoformat(), role, message, emotion))
-        conn.commit()
-        conn.close()
+        if not self._accepting('messages'):
+            return
+        self._queue.put(('messages', (session_id, datetime.now().isoformat(), role, message, emotion)))
 
     def log_alert(self, session_id, alert_type, description):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO alerts (session_id, timestamp, alert_type, description)
-            VALUES (?, ?, ?, ?)
-        ''', (session_id, datetime.now().isoformat(), alert_type, description))
-        conn.commit()
+        if not self._accepting('alerts'):
+            return
+        self._queue.put(('alerts', (session_id, datetime.now().isoformat(), alert_type, description)))
+
+    def flush(self, timeout=5.0):
+        """Block until every row queued so far is committed."""
+        if not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait(timeout)
+
+    def close(self):
+        self._closed = True  # later log_* calls are dropped instead of queueing with no writer
+        if self._writer.is_alive():
+            self._queue.put(('stop', None))
+            self._writer.join(timeout=5.0)
+
+    def _write_loop(self):
+        conn = self._connect()
+        conn.execute('PRAGMA synchronous=NORMAL')  # WAL: durable at checkpoints, no fsync per commit
+        pending = {table: [] for table in self.INSERTS}
+        count = 0
+        deadline = None
+        running = True
+
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            waiters = []
+            try:
+                kind, item = self._queue.get(timeout=timeout)
+                if kind in pending:
+                    pending[kind].append(item)
+                    count += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.FLUSH_INTERVAL_MS / 1000
+                elif kind == 'flush':
+                    waiters.append(item)
+                else:
+                    running = False
+            except queue.Empty:
+                pass
+
+            if count and (count >= self.FLUSH_ROWS or waiters or not running or time.monotonic() >= deadline):
+                try:
+                    with conn:
+                        for table, rows in pending.items():
+                            if rows:
+                                conn.executemany(self.INSERTS[table], rows)
+                except sqlite3.Error as e:
+                    print(f"EmoCare DB writer: dropped {count} rows ({e})")
+                for rows in pending.values():
+                    rows.clear()
+                count = 0
+                deadline = None
+            for done in waiters:
+                done.set()
+
         conn.close()
 
     def get_session_analytics(self, session_id):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
 
         cursor.execute('''
@@ -1274,19 +1383,119 @@ class DatabaseManager:
             'alerts': alerts
         }
 
+    def get_session_delta(self, session_id, since_ids):
+        """Aggregates for rows added since `since_ids` ({table: last id seen}); cost tracks new rows only.
+
+        Returns per-emotion counts and mood sums, message/alert counts, per-minute mood buckets,
+        the new emotion rows (id, emotion, confidence, epoch seconds) and the ids to pass next time.
+        Epochs are computed by SQLite from the stored local ISO time, so they read as wall-clock
+        time through time.gmtime.
+        """
+        mood_case = "CASE emotion " + " ".join(
+            f"WHEN '{e}' THEN {s}" for e, s in EMOTION_MOOD_SCORES.items()) + " ELSE 50 END"
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')  # one read snapshot for every query below
+
+        upto = {}
+        for table in ('emotions', 'messages', 'alerts'):
+            cursor.execute(f'SELECT MAX(id) FROM {table} WHERE session_id = ?', (session_id,))
+            upto[table] = max(cursor.fetchone()[0] or 0, since_ids.get(table, 0))
+        window = lambda table: (session_id, since_ids.get(table, 0), upto[table])
+
+        cursor.execute(f'''
+            SELECT emotion, COUNT(*), SUM({mood_case}) FROM emotions
+            WHERE session_id = ? AND id > ? AND id <= ? GROUP BY emotion
+        ''', window('emotions'))
+        emotion_counts = {}
+        mood_sum = 0.0
+        for emotion, count, score_sum in cursor.fetchall():
+            emotion_counts[emotion] = count
+            mood_sum += score_sum
+
+        cursor.execute(f'''
+            SELECT substr(timestamp, 1, 16) AS minute, COUNT(*), SUM({mood_case}) FROM emotions
+            WHERE session_id = ? AND id > ? AND id <= ? GROUP BY minute ORDER BY minute
+        ''', window('emotions'))
+        minutes = cursor.fetchall()
+
+        cursor.execute('''
+            SELECT id, emotion, confidence, (julianday(timestamp) - 2440587.5) * 86400.0 FROM emotions
+            WHERE session_id = ? AND id > ? AND id <= ? ORDER BY id
+        ''', window('emotions'))
+        timeline = cursor.fetchall()
+
+        cursor.execute('SELECT COUNT(*) FROM messages WHERE session_id = ? AND id > ? AND id <= ?',
+                       window('messages'))
+        message_count = cursor.fetchone()[0]
+        cursor.execute('SELECT COUNT(*) FROM alerts WHERE session_id = ? AND id > ? AND id <= ?',
+                       window('alerts'))
+        alert_count = cursor.fetchone()[0]
+
+        conn.rollback()
+        conn.close()
+
+        return {
+            'emotion_counts': emotion_counts,
+            'mood_sum': mood_sum,
+            'minutes': minutes,
+            'timeline': timeline,
+            'messages': message_count,
+            'alerts': alert_count,
+            'last_ids': upto
+        }
+
 
 # ============================================================================
 # ANALYTICS DASHBOARD
 # ============================================================================
 
+def downsample_minmax(x, y, buckets):
+    """Reduce a sorted series to the min and max of each of `buckets` equal-width x bins.
+
+    Returns (x, y_min, y_max); at one bin per pixel column the min/max envelope covers
+    exactly the pixels the full series would.
+    """
+    if len(x) <= buckets:
+        return x, y, y
+    edges = np.linspace(x[0], x[-1], buckets + 1)[:-1]
+    starts = np.unique(np.searchsorted(x, edges, side='left'))  # first index of each non-empty bin
+    return x[starts], np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
 class AnalyticsDashboard(QWidget):
     """Session analytics and visualization"""
 
     def __init__(self, db_manager):
         super().__init__()
         self.db = db_manager
+        self.reset_session(None)
         self.init_ui()
 
+    def reset_session(self, session_id):
+        """Running totals for one session; refresh() only folds in rows added since last time."""
+        self._session_id = session_id
+        self._last_ids = {'emotions': 0, 'messages': 0, 'alerts': 0}
+        self._emotion_counts = Counter()
+        self._mood_sum = 0.0
+        self._message_count = 0
+        self._alert_count = 0
+        self._minutes = {}  # 'YYYY-MM-DDTHH:MM' -> [count, mood_sum], last few minutes only
+        # chart series, append-only: epoch seconds (local wall clock) and valence level
+        self._times = array('d')
+        self._values = array('d')
+        if hasattr(self, 'dominant_emotion'):
+            # update_stats only sets these once the new session has data
+            self.dominant_emotion.setText("Dominant Emotion: --")
+            self.mood_score.setText("Average Mood: --")
+            self.mood_trend.setText("Mood Trend: --")
+        if PLOT_AVAILABLE and hasattr(self, '_band'):
+            # update_emotion_chart waits for the first new row; wipe the old envelope right away
+            self._band.set_xy(np.zeros((1, 2)))
+            self._area.set_xy(np.zeros((1, 2)))
+            self._chart_background = None
+            self.canvas.draw()
+
     def init_ui(self):
         layout = QVBoxLayout(self)
 
@@ -1319,6 +1528,10 @@ class AnalyticsDashboard(QWidget):
         self.alert_count.setObjectName("statLabel")
         stats_layout.addWidget(self.alert_count)
 
+        self.mood_trend = QLabel("Mood Trend: --")
+        self.mood_trend.setObjectName("statLabel")
+        stats_layout.addWidget(self.mood_trend)
+
         layout.addWidget(stats_frame)
 
         if PLOT_AVAILABLE:
@@ -1326,6 +1539,7 @@ class AnalyticsDashboard(QWidget):
             self.canvas = FigureCanvasQTAgg(self.figure)
             self.canvas.setStyleSheet("background-color: transparent;")
             layout.addWidget(self.canvas)
+            self._init_chart()
         else:
             chart_placeholder = QLabel("📈 Install matplotlib and PyQt6-Charts for emotion timeline")
             chart_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -1345,65 +1559,112 @@ class AnalyticsDashboard(QWidget):
 
         layout.addLayout(export_layout)
 
-    def update_stats(self, session_id, start_time, emotions, messages, alerts):
+    def refresh(self, session_id, start_time):
+        if session_id != self._session_id:
+            self.reset_session(session_id)
+
+        delta = self.db.get_session_delta(session_id, self._last_ids)
+        self._last_ids = delta['last_ids']
+        self._emotion_counts.update(delta['emotion_counts'])
+        self._mood_sum += delta['mood_sum']
+        self._message_count += delta['messages']
+        self._alert_count += delta['alerts']
+        for minute, count, mood_sum in delta['minutes']:
+            bucket = self._minutes.setdefault(minute, [0, 0.0])
+            bucket[0] += count
+            bucket[1] += mood_sum
+        for minute in sorted(self._minutes)[:-2]:
+            del self._minutes[minute]
+        for _, emotion, _, epoch in delta['timeline']:
+            self._times.append(epoch)
+            self._values.append(self.CHART_LEVELS.get(emotion, 3.5))
+
+        self.update_stats(start_time, bool(delta['timeline']))
+
+    def update_stats(self, start_time, delta_added=True):
         duration = (datetime.now() - start_time).seconds // 60
         self.session_time.setText(f"Session Duration: {duration} min")
 
-        if emotions:
-            emotion_counts = Counter([e[0] for e in emotions])
-            dominant = emotion_counts.most_common(1)[0][0]
+        total = sum(self._emotion_counts.values())
+        if total:
+            dominant = self._emotion_counts.most_common(1)[0][0]
             self.dominant_emotion.setText(f"Dominant Emotion: {dominant.capitalize()}")
+            self.mood_score.setText(f"Average Mood: {self._mood_sum / total:.1f}/100")
 
-        emotion_scores = {
-            'happy': 95, 'surprise': 65, 'neutral': 50,
-            'disgust': 25, 'angry': 30, 'fear': 15, 'sad': 5
-        }
-        if emotions:
-            scores = [emotion_scores.get(e[0], 50) for e in emotions]
-            avg_score = sum(scores) / len(scores) if scores else 50
-            self.mood_score.setText(f"Average Mood: {avg_score:.1f}/100")
+        self.total_messages.setText(f"Total Messages: {self._message_count}")
+        self.alert_count.setText(f"Alerts Triggered: {self._alert_count}")
 
-        self.total_messages.setText(f"Total Messages: {len(messages)}")
-        self.alert_count.setText(f"Alerts Triggered: {len(alerts)}")
+        minutes = sorted(self._minutes)
+        if len(minutes) == 2 and \
+                datetime.fromisoformat(minutes[1]) - datetime.fromisoformat(minutes[0]) == timedelta(minutes=1):
+            previous, current = (mood_sum / count for count, mood_sum in map(self._minutes.get, minutes))
+            arrow = "↑" if current > previous + 2 else "↓" if current < previous - 2 else "→"
+            self.mood_trend.setText(f"Mood Trend: {arrow} {current:.0f} this minute (was {previous:.0f})")
+        else:
+            self.mood_trend.setText("Mood Trend: --")  # no data for the minute before the latest one
 
-        if PLOT_AVAILABLE:
-            self.update_emotion_chart(emotions)
+        if PLOT_AVAILABLE and delta_added:
+            self.update_emotion_chart()
 
-    def update_emotion_chart(self, emotions):
-        if not emotions:
-            return
+    CHART_LEVELS = {'happy': 5.5, 'surprise': 4.5, 'neutral': 3.5,
+                    'disgust': 2.5, 'angry': 1.5, 'fear': 1.5, 'sad': 0.5}
 
-        self.figure.clear()
+    def _init_chart(self):
+        """Axes are built once; refreshes only swap the series data and blit it over a cached background."""
         ax = self.figure.add_subplot(111)
+        self._ax = ax
+        # The series is drawn as a min/max envelope polygon plus a shaded area under it: filling
+        # is cheap for Agg, stroking a per-pixel zig-zag line is not
+        self._band = Polygon(np.zeros((1, 2)), closed=True, animated=True,
+                             facecolor='#7F5EFA', edgecolor='#7F5EFA', linewidth=2, joinstyle='round')
+        self._area = Polygon(np.zeros((1, 2)), closed=True, animated=True,
+                             facecolor='#7F5EFA', edgecolor='none', alpha=0.3)
+        ax.add_patch(self._area)
+        ax.add_patch(self._band)
+        ax.set_xlabel('Time', fontsize=10)
+        ax.set_ylabel('Emotion Valence', fontsize=10)
+        ax.set_title('Emotion Timeline', fontsize=12, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        ax.set_yticks([0.5, 1.5, 2.5, 3.5, 4.5, 5.5])
+        ax.set_yticklabels(['Sad', 'Fear/Angry', 'Disgust', 'Neutral', 'Surprise', 'Happy'])
+        ax.set_ylim(0, 6)
+        ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: time.strftime('%H:%M:%S', time.gmtime(x))))
+        self.figure.tight_layout()
+        self._chart_background = None
+        # Qt resizes and full redraws invalidate the cached background
+        self.canvas.mpl_connect('draw_event', self._on_chart_draw)
+
+    def _on_chart_draw(self, event):
+        self._chart_background = self.canvas.copy_from_bbox(self._ax.bbox)
+        self._draw_series()
+
+    def _draw_series(self):
+        if not self._times:
+            return
+        x, y_min, y_max = downsample_minmax(np.frombuffer(self._times), np.frombuffer(self._values),
+                                            max(2, int(self._ax.bbox.width)))
+        self._band.set_xy(np.column_stack([np.concatenate([x, x[::-1]]),
+                                           np.concatenate([y_max, y_min[::-1]])]))
+        self._area.set_xy(np.column_stack([np.concatenate([x, x[::-1]]),
+                                           np.concatenate([y_max, np.zeros(len(x))])]))
+        self._ax.draw_artist(self._area)
+        self._ax.draw_artist(self._band)
+
+    def update_emotion_chart(self):
+        if not self._times:
+            return
 
-        emotion_map = {'happy': 5.5, 'surprise': 4.5, 'neutral': 3.5,
-                       'disgust': 2.5, 'angry': 1.5, 'fear': 1.5, 'sad': 0.5}
-        timestamps = []
-        values = []
-
-        for emotion, confidence, timestamp in emotions:
-            try:
-                ts = datetime.fromisoformat(timestamp)
-                timestamps.append(ts)
-                values.append(emotion_map.get(emotion, 3.5))
-            except:
-                pass
-
-        if timestamps:
-            ax.plot(timestamps, values, linewidth=2, color='#7F5EFA', marker='o',
-                    markersize=3)
-            ax.fill_between(timestamps, values, alpha=0.3, color='#7F5EFA')
-            ax.set_xlabel('Time', fontsize=10)
-            ax.set_ylabel('Emotion Valence', fontsize=10)
-            ax.set_title('Emotion Timeline', fontsize=12, fontweight='bold')
-            ax.grid(True, alpha=0.3)
-
-            ax.set_yticks([0.5, 1.5, 2.5, 3.5, 4.5, 5.5])
-            ax.set_yticklabels(['Sad', 'Fear/Angry', 'Disgust', 'Neutral', 'Surprise', 'Happy'])
-            ax.set_ylim(0, 6)
+        start, last = self._times[0], self._times[-1]
+        x_min, x_max = self._ax.get_xlim()
+        if self._chart_background is None or x_min != start or last > x_max:
+            # Grow the time axis geometrically so full redraws stay rare
+            self._ax.set_xlim(start, start + max(60.0, 1.5 * (last - start)))
+            self.canvas.draw()  # draw_event caches the background and draws the line
+            return
 
-            self.figure.tight_layout()
-            self.canvas.draw()
+        self.canvas.restore_region(self._chart_background)
+        self._draw_series()
+        self.canvas.blit(self._ax.bbox)
 
     def export_pdf_report(self):
         filename, _ = QFileDialog.getSaveFileName(
@@ -1430,6 +1691,7 @@ class AnalyticsDashboard(QWidget):
 
         if filename:
             import csv
+            self.db.flush()
             conn = sqlite3.connect(self.db.db_path)
             cursor = conn.cursor()
             cursor.execute('SELECT MAX(id) FROM sessions')
@@ -1508,15 +1770,223 @@ class VoiceAssistant:
             return None
 
 
+# ============================================================================
+# EMOTION MODEL BACKENDS
+# ============================================================================
+
+class EmotionBackend(abc.ABC):
+    """Face search and emotion scoring behind one interface, so EmotionDetector does not care which
+    runtime serves the models. Tiles are TILE x TILE grayscale with the face in the middle TILE_FACE px."""
+
+    name = 'none'
+    TILE = 96
+    TILE_FACE = 64
+
+    def find_faces(self, frame, gray):
+        """[x, y, w, h] boxes for a BGR frame, or None to let the caller fall back to Haar."""
+        return None
+
+    @abc.abstractmethod
+    def classify_tiles(self, tiles):
+        """One {emotion: score} dict, or None if the model rejected the tile, per tile."""
+
+    def warm_up(self):
+        """Run each model once on blank input, so graph setup and buffer allocation happen at
+        startup rather than on the first face."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        self.find_faces(frame, frame[:, :, 0])
+        self.classify_tiles([np.zeros((self.TILE, self.TILE), dtype=np.uint8)])
+
+
+class FERBackend(EmotionBackend):
+    """The fer package: MTCNN face search and its Keras emotion CNN (loads TensorFlow)."""
+
+    name = 'fer'
+
+    def __init__(self):
+        from fer import FER
+        self.fer = FER(mtcnn=True)
+
+    def find_faces(self, frame, gray):
+        faces = self.fer.find_faces(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))  # MTCNN wants RGB
+        return [[int(v) for v in face] for face in faces]
+
+    def classify_tiles(self, tiles):
+        if not tiles:
+            return []
+        inset = (self.TILE - self.TILE_FACE) // 2
+        strip = cv2.cvtColor(np.hstack(tiles), cv2.COLOR_GRAY2BGR)  # FER converts BGR to gray itself
+        rects = [(i * self.TILE + inset, inset, self.TILE_FACE, self.TILE_FACE) for i in range(len(tiles))]
+        scores = [None] * len(tiles)
+        for result in self.fer.detect_emotions(strip, face_rectangles=rects):
+            scores[int(result['box'][0]) // self.TILE] = result['emotions']
+        return scores
+
+
+class OnnxBackend(EmotionBackend):
+    """FER+ emotion classifier on ONNX Runtime (cv2.dnn when onnxruntime is missing or asked for) and
+    YuNet face search through cv2.FaceDetectorYN. Both run on the CPU with INFERENCE_THREADS threads;
+    int8-quantized model files load the same way as float ones.
+
+    Model zoo FER+ exports fix the batch dimension at 1. On ONNX Runtime the input is re-declared
+    with a symbolic batch at load time (needs the onnx package) so all faces of a frame run in one
+    call; where that is not possible, classify_tiles runs the model once per face.
+    """
+
+    LABELS = ('neutral', 'happy', 'surprise', 'sad', 'angry', 'disgust', 'fear', 'contempt')  # FER+ order
+    FACE_SCORE_THRESHOLD = 0.8
+    FACE_NMS_THRESHOLD = 0.3
+
+    def __init__(self, emotion_model, face_models=(), runtime='auto', threads=INFERENCE_THREADS):
+        if runtime != 'dnn' and ONNX_RUNTIME_AVAILABLE:
+            self._open_session(emotion_model, threads)
+            runtime = 'onnxruntime'
+        else:
+            cv2.setNumThreads(threads)
+            self.session = None
+            self.net = cv2.dnn.readNetFromONNX(str(emotion_model))
+            self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+            self.batch_size = 1
+            runtime = 'cv2.dnn'
+        self.name = f"onnx ({runtime}, {Path(emotion_model).name}, batch {self.batch_size or 'any'})"
+
+        self.face_detector = None
+        self._face_input_size = None
+        for face_model in face_models if hasattr(cv2, 'FaceDetectorYN') else ():
+            try:
+                self.face_detector = cv2.FaceDetectorYN.create(str(face_model), "", (320, 320),
+                                                               self.FACE_SCORE_THRESHOLD, self.FACE_NMS_THRESHOLD)
+            except cv2.error as e:
+                print(f"⚠️ Could not load {Path(face_model).name}: {e}")
+                continue
+            self.name += f" + {Path(face_model).name}"
+            break
+
+    @staticmethod
+    def _session_options(threads, log_severity=2):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.log_severity_level = log_severity
+        return options
+
+    def _open_session(self, emotion_model, threads):
+        providers = ['CPUExecutionProvider']
+        self.session = ort.InferenceSession(str(emotion_model), self._session_options(threads), providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.batch_size = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        if self.batch_size != 1:
+            return
+        dynamic = self._dynamic_batch_model(emotion_model)
+        if dynamic is None:
+            return
+        try:
+            # graphs that hard-code the batch in an inner Reshape only fail once run with N > 1
+            probe = ort.InferenceSession(dynamic, self._session_options(threads, log_severity=4), providers=providers)
+            probe.run(None, {self.input_name: np.zeros((2, *model_input.shape[1:]), dtype=np.float32)})
+        except Exception:
+            return
+        self.session = ort.InferenceSession(dynamic, self._session_options(threads), providers=providers)
+        self.batch_size = None
+
+    @staticmethod
+    def _dynamic_batch_model(path):
+        """Serialized copy of the model with a symbolic batch dimension on its input and outputs."""
+        try:
+            import onnx
+        except ImportError:
+            return None
+        model = onnx.load(str(path))
+        del model.graph.value_info[:]  # stale intermediate shapes; the runtime infers them again
+        weights = {init.name for init in model.graph.initializer}  # old opsets list weights as inputs
+        for value in [v for v in model.graph.input if v.name not in weights] + list(model.graph.output):
+            dims = value.type.tensor_type.shape.dim
+            if dims:
+                dims[0].dim_param = 'N'
+        return model.SerializeToString()
+
+    def find_faces(self, frame, gray):
+        if self.face_detector is None:
+            return None
+        size = (frame.shape[1], frame.shape[0])
+        if size != self._face_input_size:
+            self.face_detector.setInputSize(size)
+            self._face_input_size = size
+        _, faces = self.face_detector.detect(frame)
+        if faces is None:
+            return []
+        return [[int(v) for v in face[:4]] for face in faces]
+
+    def _run(self, batch):
+        if self.session is not None:
+            return self.session.run(None, {self.input_name: batch})[0]
+        self.net.setInput(batch)
+        return self.net.forward()
+
+    def classify_tiles(self, tiles):
+        if not tiles:
+            return []
+        inset = (self.TILE - self.TILE_FACE) // 2
+        # FER+ takes N x 1 x 64 x 64 raw 0-255 grayscale
+        batch = np.stack([tile[inset:inset + self.TILE_FACE, inset:inset + self.TILE_FACE] for tile in tiles])
+        batch = batch.astype(np.float32)[:, None]
+        if self.batch_size in (None, len(batch)):
+            logits = self._run(batch)
+        else:
+            logits = np.concatenate([self._run(batch[i:i + 1]) for i in range(len(batch))])
+        logits = logits.reshape(len(tiles), -1)
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        return [{label: round(float(p), 2) for label, p in zip(self.LABELS, row)} for row in probs]
+
+
+def find_models(candidates):
+    """Candidate file names present in MODEL_DIR, in preference order (int8 ones dropped if disabled)."""
+    return [MODEL_DIR / name for name in candidates
+            if (USE_INT8_MODELS or 'int8' not in name) and (MODEL_DIR / name).exists()]
+
+
+def create_emotion_backend(preference=EMOTION_BACKEND):
+    """Backend per EMOCARE_BACKEND; None means Haar boxes with placeholder labels."""
+    if preference in ('auto', 'onnx', 'dnn'):
+        face_models = find_models(FACE_MODEL_FILES)  # none loadable -> Haar boxes, ONNX emotions
+        for emotion_model in find_models(EMOTION_MODEL_FILES):
+            try:
+                return OnnxBackend(emotion_model, face_models, runtime=preference)
+            except Exception as e:  # e.g. cv2.dnn has no kernels for some quantized operators
+                print(f"⚠️ Could not load {emotion_model.name}: {e}")
+    if preference in ('auto', 'fer') and FER_AVAILABLE:
+        try:
+            return FERBackend()
+        except Exception as e:
+            print(f"⚠️ FER emotion backend unavailable: {e}")
+    return None
+
+
 # ============================================================================
 # ENHANCED EMOTION DETECTOR
 # ============================================================================
 
 class EmotionDetector:
-    """Enhanced emotion detection with stabilization via filtering and smoothing."""
+    """Enhanced emotion detection with stabilization via filtering and smoothing.
+
+    Faces are searched for (the backend's detector, Haar as fallback) when the caller has no
+    tracked boxes or FACE_SEARCH_INTERVAL passed; in between, analyze() classifies the boxes the
+    DetectionScheduler followed across every captured frame. The emotion model sees all faces
+    of a frame at once, as tiles cut from the frame's one grayscale conversion, so it runs a
+    single batch per frame.
+    """
+
+    FACE_SEARCH_INTERVAL = 2 * DETECTION_MAX_STALENESS  # a still face is re-searched every other stale run
+    FACE_TILE = EmotionBackend.TILE  # classifier tile: FACE_TILE_FACE px of face plus context
+    FACE_TILE_FACE = EmotionBackend.TILE_FACE
 
     def __init__(self):
-        self.detector = FER(mtcnn=True) if FER_AVAILABLE else None
+        self.backend = create_emotion_backend()
         self.face_cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         )
@@ -1532,59 +2002,126 @@ class EmotionDetector:
 
         self.recent_confident_emotions = deque(maxlen=10)
 
+        # per-instance state: one pipeline worker per detector
+        self.last_gray = None  # grayscale of the last analyzed frame, shared with the eye/crying checks
+        self._last_face_search = 0.0
+
         self.last_emotion_change = time.time()
         self.crying_frames = 0
         self.no_eye_contact_frames = 0
 
     def detect_emotions(self, frame):
         """Detect emotions from multiple faces, applying confidence filter."""
-        faces_data = []
+        return self.record_detection(self.analyze(frame))
+
+    def analyze(self, frame, boxes=None):
+        """Run face/emotion models on one frame without touching the emotion or face history,
+        so a pipeline worker can analyze while another thread records results.
+        `boxes` are face boxes tracked up to this frame; without them the faces are searched for."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        now = time.monotonic()
+
+        if boxes is None or now - self._last_face_search >= self.FACE_SEARCH_INTERVAL:
+            boxes = self._find_faces(frame, gray)
+            self._last_face_search = now
+        self.last_gray = gray
+
+        if self.backend is not None:
+            faces_data = self._classify_faces(gray, boxes)
+        else:
+            faces_data = []
+            for (x, y, w, h) in boxes:
+                self.frame_count += 1
+                emotions_list = ['neutral', 'neutral', 'happy', 'sad', 'neutral']
+                emotion = emotions_list[int(time.time() * 10) % len(emotions_list)]
 
-        if self.detector and FER_AVAILABLE:
-            try:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.detector.detect_emotions(rgb_frame)
-
-                for result in results:
-                    emotions = result['emotions']
-                    emotion = max(emotions, key=emotions.get)
-                    confidence = emotions[emotion]
-                    box = result['box']
-
-                    if emotion != 'neutral' and confidence < CONFIDENCE_THRESHOLD:
-                        emotion = 'neutral'
-                        confidence = 0.5
-
-                    if confidence > 0.3:
-                        faces_data.append({
-                            'emotion': emotion,
-                            'confidence': confidence,
-                            'box': box
-                        })
-                        if emotion != 'neutral':
-                            self.recent_confident_emotions.append(emotion)
+                faces_data.append({
+                    'emotion': emotion,
+                    'confidence': 0.75,
+                    'box': [x, y, w, h]
+                })
 
-            except Exception as e:
-                pass
+        return faces_data
 
-        if not faces_data:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _find_faces(self, frame, gray):
+        """Full-frame face search with the backend's detector, Haar on a half-size frame otherwise."""
+        if self.backend is not None:
+            try:
+                faces = self.backend.find_faces(frame, gray)
+                if faces:
+                    return faces
+            except Exception:
+                pass
 
-            # FIX: Removed erroneous cv2.findNonContourRects(gray) call
+        small = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+        faces = self.face_cascade.detectMultiScale(small, 1.1, 3, minSize=(25, 25))
+        return [[int(v) * 2 for v in face] for face in faces]
+
+    def face_tile(self, gray, box):
+        """Square FACE_TILE x FACE_TILE grayscale tile with the face scaled to FACE_TILE_FACE px in
+        the middle; edges outside the frame are replicated."""
+        x, y, w, h = box
+        side = max(w, h)
+        context = side * (self.FACE_TILE - self.FACE_TILE_FACE) // (2 * self.FACE_TILE_FACE)
+        x0, y0 = x + w // 2 - side // 2 - context, y + h // 2 - side // 2 - context
+        size = side + 2 * context
+        frame_h, frame_w = gray.shape
+        crop = gray[max(0, y0):min(frame_h, y0 + size), max(0, x0):min(frame_w, x0 + size)]
+        if crop.size == 0:
+            return None
+        top, left = max(0, -y0), max(0, -x0)
+        crop = cv2.copyMakeBorder(crop, top, size - crop.shape[0] - top, left, size - crop.shape[1] - left,
+                                  cv2.BORDER_REPLICATE)
+        return cv2.resize(crop, (self.FACE_TILE, self.FACE_TILE), interpolation=cv2.INTER_AREA)
+
+    def classify_tiles(self, tiles):
+        """Emotion scores for a list of face tiles (from one frame or several) in one model batch.
+        Returns one {emotion: score} dict, or None if the model rejected the tile, per tile."""
+        return self.backend.classify_tiles(tiles)
+
+    def warm_up(self):
+        """Load-time inference on blank input; run it on the thread that will use the models."""
+        if self.backend is not None:
+            try:
+                self.backend.warm_up()
+            except Exception as e:
+                print(f"⚠️ Emotion model warm-up failed: {e}")
+
+    def _classify_faces(self, gray, boxes):
+        tiles, tiled_boxes = [], []
+        for box in boxes:
+            tile = self.face_tile(gray, box)
+            if tile is not None:
+                tiles.append(tile)
+                tiled_boxes.append(box)
+        try:
+            scores = self.classify_tiles(tiles)
+        except Exception:
+            return []
 
-            faces = self.face_cascade.detectMultiScale(gray, 1.1, 3, minSize=(50, 50))
+        faces_data = []
+        for box, emotions in zip(tiled_boxes, scores):
+            if not emotions:
+                continue
+            emotion = max(emotions, key=emotions.get)
+            confidence = emotions[emotion]
 
-            for (x, y, w, h) in faces:
-                self.frame_count += 1
-                emotions_list = ['neutral', 'neutral', 'happy', 'sad', 'neutral']
-                emotion = emotions_list[int(time.time() * 10) % len(emotions_list)]
+            if emotion != 'neutral' and confidence < CONFIDENCE_THRESHOLD:
+                emotion = 'neutral'
+                confidence = 0.5
 
+            if confidence > 0.3:
                 faces_data.append({
                     'emotion': emotion,
-                    'confidence': 0.75,
-                    'box': [x, y, w, h]
+                    'confidence': confidence,
+                    'box': list(box)
                 })
+                if emotion != 'neutral':
+                    self.recent_confident_emotions.append(emotion)
+        return faces_data
 
+    def record_detection(self, faces_data):
+        """Fold one analyzed frame into the history used for mood scores and alerts."""
         if faces_data:
             primary_emotion = faces_data[0]['emotion']
             self.emotion_history.append(primary_emotion)
@@ -1596,13 +2133,16 @@ class EmotionDetector:
 
         return faces_data
 
-    def detect_eye_contact(self, frame, face_box):
-        """Detect eye contact/avoidance"""
+    def detect_eye_contact(self, frame, face_box, gray=None):
+        """Detect eye contact/avoidance. Pass the frame's grayscale to skip a conversion."""
         x, y, w, h = face_box
         if x < 0 or y < 0 or x + w > frame.shape[1] or y + h > frame.shape[0]:
             return False
 
-        roi_gray = cv2.cvtColor(frame[y:y + h // 2, x:x + w], cv2.COLOR_BGR2GRAY)
+        if gray is not None:
+            roi_gray = gray[y:y + h // 2, x:x + w]
+        else:
+            roi_gray = cv2.cvtColor(frame[y:y + h // 2, x:x + w], cv2.COLOR_BGR2GRAY)
         eyes = self.eye_cascade.detectMultiScale(roi_gray, 1.1, 5)
 
         has_eye_contact = len(eyes) >= 2
@@ -1615,14 +2155,14 @@ class EmotionDetector:
 
         return has_eye_contact
 
-    def detect_crying(self, frame, face_box):
-        """Detect potential crying (simplified)"""
+    def detect_crying(self, frame, face_box, hsv=None):
+        """Detect potential crying (simplified). Pass the frame's HSV to share one conversion across faces."""
         x, y, w, h = face_box
         if x < 0 or y < 0 or x + w > frame.shape[1] or y + h > frame.shape[0]:
             return False
 
         roi = frame[y:y + h, x:x + w]
-        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+        hsv = hsv[y:y + h, x:x + w] if hsv is not None else cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
         lower_bright = np.array([0, 0, 200])
         upper_bright = np.array([180, 50, 255])
         mask = cv2.inRange(hsv, lower_bright, upper_bright)
@@ -1681,11 +2221,7 @@ class EmotionDetector:
         """Calculate mood score (0-100) using a larger rolling average for strong stabilization."""
         if len(self.emotion_history) < 5: return 50
         recent = list(self.emotion_history)[-SMOOTHING_WINDOW_SIZE:]
-        emotion_scores = {
-            'happy': 95, 'surprise': 65, 'neutral': 50,
-            'disgust': 25, 'angry': 30, 'fear': 15, 'sad': 5
-        }
-        scores = [emotion_scores.get(e, 50) for e in recent]
+        scores = [EMOTION_MOOD_SCORES.get(e, 50) for e in recent]
         if len(scores) == 0: return 50
         return sum(scores) / len(scores)
 
@@ -1877,10 +2413,191 @@ Respond as a caring therapist would:"""
 # VIDEO CAPTURE THREAD
 # ============================================================================
 
+class DetectionScheduler:
+    """Decides per captured frame whether the emotion models need to run.
+
+    Works on an 80x60 grayscale thumbnail: the models run when the scene differs from the last
+    analyzed frame, a face moved or its expression region changed, tracking was lost, no face is
+    known yet, or DETECTION_MAX_STALENESS passed. In between, face boxes follow the face by
+    template matching on the thumbnail, so overlays stay on target for almost no CPU.
+    """
+    THUMB_SIZE = (80, 60)
+    SEARCH_INTERVAL = 0.4  # re-check this often while no face is known
+    SCENE_CHANGE = 8.0  # mean absolute thumbnail difference (0-255) that counts as a new scene
+    FACE_CHANGE = 12.0  # mean absolute difference inside a motion-compensated face box
+    FACE_MOVE = 0.2  # box shift, as a share of its width
+    TRACK_MIN_SCORE = 0.5  # template match below this means the face was lost
+    TRACKED_REASONS = ('moved', 'expression', 'stale')  # triggers after which tracked boxes still hold
+
+    def __init__(self, min_interval=DETECTION_MIN_INTERVAL, max_staleness=DETECTION_MAX_STALENESS):
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self._thumbs = deque(maxlen=120)  # (seq, thumbnail) until the frame's result comes back
+        self._reference = None  # thumbnail of the last analyzed frame
+        self._faces = []  # per detected face: template, box at detection, tracked box (thumbnail px)
+        self._scale = (1.0, 1.0)
+        self._last_run = 0.0
+        self.triggers = Counter()
+
+    def _thumbnail(self, frame):
+        small = cv2.resize(frame, self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def update(self, seq, frame):
+        """Call for every captured frame; returns why this frame should go to the models, or None."""
+        thumb = self._thumbnail(frame)
+        now = time.monotonic()
+        with self._lock:
+            self._scale = (frame.shape[1] / self.THUMB_SIZE[0], frame.shape[0] / self.THUMB_SIZE[1])
+            self._thumbs.append((seq, thumb))
+            reason = self._track(thumb) or self._change_reason(thumb, now)
+            if reason is None or now - self._last_run < self.min_interval:
+                self.triggers['skipped'] += 1
+                return None
+            self._last_run = now
+            self.triggers[reason] += 1
+            return reason
+
+    def _change_reason(self, thumb, now):
+        if self._reference is None:
+            return 'start'
+        if now - self._last_run >= self.max_staleness:
+            return 'stale'
+        if not self._faces and now - self._last_run >= self.SEARCH_INTERVAL:
+            return 'search'
+        if cv2.absdiff(thumb, self._reference).mean() > self.SCENE_CHANGE:
+            return 'scene'
+        return None
+
+    def _track(self, thumb):
+        """Moves each face box to its best template match; returns a reason to re-detect, if any."""
+        reason = None
+        for face in self._faces:
+            x, y, w, h = face['box']
+            template = face['template']
+            pad_x, pad_y = w // 2 + 2, h // 2 + 2
+            x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+            window = thumb[y0:y + h + pad_y, x0:x + w + pad_x]
+            if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                reason = reason or 'lost'
+                continue
+            scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (mx, my) = cv2.minMaxLoc(scores)
+            if score < self.TRACK_MIN_SCORE:
+                reason = reason or 'lost'
+                continue
+            nx, ny = x0 + mx, y0 + my
+            face['box'] = [nx, ny, w, h]
+            ox, oy = face['origin']
+            if math.hypot(nx - ox, ny - oy) > self.FACE_MOVE * w:
+                reason = reason or 'moved'
+            elif cv2.absdiff(thumb[ny:ny + h, nx:nx + w], template).mean() > self.FACE_CHANGE:
+                reason = reason or 'expression'
+        return reason
+
+    def on_detection(self, seq, faces_data):
+        """Re-anchor the reference thumbnail and face templates on the frame the models just analyzed."""
+        with self._lock:
+            thumb = next((t for s, t in reversed(self._thumbs) if s == seq), None)
+            while self._thumbs and self._thumbs[0][0] <= seq:
+                self._thumbs.popleft()
+            if thumb is None:
+                return
+            self._reference = thumb
+            sx, sy = self._scale
+            self._faces = []
+            for face_data in faces_data:
+                x, y, w, h = face_data['box']
+                x0, y0 = max(0, int(x / sx)), max(0, int(y / sy))
+                x1, y1 = min(thumb.shape[1], int((x + w) / sx)), min(thumb.shape[0], int((y + h) / sy))
+                if x1 - x0 < 4 or y1 - y0 < 4:
+                    continue
+                self._faces.append({'template': thumb[y0:y1, x0:x1].copy(), 'origin': (x0, y0),
+                                    'box': [x0, y0, x1 - x0, y1 - y0]})
+
+    def trigger_counts(self):
+        """Snapshot of `triggers`; the capture thread adds keys to it while other threads read."""
+        with self._lock:
+            return dict(self.triggers)
+
+    def tracked_boxes(self):
+        """Current face boxes in frame pixels, in the order of the last detection's faces."""
+        with self._lock:
+            sx, sy = self._scale
+            return [[int(x * sx), int(y * sy), int(w * sx), int(h * sy)]
+                    for x, y, w, h in (face['box'] for face in self._faces)]
+
+
+class LatestFrameSlot:
+    """Single-item mailbox between pipeline stages: put() replaces anything not yet taken,
+    so a slow consumer always gets the newest item and never works through a backlog."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def take(self, timeout=None):
+        with self._cond:
+            if self._item is None and not self._closed and timeout != 0:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageTimer:
+    """Exponentially averaged duration (ms) and rate (per second) of one pipeline stage."""
+    ALPHA = 0.1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ms = 0.0
+        self.rate = 0.0
+        self.count = 0
+        self._last = None
+
+    def record(self, started):
+        now = time.perf_counter()
+        ms = (now - started) * 1000
+        with self._lock:
+            self.ms = ms if self.count == 0 else self.ms + self.ALPHA * (ms - self.ms)
+            if self._last is not None and now > self._last:
+                rate = 1.0 / (now - self._last)
+                self.rate = rate if self.count == 1 else self.rate + self.ALPHA * (rate - self.rate)
+            self._last = now
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'ms': self.ms, 'rate': self.rate, 'count': self.count}
+
+
 class VideoThread(QThread):
-    """Enhanced video thread with detection rate limiting."""
+    """Camera pipeline. A capture thread publishes every frame; frames the DetectionScheduler
+    picks go through a latest-frame slot to the inference workers (stale frames are dropped,
+    never queued); this thread composites the newest detections onto the newest frame, so
+    preview FPS follows the camera, not the model."""
     change_pixmap_signal = pyqtSignal(np.ndarray)
     emotion_signal = pyqtSignal(str, float, list)
+    stats_signal = pyqtSignal(dict)
+
+    INFERENCE_WORKERS = 1  # each extra worker loads its own model instance
+    RESULT_TTL = 1.0  # seconds overlays stay up without a fresh detection
+    STATS_INTERVAL = 1.0
 
     def __init__(self):
         super().__init__()
@@ -1888,7 +2605,14 @@ class VideoThread(QThread):
         self.detector = EmotionDetector()
 
         self.frame_counter = 0
-        self.detection_interval = DETECTION_INTERVAL
+        self.scheduler = DetectionScheduler()
+        self.warm_up_ms = None
+
+        self.timers = {stage: StageTimer() for stage in ('capture', 'inference', 'composite')}
+        self._frame_cond = threading.Condition()
+        self._frame = None
+        self._detect_slot = LatestFrameSlot()
+        self._result_slot = LatestFrameSlot()
 
     def get_emotion_color(self, emotion):
         """Get color for emotion (Using Bright Primary Colors for visibility over video feed)"""
@@ -1899,6 +2623,15 @@ class VideoThread(QThread):
         }
         return colors.get(emotion, (255, 255, 255))
 
+    def pipeline_stats(self):
+        stats = {stage: timer.snapshot() for stage, timer in self.timers.items()}
+        stats['skipped_frames'] = self._detect_slot.dropped  # frames replaced before inference took them
+        stats['inference_workers'] = self.INFERENCE_WORKERS
+        stats['detection_triggers'] = self.scheduler.trigger_counts()
+        stats['backend'] = self.detector.backend.name if self.detector.backend else 'none'
+        stats['warm_up_ms'] = self.warm_up_ms
+        return stats
+
     def run(self):
         cap = cv2.VideoCapture(0)
         if not cap.isOpened():
@@ -1908,53 +2641,133 @@ class VideoThread(QThread):
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
 
-        while self.running:
-            ret, frame = cap.read()
-            if ret:
-                frame = cv2.flip(frame, 1)
-
-                faces_data = []
+        detectors = [self.detector] + [EmotionDetector() for _ in range(self.INFERENCE_WORKERS - 1)]
+        stages = [threading.Thread(target=self._capture_loop, args=(cap,), name="emocare-capture", daemon=True)]
+        stages += [threading.Thread(target=self._inference_loop, args=(detector,),
+                                    name=f"emocare-inference-{i}", daemon=True)
+                   for i, detector in enumerate(detectors)]
+        for stage in stages:
+            stage.start()
 
-                if self.frame_counter % self.detection_interval == 0:
-                    faces_data = self.detector.detect_emotions(frame)
+        self._composite_loop()
 
-                self.frame_counter += 1
-
-                for face_data in faces_data:
-                    x, y, w, h = face_data['box']
-                    emotion = face_data['emotion']
-                    confidence = face_data['confidence']
-
-                    x, y, w, h = int(x), int(y), int(w), int(h)
-
-                    color = self.get_emotion_color(emotion)
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), color, 3)
-
-                    label = f"{emotion.capitalize()} ({confidence:.2f})"
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(frame, (x, y - 30), (x + label_size[0] + 10, y), color, -1)
-                    cv2.putText(frame, label, (x + 5, y - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-                    if face_data == faces_data[0]:
-                        has_eyes = self.detector.detect_eye_contact(frame, face_data['box'])
-                        if not has_eyes and self.detector.no_eye_contact_frames > 5:
-                            cv2.putText(frame, "No Eye Contact", (x, y + h + 20),
-                                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+        self.running = False
+        self._detect_slot.close()
+        self._result_slot.close()
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+        for stage in stages:
+            stage.join(timeout=2.0)
+        cap.release()
 
-                self.change_pixmap_signal.emit(frame)
+    def _capture_loop(self, cap):
+        while self.running:
+            started = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            frame = cv2.flip(frame, 1)
+            self.timers['capture'].record(started)
+
+            with self._frame_cond:
+                self._frame = (self.frame_counter, frame)
+                self._frame_cond.notify_all()
+            reason = self.scheduler.update(self.frame_counter, frame)
+            if reason:
+                # the scheduler's tracker has followed every frame, so its boxes spare a face search
+                boxes = self.scheduler.tracked_boxes() if reason in DetectionScheduler.TRACKED_REASONS else None
+                self._detect_slot.put((self.frame_counter, frame, boxes or None))
+            self.frame_counter += 1
+
+    def _inference_loop(self, detector):
+        started = time.perf_counter()
+        detector.warm_up()
+        self.warm_up_ms = (time.perf_counter() - started) * 1000
+        while self.running:
+            item = self._detect_slot.take(timeout=0.1)
+            if item is None:
+                continue
+            seq, frame, boxes = item
+            started = time.perf_counter()
+            faces_data = detector.analyze(frame, boxes)
+            self.timers['inference'].record(started)
+            self._result_slot.put((seq, faces_data, detector.last_gray))
+
+    def _composite_loop(self):
+        last_seq = -1
+        applied_seq = -1
+        faces_data = []
+        faces_time = 0.0
+        eye_warning = False
+        next_stats = time.monotonic() + self.STATS_INTERVAL
 
+        while self.running:
+            with self._frame_cond:
+                self._frame_cond.wait_for(
+                    lambda: not self.running or (self._frame is not None and self._frame[0] != last_seq),
+                    timeout=0.1)
+                current = self._frame
+            if current is None or current[0] == last_seq:
+                continue
+            last_seq, frame = current
+            started = time.perf_counter()
+
+            result = self._result_slot.take(timeout=0)
+            fresh = result is not None and result[0] > applied_seq  # workers may finish out of order
+            if fresh:
+                applied_seq, faces_data, gray = result
+                faces_time = time.monotonic()
+                self.scheduler.on_detection(applied_seq, faces_data)
+                self.detector.record_detection(faces_data)
                 if faces_data:
-                    primary = faces_data[0]
-                    self.emotion_signal.emit(
-                        primary['emotion'],
-                        primary['confidence'],
-                        faces_data
-                    )
-
-            time.sleep(0.01)
-
-        cap.release()
+                    has_eyes = self.detector.detect_eye_contact(frame, faces_data[0]['box'], gray=gray)
+                    eye_warning = not has_eyes and self.detector.no_eye_contact_frames > 5
+            elif faces_data:
+                boxes = self.scheduler.tracked_boxes()
+                if len(boxes) == len(faces_data):
+                    # follow the tracker between model runs; labels stay from the last detection
+                    faces_data = [dict(face, box=box) for face, box in zip(faces_data, boxes)]
+                elif time.monotonic() - faces_time > self.RESULT_TTL:
+                    faces_data = []
+
+            frame = frame.copy()  # the inference stage may still be reading the captured frame
+            self._draw_overlays(frame, faces_data, eye_warning)
+            self.timers['composite'].record(started)
+            self.change_pixmap_signal.emit(frame)
+
+            if fresh and faces_data:
+                primary = faces_data[0]
+                self.emotion_signal.emit(
+                    primary['emotion'],
+                    primary['confidence'],
+                    faces_data
+                )
+
+            if time.monotonic() >= next_stats:
+                next_stats += self.STATS_INTERVAL
+                self.stats_signal.emit(self.pipeline_stats())
+
+    def _draw_overlays(self, frame, faces_data, eye_warning):
+        for face_data in faces_data:
+            x, y, w, h = face_data['box']
+            emotion = face_data['emotion']
+            confidence = face_data['confidence']
+
+            x, y, w, h = int(x), int(y), int(w), int(h)
+
+            color = self.get_emotion_color(emotion)
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 3)
+
+            label = f"{emotion.capitalize()} ({confidence:.2f})"
+            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+            cv2.rectangle(frame, (x, y - 30), (x + label_size[0] + 10, y), color, -1)
+            cv2.putText(frame, label, (x + 5, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+            if face_data is faces_data[0] and eye_warning:
+                cv2.putText(frame, "No Eye Contact", (x, y + h + 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
 
     def stop(self):
         self.running = False
@@ -1971,7 +2784,6 @@ class EmoCareApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.dark_mode = False
-        self.emotion_detector = EmotionDetector()
         self.ai_psychologist = Llama32Psychologist()
         self.db_manager = DatabaseManager()
         self.voice_assistant = VoiceAssistant() if VOICE_AVAILABLE else None
@@ -2049,6 +2861,7 @@ class EmoCareApp(QMainWindow):
         self.video_thread = VideoThread()
         self.video_thread.change_pixmap_signal.connect(self.update_image)
         self.video_thread.emotion_signal.connect(self.update_emotion)
+        self.video_thread.stats_signal.connect(self.update_pipeline_stats)
         self.video_thread.start()
 
         self.alert_timer = QTimer()
@@ -2256,6 +3069,15 @@ class EmoCareApp(QMainWindow):
         )
         self.camera_label.setPixmap(scaled_pixmap)
 
+    def update_pipeline_stats(self, stats):
+        self.camera_label.setToolTip(
+            f"Preview: {stats['composite']['rate']:.0f} fps (camera {stats['capture']['rate']:.0f} fps, "
+            f"composite {stats['composite']['ms']:.1f} ms)\n"
+            f"Detection: {stats['inference']['ms']:.0f} ms per frame, {stats['inference']['rate']:.1f}/s "
+            f"on {stats['inference_workers']} worker(s), {stats['skipped_frames']} stale frames skipped\n"
+            f"Model: {stats['backend']}"
+            + (f", warm-up {stats['warm_up_ms']:.0f} ms" if stats['warm_up_ms'] is not None else ""))
+
     def update_emotion(self, emotion, confidence, faces_data):
         self.current_emotion = emotion
 
@@ -2432,15 +3254,7 @@ class EmoCareApp(QMainWindow):
         animation.start()
 
     def update_analytics(self):
-        analytics = self.db_manager.get_session_analytics(self.session_id)
-
-        self.analytics_tab.update_stats(
-            self.session_id,
-            self.session_start,
-            analytics['emotions'],
-            analytics['messages'],
-            analytics['alerts']
-        )
+        self.analytics_tab.refresh(self.session_id, self.session_start)
 
     def toggle_theme(self):
         self.dark_mode = not self.dark_mode
@@ -2816,13 +3630,15 @@ class EmoCareApp(QMainWindow):
         """
 
     def closeEvent(self, event):
+        # Stop producing rows before the session is closed and the writer shuts down
+        self.video_thread.stop()
+
         mood_score = self.video_thread.detector.get_mood_score()
         emotion_counts = Counter([e for e in self.video_thread.detector.emotion_history])
         dominant = emotion_counts.most_common(1)[0][0] if emotion_counts else "neutral"
 
         self.db_manager.end_session(self.session_id, dominant, mood_score)
-
-        self.video_thread.stop()
+        self.db_manager.close()
 
         event.accept()
 
@@ -2884,7 +3700,7 @@ def main():
     print("-" * 60)
     print(f"Configuration:")
     print(f"  - Smoothing Window: {SMOOTHING_WINDOW_SIZE} frames (approx 2.5s)")
-    print(f"  - Detection Rate: 1 frame every {DETECTION_INTERVAL} (reduced CPU)")
+    print(f"  - Detection: on scene/face change, at least every {DETECTION_MAX_STALENESS}s (reduced CPU)")
     print(f"  - Zen Flow Gravity: {ZEN_FLOW_GRAVITY} (New Game)")
     print(f"  - Global Sound Cooldown: {GLOBAL_SOUND_COOLDOWN}s")
     print("=" * 60)
@@ -2899,10 +3715,12 @@ def main():
     else:
         print("⚠️ Voice features disabled.")
 
-    if FER_AVAILABLE:
+    if EMOTION_BACKEND in ('auto', 'onnx', 'dnn') and find_models(EMOTION_MODEL_FILES):
+        print(f"✓ Emotion detection: ONNX models from {MODEL_DIR} ({INFERENCE_THREADS} threads)")
+    elif EMOTION_BACKEND in ('auto', 'fer') and FER_AVAILABLE:
         print("✓ Advanced emotion detection (FER)")
     else:
-        print("⚠️ Using basic emotion detection (install: pip install fer)")
+        print(f"⚠️ Using basic emotion detection (put {EMOTION_MODEL_FILES[-1]} in {MODEL_DIR}, or pip install fer)")
 
     if PLOT_AVAILABLE:
         print("✓ Matplotlib/Charts enabled for Analytics")
@@ -0,0 +1,216 @@
+# ollama_mock.py — stand-in Ollama server for exercising quiz.py without a model
+#
+# Usage:
+#   python ollama_mock.py --port 11435 --tokens-per-sec 60 --latency 0.5
+#   python ollama_mock.py --error-rate 0.2 --truncate-rate 0.3 --malformed-rate 0.3
+#   OLLAMA_ENDPOINTS=http://127.0.0.1:11435/api/generate python quiz.py
+#
+# Speaks the streaming /api/generate protocol (one JSON object per line, 'response' + 'done').
+# Quiz prompts get a canned JSON question array; anything else gets a canned markdown chat answer.
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUIZ_PROMPT = re.compile(r'exactly (\d+) multiple choice questions about (.+?) at (\w+) difficulty', re.S)
+
+CHAT_ANSWER = (
+    "Good question! Here is some **context** that should help:\n\n"
+    "- Think about what the question is *really* asking.\n"
+    "- Eliminate options that contradict the `definition`.\n"
+    "- Consider a concrete example before you pick.\n\n"
+    "Once you have narrowed it down, trust your reasoning."
+)
+
+
+class MockConfig:
+    def __init__(self, tokens_per_sec=200.0, latency=0.05, error_rate=0.0, truncate_rate=0.0,
+                 malformed_rate=0.0, chunk_chars=4, seed=None, chat_repeat=1):
+        self.tokens_per_sec = tokens_per_sec  # 0 = as fast as possible
+        self.latency = latency  # seconds before the first chunk ("model load / prompt eval")
+        self.error_rate = error_rate  # share of requests answered with HTTP 500
+        self.truncate_rate = truncate_rate  # share of quiz streams cut off part-way through
+        self.malformed_rate = malformed_rate  # share of questions written with LLM-style JSON slips
+        self.chunk_chars = chunk_chars  # characters per streamed "token"
+        self.chat_repeat = chat_repeat  # canned chat answer repeated this many times (long answers)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def roll(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def randint(self, a, b):
+        with self.lock:
+            return self.rng.randint(a, b)
+
+
+def quiz_text(topic, count, difficulty, config, seed):
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        answer = rng.randrange(4)
+        question = {
+            "question": f"[{difficulty}] {topic}: sample question {seed % 100000}-{i} about concept {rng.randrange(10 ** 6)}?",
+            "options": [f"Choice {c} for item {i}" for c in "ABCD"],
+            "correct_answer": answer,
+            "explanation": f"Choice {'ABCD'[answer]} is right because this is a canned mock answer.",
+        }
+        text = json.dumps(question, indent=2)
+        if config.roll(config.malformed_rate):
+            # the slips real models make: single quotes, bare keys, trailing commas
+            text = text.replace('"explanation"', 'explanation').rstrip('}').rstrip() + ',\n}'
+            text = text.replace(f'"Choice A for item {i}"', f"'Choice A for item {i}'")
+        items.append(text)
+    return "```json\n[\n" + ",\n".join(items) + "\n]\n```"
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive + chunked streaming like the real server
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            pass  # client dropped a pooled keep-alive connection
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/api/tags':
+            self._send_json(200, {"models": [{"name": "mock"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if self.path.rstrip('/') != '/api/generate':
+            self._send_json(404, {"error": "not found"})
+            return
+        with config.lock:
+            config.requests += 1
+
+        time.sleep(config.latency)
+        if config.roll(config.error_rate):
+            self._send_json(500, {"error": "mock: simulated server error"})
+            return
+
+        prompt = body.get('prompt', '')
+        match = QUIZ_PROMPT.search(prompt)
+        if match:
+            seed = (body.get('options') or {}).get('seed')
+            if seed is None:
+                seed = config.randint(0, 2 ** 31 - 1)
+            text = quiz_text(match.group(2), int(match.group(1)), match.group(3), config, seed)
+            if config.roll(config.truncate_rate):
+                text = text[:config.randint(len(text) // 3, len(text) - 1)]  # hit the length limit
+        else:
+            text = "\n\n".join([CHAT_ANSWER] * max(1, config.chat_repeat))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        delay = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+        step = max(1, config.chunk_chars)
+        try:
+            for i in range(0, len(text), step):
+                self._write_chunk({"model": body.get('model', 'mock'), "response": text[i:i + step], "done": False})
+                if delay:
+                    time.sleep(delay)
+            self._write_chunk({"model": body.get('model', 'mock'), "response": "", "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading (cancelled stream)
+
+    def _write_chunk(self, obj):
+        data = (json.dumps(obj) + "\n").encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, obj):
+        data = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockOllamaServer:
+    """Runs the mock on a background thread; `url` is the /api/generate endpoint to hand to quiz.py."""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockConfig()
+        self.httpd = ThreadingHTTPServer((host, port), MockOllamaHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_config_args(parser, sweep=False):
+    """Mock knobs as CLI options; with sweep=True --tokens-per-sec takes several rates."""
+    if sweep:
+        parser.add_argument("--tokens-per-sec", type=float, nargs="+", default=[60.0, 600.0, 0.0],
+                            help="rates to sweep, 0 = unthrottled")
+    else:
+        parser.add_argument("--tokens-per-sec", type=float, default=200.0, help="0 = unthrottled")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first chunk")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-chars", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chat-repeat", type=int, default=1, help="repeat the canned chat answer N times")
+
+
+def config_from_args(args):
+    return MockConfig(args.tokens_per_sec, args.latency, args.error_rate, args.truncate_rate,
+                      args.malformed_rate, args.chunk_chars, args.seed, args.chat_repeat)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Ollama /api/generate server for quiz.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_config_args(parser)
+    args = parser.parse_args(argv)
+
+    server = MockOllamaServer(config_from_args(args), args.host, args.port)
+    print(f"Mock Ollama listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,25 @@
+import os
 import sys
+import re
+import csv
 import json
+import html
+import random
+import sqlite3
+import getpass
 import requests
 from datetime import datetime
 import threading
 import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QLineEdit, QTextEdit, QSpinBox, QComboBox,
     QMessageBox, QFileDialog, QRadioButton, QButtonGroup, QProgressBar,
-    QFrame, QScrollArea, QDialog, QGridLayout, QSpacerItem, QSizePolicy
+    QFrame, QScrollArea, QDialog, QGridLayout, QSpacerItem, QSizePolicy, QCheckBox,
+    QInputDialog, QProgressDialog
 )
 from PyQt5.QtCore import (
     Qt, QObject, pyqtSignal, QThread, QTimer, QSize, pyqtSlot
@@ -16,33 +27,978 @@ from PyQt5.QtCore import (
 from PyQt5.QtGui import QFont, QColor, QTextCharFormat, QTextCursor, QPalette
 
 
+# --- Tolerant incremental parser for streamed quiz JSON ---
+QUESTION_OPTION_COUNT = 4
+_JSON_ESCAPES = set('"\\/bfnrtu')
+_OPTION_LABEL = re.compile(r'^\s*\(?([A-Da-d])[\.\):]\s+')
+
+
+def repair_json(text):
+    """
+    Rewrites the usual LLM JSON slips into valid JSON: single-quoted strings, raw newlines and
+    bad escapes inside strings, bare keys, Python literals and trailing commas.
+    """
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in '"\'':
+            quote, j, chars = ch, i + 1, []
+            while j < n and text[j] != quote:
+                c = text[j]
+                if c == '\\' and j + 1 < n:
+                    nxt = text[j + 1]
+                    if nxt == "'":
+                        chars.append("'")
+                    elif nxt in _JSON_ESCAPES:
+                        chars.append(c + nxt)
+                    else:
+                        chars.append('\\\\' + nxt)
+                    j += 2
+                    continue
+                chars.append({'"': '\\"', '\n': '\\n', '\r': '\\r', '\t': '\\t'}.get(c, c))
+                j += 1
+            out.append('"' + ''.join(chars) + '"')
+            i = j + 1
+            continue
+        if ch == ',':
+            k = i + 1
+            while k < n and text[k].isspace():
+                k += 1
+            if k == n or text[k] in '}]':
+                i += 1  # trailing comma
+                continue
+        if ch.isalpha() or ch == '_':
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == '_'):
+                j += 1
+            word = text[i:j]
+            k = j
+            while k < n and text[k].isspace():
+                k += 1
+            if k < n and text[k] == ':':
+                out.append(json.dumps(word))  # bare key
+            else:
+                out.append({'True': 'true', 'False': 'false', 'None': 'null'}.get(word, word))
+            i = j
+            continue
+        out.append(ch)
+        i += 1
+    return ''.join(out)
+
+
+def _truncation_candidates(text):
+    """Ways to close a cut-off object: as-is with open strings/brackets closed, then minus trailing fields."""
+    stack, cuts = [], []
+    quote, escape = None, False  # quote: delimiter of the open string (models also use '...')
+    for pos, ch in enumerate(text):
+        if quote:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+        elif ch == ',' and len(stack) == 1:
+            cuts.append(pos)  # boundary between top-level fields
+
+    candidates = [text + (quote or '') + ''.join(reversed(stack))]
+    candidates += [text[:pos] + '}' for pos in reversed(cuts)]
+    return candidates
+
+
+def normalize_question(obj):
+    """
+    Validate one parsed question against the quiz schema and return a clean copy, or None.
+    Requires a question, exactly QUESTION_OPTION_COUNT options and a correct_answer that
+    resolves to one of them (the option text itself, index, digit string or letter).
+    """
+    if not isinstance(obj, dict):
+        return None
+    question = obj.get('question')
+    options = obj.get('options', obj.get('choices'))
+    answer = obj.get('correct_answer', obj.get('answer', obj.get('correct')))
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, list) or len(options) != QUESTION_OPTION_COUNT:
+        return None
+    if not all(isinstance(o, (str, int, float)) and not isinstance(o, bool) for o in options):
+        return None
+    options = [str(o).strip() for o in options]
+    labels = [_OPTION_LABEL.match(o) for o in options]
+    if all(labels) and [m.group(1).upper() for m in labels] == list('ABCD'[:len(options)]):
+        options = [o[m.end():] for o, m in zip(options, labels)]  # the UI adds its own "A." labels
+
+    if isinstance(answer, str):
+        text = answer.strip()
+        if text in options:
+            answer = options.index(text)  # literal option text wins over an index reading
+        elif text.isdigit():
+            answer = int(text)
+        elif len(text) == 1 and text.upper() in 'ABCD'[:len(options)]:
+            answer = 'ABCD'.index(text.upper())
+        elif _OPTION_LABEL.match(text + ' ') and text[:1].upper() in 'ABCD':
+            answer = 'ABCD'.index(text[:1].upper())
+    if isinstance(answer, float) and answer.is_integer():
+        answer = int(answer)
+    if not isinstance(answer, int) or isinstance(answer, bool) or not 0 <= answer < len(options):
+        return None
+
+    explanation = obj.get('explanation', '')
+    return {
+        'question': question.strip(),
+        'options': options,
+        'correct_answer': answer,
+        'explanation': explanation.strip() if isinstance(explanation, str) else '',
+    }
+
+
+class QuizStreamParser:
+    """
+    Pulls question objects out of streamed model output token by token.
+    feed() returns every top-level {...} as soon as its closing brace arrives, so the first question
+    can be shown long before the model finishes the whole quiz. Malformed objects go through
+    repair_json, a cut-off last object is recovered by finish(), wrapper objects such as
+    {"questions": [...]} are unwrapped, and everything is checked by normalize_question.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._quote = None  # delimiter of the open string, '"' or "'"
+        self._escape = False
+        self._buf = []
+        self.rejected = 0  # objects that could not be repaired or failed validation
+
+    def feed(self, text):
+        completed = []
+        for ch in text:
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                    self._buf = [ch]
+                continue
+
+            self._buf.append(ch)
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch in '"\'':
+                self._quote = ch
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._parse_object(''.join(self._buf)))
+                    self._buf = []
+        return completed
+
+    def finish(self):
+        """End of stream: salvage the unterminated last object, if it holds a complete question."""
+        if self._depth == 0 or not self._buf:
+            return []
+        text = ''.join(self._buf)
+        self._buf, self._depth, self._quote, self._escape = [], 0, None, False
+        for candidate in _truncation_candidates(text):
+            questions = self._parse_object(candidate, count_rejects=False)
+            if questions:
+                return questions
+        self.rejected += 1
+        return []
+
+    def _parse_object(self, text, count_rejects=True):
+        obj = None
+        for attempt in (text, repair_json(text)):
+            try:
+                obj = json.loads(attempt)
+                break
+            except json.JSONDecodeError:
+                continue
+
+        if isinstance(obj, dict) and 'question' not in obj:
+            # wrapper like {"quiz": [...]}: take the first list of objects inside
+            items = next((v for v in obj.values() if isinstance(v, list) and v and isinstance(v[0], dict)), [])
+        else:
+            items = [obj]
+        questions = [q for q in map(normalize_question, items) if q is not None]
+        if count_rejects:
+            self.rejected += max(len(items) - len(questions), 0)
+        return questions
+
+
 # --- Custom signal class ---
 class OllamaSignals(QObject):
     # Signals for Quiz Generation
-    quiz_generated = pyqtSignal(list)
-    generation_error = pyqtSignal(str)
-    connection_error = pyqtSignal(str)
-    quiz_button_state = pyqtSignal(bool, str)  # enable/disable, text
+    # quiz signals carry the generation token so the UI can drop output from superseded runs
+    quiz_generated = pyqtSignal(int, list)  # final list once the stream is complete
+    question_streamed = pyqtSignal(int, dict)  # each question as soon as it is parsed from the stream
+    generation_error = pyqtSignal(int, str)
+    connection_error = pyqtSignal(int, str)
+    quiz_button_state = pyqtSignal(int, bool, str)  # token, enable/disable, text
 
     # Signals for Chatbot
-    chat_chunk_received = pyqtSignal(str)
-    chat_stream_finished = pyqtSignal()
-    chat_error = pyqtSignal(str)
+    # chat signals carry the request token so the UI can drop output from cancelled streams
+    chat_chunk_received = pyqtSignal(int, str)
+    chat_stream_finished = pyqtSignal(int)
+    chat_error = pyqtSignal(int, str)
     chat_button_state = pyqtSignal(bool, str)
 
 
+# --- Near-duplicate filter for merged quiz questions ---
+class QuestionDeduper:
+    """Rejects questions whose normalized wording overlaps an accepted one (token Jaccard similarity)."""
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self._seen = []  # token sets of accepted questions
+
+    @staticmethod
+    def _tokens(question):
+        text = re.sub(r'[^a-z0-9 ]+', ' ', str(question.get('question', '')).lower())
+        return frozenset(text.split())
+
+    def add(self, question):
+        """Record the question and return True, or return False if it is a near-duplicate."""
+        tokens = self._tokens(question)
+        for seen in self._seen:
+            union = len(tokens | seen)
+            if union and len(tokens & seen) / union >= self.threshold:
+                return False
+        self._seen.append(tokens)
+        return True
+
+
+# --- Local SQLite question bank ---
+def is_valid_question(question):
+    """Shape check before a question is shown or stored (see normalize_question)."""
+    return normalize_question(question) == question
+
+
+class QuestionBank:
+    """
+    Stores every validated question by topic and difficulty, with usage stats, so repeated topics
+    can be served instantly (and offline) before asking Ollama for the rest.
+    Topic lookup uses an FTS5 index over topic + question text; falls back to LIKE if FTS5 is missing.
+    Safe to use from the worker thread and the UI thread (one connection behind a lock).
+    """
+
+    def __init__(self, path='quiz_bank.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                qkey TEXT UNIQUE NOT NULL,
+                topic TEXT NOT NULL,
+                topic_norm TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                question TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct_answer INTEGER NOT NULL,
+                explanation TEXT,
+                times_served INTEGER DEFAULT 0,
+                times_correct INTEGER DEFAULT 0,
+                times_answered INTEGER DEFAULT 0,
+                created_at TEXT,
+                last_served TEXT
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_topic "
+                          "ON questions (topic_norm, difficulty, times_served)")
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5("
+                              "topic, question, content='questions', content_rowid='id')")
+            self.conn.executescript("""
+                CREATE TRIGGER IF NOT EXISTS questions_fts_ai AFTER INSERT ON questions BEGIN
+                    INSERT INTO questions_fts(rowid, topic, question) VALUES (new.id, new.topic, new.question);
+                END;
+                CREATE TRIGGER IF NOT EXISTS questions_fts_ad AFTER DELETE ON questions BEGIN
+                    INSERT INTO questions_fts(questions_fts, rowid, topic, question)
+                    VALUES ('delete', old.id, old.topic, old.question);
+                END;""")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False  # SQLite built without FTS5
+        self.conn.commit()
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', str(text).lower()).split())
+
+    @classmethod
+    def question_key(cls, question):
+        """Stable identity of a question: its normalized wording."""
+        return cls.normalize(question.get('question', ''))
+
+    def add_questions(self, topic, difficulty, questions, served=False):
+        """Insert valid questions (duplicates by wording are ignored). Returns how many were new."""
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = [(self.question_key(q), topic, self.normalize(topic), difficulty, q['question'],
+                 json.dumps(q['options']), q['correct_answer'], q.get('explanation', ''),
+                 1 if served else 0, now, now if served else None)
+                for q in questions if is_valid_question(q)]
+        if not rows:
+            return 0
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO questions (qkey, topic, topic_norm, difficulty, question, options, "
+                "correct_answer, explanation, times_served, created_at, last_served) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.commit()
+            return self.conn.total_changes - before
+
+    def search(self, topic, difficulty, limit, exclude=()):
+        """
+        Up to `limit` stored questions for this topic and difficulty, least-served first.
+        Exact topic matches come first, then full-text matches containing every topic word.
+        `exclude` holds question_key()s to skip (e.g. questions already in the running quiz).
+        """
+        topic_norm = self.normalize(topic)
+        if not topic_norm or limit <= 0:
+            return []
+        exclude = set(exclude)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM questions WHERE topic_norm = ? AND difficulty = ? "
+                "ORDER BY times_served, RANDOM() LIMIT ?", (topic_norm, difficulty, limit + len(exclude))).fetchall()
+            rows = [r for r in rows if r['qkey'] not in exclude][:limit]
+            if len(rows) < limit:
+                seen = [r['id'] for r in rows]
+                terms = topic_norm.split()
+                if self.has_fts:
+                    match = ' '.join(f'"{t}"' for t in terms)
+                    sql = ("SELECT q.* FROM questions_fts f JOIN questions q ON q.id = f.rowid "
+                           "WHERE questions_fts MATCH ? AND q.difficulty = ? AND q.topic_norm != ? "
+                           "ORDER BY q.times_served, f.rank LIMIT ?")
+                    params = [match, difficulty, topic_norm, limit + len(seen) + len(exclude)]
+                else:
+                    sql = ("SELECT * FROM questions WHERE difficulty = ? AND topic_norm != ? AND "
+                           + " AND ".join("(topic_norm LIKE ? OR LOWER(question) LIKE ?)" for _ in terms)
+                           + " ORDER BY times_served LIMIT ?")
+                    params = [difficulty, topic_norm]
+                    for t in terms:
+                        params += [f'%{t}%', f'%{t}%']
+                    params.append(limit + len(seen) + len(exclude))
+                try:
+                    extra = self.conn.execute(sql, params).fetchall()
+                except sqlite3.OperationalError:
+                    extra = []
+                rows += [r for r in extra if r['id'] not in seen and r['qkey'] not in exclude][:limit - len(rows)]
+
+        return [{
+            'question': r['question'],
+            'options': json.loads(r['options']),
+            'correct_answer': r['correct_answer'],
+            'explanation': r['explanation'] or '',
+        } for r in rows]
+
+    def mark_served(self, question):
+        """Count a question as seen; called when it is shown, not when it is fetched or prefetched."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE questions SET times_served = times_served + 1, last_served = ? WHERE qkey = ?",
+                (datetime.now().isoformat(timespec='seconds'), self.question_key(question)))
+            self.conn.commit()
+
+    def record_answer(self, question, correct):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE questions SET times_answered = times_answered + 1, "
+                "times_correct = times_correct + ? WHERE qkey = ?",
+                (1 if correct else 0, self.question_key(question)))
+            self.conn.commit()
+
+    def count(self, topic=None):
+        with self._lock:
+            if topic is None:
+                return self.conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM questions WHERE topic_norm = ?",
+                                     (self.normalize(topic),)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# --- Per-user performance store and adaptive difficulty ---
+class PerformanceStore:
+    """
+    Persists every answer (correctness, time to answer, topic, difficulty) per user in SQLite.
+    A `skill` table is upserted on each answer with counts and exponentially weighted accuracy and
+    latency per (user, topic, difficulty), so aggregate lookups never scan the answer history.
+    """
+    EWMA_ALPHA = 0.3
+
+    def __init__(self, path='quiz_performance.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                topic_norm TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                adaptive INTEGER DEFAULT 0,
+                started_at TEXT,
+                finished_at TEXT,
+                score INTEGER,
+                total INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                user TEXT NOT NULL,
+                topic_norm TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                qkey TEXT NOT NULL,
+                question TEXT,
+                question_index INTEGER,
+                selected INTEGER,
+                correct INTEGER NOT NULL,
+                latency_ms INTEGER,
+                answered_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS skill (
+                user TEXT NOT NULL,
+                topic_norm TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                answered INTEGER NOT NULL,
+                correct INTEGER NOT NULL,
+                ewma_accuracy REAL NOT NULL,
+                ewma_latency_ms REAL NOT NULL,
+                updated_at TEXT,
+                PRIMARY KEY (user, topic_norm, difficulty)
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user, started_at);
+            CREATE INDEX IF NOT EXISTS idx_answers_session ON answers (session_id);
+            CREATE INDEX IF NOT EXISTS idx_answers_user_topic ON answers (user, topic_norm, difficulty);
+            CREATE INDEX IF NOT EXISTS idx_answers_question ON answers (qkey);
+        """)
+        self.conn.commit()
+
+    def start_session(self, user, topic, difficulty, adaptive=False):
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT INTO sessions (user, topic, topic_norm, difficulty, adaptive, started_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user, topic, QuestionBank.normalize(topic), difficulty, int(adaptive),
+                 datetime.now().isoformat(timespec='seconds')))
+            self.conn.commit()
+            return cur.lastrowid
+
+    def record_answer(self, session_id, user, topic, difficulty, question, index, selected, correct, latency_ms):
+        topic_norm = QuestionBank.normalize(topic)
+        now = datetime.now().isoformat(timespec='seconds')
+        a = self.EWMA_ALPHA
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO answers (session_id, user, topic_norm, difficulty, qkey, question, question_index, "
+                "selected, correct, latency_ms, answered_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, user, topic_norm, difficulty, QuestionBank.question_key(question),
+                 question.get('question', ''), index, selected, int(correct), int(latency_ms), now))
+            self.conn.execute(
+                "INSERT INTO skill (user, topic_norm, topic, difficulty, answered, correct, ewma_accuracy, "
+                "ewma_latency_ms, updated_at) VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?) "
+                "ON CONFLICT (user, topic_norm, difficulty) DO UPDATE SET "
+                "answered = answered + 1, correct = correct + excluded.correct, topic = excluded.topic, "
+                f"ewma_accuracy = ewma_accuracy * {1 - a} + excluded.ewma_accuracy * {a}, "
+                f"ewma_latency_ms = ewma_latency_ms * {1 - a} + excluded.ewma_latency_ms * {a}, "
+                "updated_at = excluded.updated_at",
+                (user, topic_norm, topic, difficulty, int(correct), float(correct), float(latency_ms), now))
+            self.conn.commit()
+
+    def finish_session(self, session_id, score, total):
+        with self._lock:
+            self.conn.execute("UPDATE sessions SET finished_at = ?, score = ?, total = ? WHERE id = ?",
+                              (datetime.now().isoformat(timespec='seconds'), score, total, session_id))
+            self.conn.commit()
+
+    def skill(self, user, topic):
+        """{difficulty: {answered, correct, ewma_accuracy, ewma_latency_ms}} for one user and topic."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT difficulty, answered, correct, ewma_accuracy, ewma_latency_ms FROM skill "
+                "WHERE user = ? AND topic_norm = ?", (user, QuestionBank.normalize(topic))).fetchall()
+        return {r['difficulty']: dict(r) for r in rows}
+
+    def topic_summary(self, user, min_answers=1):
+        """Per-topic totals for a user, weakest (lowest weighted accuracy) first."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT topic, topic_norm, SUM(answered) AS answered, SUM(correct) AS correct, "
+                "SUM(ewma_accuracy * answered) / SUM(answered) AS accuracy "
+                "FROM skill WHERE user = ? GROUP BY topic_norm HAVING SUM(answered) >= ? "
+                "ORDER BY accuracy, answered DESC", (user, min_answers)).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class AdaptiveDifficultySelector:
+    """
+    Chooses the difficulty of the next question while a quiz is running, from the user's recent
+    answers blended with their stored skill for the topic. Pure bookkeeping: adjusting never
+    asks the model for anything; the app fills the slot from the bank or a prefetched quiz.
+    """
+    LEVELS = ['Easy', 'Medium', 'Hard']
+    WINDOW = 4  # answers at the current level considered
+    MIN_ANSWERS = 2  # before the first adjustment at a level
+    STEP_UP_ACCURACY = 0.8
+    STEP_DOWN_ACCURACY = 0.5
+    SLOW_ANSWER_MS = 45000  # correct but this slow does not count as mastery
+    PRIOR_WEIGHT = 0.3
+
+    def __init__(self, store, user, topic, difficulty):
+        self.store = store
+        self.user = user
+        self.topic = topic
+        self.difficulty = difficulty if difficulty in self.LEVELS else 'Medium'
+        self._recent = deque(maxlen=self.WINDOW)
+        self._skill = store.skill(user, topic) if store is not None else {}
+
+    @classmethod
+    def suggest_start(cls, store, user, topic, default='Medium'):
+        """Hardest level the user already answers at least STEP_DOWN_ACCURACY of, from stored skill."""
+        if store is None:
+            return default
+        skill = store.skill(user, topic)
+        if not skill:
+            return default
+        best = cls.LEVELS[0]
+        for level in cls.LEVELS:
+            s = skill.get(level)
+            if s and s['answered'] >= cls.MIN_ANSWERS and s['ewma_accuracy'] >= cls.STEP_DOWN_ACCURACY:
+                best = level
+        return best
+
+    def record(self, correct, latency_ms):
+        self._recent.append((bool(correct), latency_ms))
+
+    def next_difficulty(self):
+        if len(self._recent) < self.MIN_ANSWERS:
+            return self.difficulty
+        accuracy = sum(c for c, _ in self._recent) / len(self._recent)
+        prior = self._skill.get(self.difficulty)
+        if prior and prior['answered'] >= self.WINDOW:
+            accuracy = (1 - self.PRIOR_WEIGHT) * accuracy + self.PRIOR_WEIGHT * prior['ewma_accuracy']
+        latencies = sorted(ms for _, ms in self._recent)
+        fast = latencies[len(latencies) // 2] < self.SLOW_ANSWER_MS
+
+        i = self.LEVELS.index(self.difficulty)
+        if accuracy >= self.STEP_UP_ACCURACY and fast and i < len(self.LEVELS) - 1:
+            i += 1
+        elif accuracy < self.STEP_DOWN_ACCURACY and i > 0:
+            i -= 1
+        else:
+            return self.difficulty
+        self.difficulty = self.LEVELS[i]
+        self._recent.clear()  # judge the new level on its own answers
+        return self.difficulty
+
+
+# --- Background batch export of stored quiz sessions ---
+class ExportCancelled(Exception):
+    pass
+
+
+class SessionExportWorker(QObject):
+    """
+    Streams stored sessions out of the performance database into CSV (one row per answer), JSONL
+    (one record per session) and a paginated, printable HTML summary. Uses its own read-only
+    connection on its own thread; sessions are read BATCH_SIZE at a time and written straight to
+    disk, and the summary aggregates are GROUP BY queries, so memory stays flat for any history size.
+    """
+    progress = pyqtSignal(int, int)  # sessions written, sessions to write
+    finished = pyqtSignal(object)  # {'token', 'files': [...], 'sessions': n, 'answers': n}
+    error = pyqtSignal(int, str)
+
+    BATCH_SIZE = 200
+    PAGE_ROWS = 40  # table rows per printed HTML page
+    CSV_FIELDS = ['session_id', 'user', 'topic', 'session_difficulty', 'adaptive', 'started_at',
+                  'finished_at', 'score', 'total', 'question_index', 'question', 'question_difficulty',
+                  'selected', 'correct', 'latency_ms', 'answered_at']
+
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = db_path
+        self.token = 0  # bumped by the UI thread to cancel
+
+    @pyqtSlot(object)
+    def export(self, job):
+        """job: {'token', 'directory', 'stem', 'user' (None = every user)}."""
+        token = job['token']
+        base = os.path.join(job['directory'], job['stem'])
+        paths = {ext: f"{base}.{ext}" for ext in ('csv', 'jsonl', 'html')}
+        parts = {ext: path + '.part' for ext, path in paths.items()}
+        conn = None
+        try:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            where, params = ("WHERE s.user = ?", (job['user'],)) if job.get('user') else ("", ())
+            total = conn.execute(f"SELECT COUNT(*) FROM sessions s {where}", params).fetchone()[0]
+            self.progress.emit(0, total)
+            with open(parts['csv'], 'w', newline='', encoding='utf-8') as csv_file, \
+                    open(parts['jsonl'], 'w', encoding='utf-8') as jsonl_file, \
+                    open(parts['html'], 'w', encoding='utf-8') as html_file:
+                counts = {'sessions': 0, 'answers': 0}
+                rows = self._session_rows(conn, where, params, token, total, counts,
+                                          csv.writer(csv_file), jsonl_file)
+                self._write_html(html_file, conn, where, params, job, rows)
+            for ext in paths:
+                os.replace(parts[ext], paths[ext])
+            self.finished.emit({'token': token, 'files': list(paths.values()), **counts})
+        except ExportCancelled:
+            pass  # partial files are removed below
+        except (sqlite3.Error, OSError) as e:
+            self.error.emit(token, f"Export failed: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+            for part in parts.values():
+                if os.path.exists(part):
+                    os.remove(part)
+
+    def _session_rows(self, conn, where, params, token, total, counts, writer, jsonl_file):
+        """Writes CSV/JSONL batch by batch and yields one HTML table row per session."""
+        writer.writerow(self.CSV_FIELDS)
+        cursor = conn.execute(f"SELECT s.* FROM sessions s {where} ORDER BY s.id", params)
+        while True:
+            if token != self.token:
+                raise ExportCancelled()
+            sessions = cursor.fetchmany(self.BATCH_SIZE)
+            if not sessions:
+                break
+            answers = {}
+            marks = ",".join("?" * len(sessions))
+            for a in conn.execute(
+                    f"SELECT session_id, question_index, question, difficulty, selected, correct, latency_ms, "
+                    f"answered_at FROM answers WHERE session_id IN ({marks}) ORDER BY session_id, id",
+                    [s['id'] for s in sessions]):
+                answers.setdefault(a['session_id'], []).append(dict(a))
+
+            for s in sessions:
+                head = [s['id'], s['user'], s['topic'], s['difficulty'], s['adaptive'], s['started_at'],
+                        s['finished_at'], s['score'], s['total']]
+                session_answers = answers.get(s['id'], [])
+                for a in session_answers:
+                    writer.writerow(head + [a['question_index'], a['question'], a['difficulty'], a['selected'],
+                                            a['correct'], a['latency_ms'], a['answered_at']])
+                if not session_answers:
+                    writer.writerow(head + [''] * 7)
+                record = {k: s[k] for k in s.keys() if k != 'topic_norm'}
+                record['answers'] = [{k: v for k, v in a.items() if k != 'session_id'} for a in session_answers]
+                jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                counts['answers'] += len(session_answers)
+
+                correct = sum(a['correct'] for a in session_answers)
+                yield [s['id'], s['user'], s['topic'], s['difficulty'], (s['started_at'] or '').replace('T', ' '),
+                       f"{s['score']} / {s['total']}" if s['total'] is not None else "unfinished",
+                       self._percent(correct, len(session_answers))]
+            counts['sessions'] += len(sessions)
+            self.progress.emit(counts['sessions'], total)
+
+    @staticmethod
+    def _percent(correct, answered):
+        return f"{100 * correct / answered:.0f}%" if answered else "–"
+
+    def _write_html(self, f, conn, where, params, job, session_rows):
+        scope = html.escape(job.get('user') or "all users")
+        f.write("<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+                f"<title>Quiz sessions — {scope}</title><style>"
+                "body{font-family:'Segoe UI',sans-serif;color:#2F2F4F;margin:24px}"
+                "h1{color:#7F5EFA}table{border-collapse:collapse;width:100%;font-size:12px}"
+                "th,td{border:1px solid #EBE9F5;padding:4px 6px;text-align:left}th{background:#EBE9F5}"
+                ".page{margin-bottom:32px}.page footer{color:#888;font-size:11px;margin-top:6px}"
+                "@media print{.page{page-break-after:always}}"
+                "</style></head><body>\n")
+
+        overview = conn.execute(
+            f"SELECT COUNT(DISTINCT s.id) AS sessions, COUNT(DISTINCT s.user) AS users, COUNT(a.id) AS answered, "
+            f"TOTAL(a.correct) AS correct, AVG(a.latency_ms) AS latency "
+            f"FROM sessions s LEFT JOIN answers a ON a.session_id = s.id {where}", params).fetchone()
+        latency = f"{overview['latency'] / 1000:.1f} s" if overview['latency'] is not None else "–"
+        f.write(f"<section class='page'><h1>Quiz sessions — {scope}</h1>"
+                f"<p>Exported {datetime.now().strftime('%Y-%m-%d %H:%M')}</p><table>"
+                f"<tr><th>Sessions</th><td>{overview['sessions']}</td></tr>"
+                f"<tr><th>Learners</th><td>{overview['users']}</td></tr>"
+                f"<tr><th>Questions answered</th><td>{overview['answered']}</td></tr>"
+                f"<tr><th>Accuracy</th><td>{self._percent(overview['correct'], overview['answered'])}</td></tr>"
+                f"<tr><th>Average time per answer</th><td>{latency}</td></tr>"
+                f"</table></section>\n")
+
+        topics = conn.execute(
+            f"SELECT s.topic, COUNT(DISTINCT s.id) AS sessions, COUNT(DISTINCT s.user) AS users, "
+            f"COUNT(a.id) AS answered, TOTAL(a.correct) AS correct FROM sessions s "
+            f"LEFT JOIN answers a ON a.session_id = s.id {where} "
+            f"GROUP BY s.topic_norm ORDER BY answered DESC", params)
+        self._write_pages(f, "Topic breakdown", ["Topic", "Sessions", "Learners", "Answered", "Accuracy"],
+                          ([t['topic'], t['sessions'], t['users'], t['answered'],
+                            self._percent(t['correct'], t['answered'])] for t in topics))
+
+        questions = conn.execute(
+            f"SELECT MAX(a.question) AS question, MAX(s.topic) AS topic, COUNT(*) AS answered, "
+            f"TOTAL(a.correct) AS correct, AVG(a.latency_ms) AS latency FROM answers a "
+            f"JOIN sessions s ON s.id = a.session_id {where} "
+            f"GROUP BY a.qkey ORDER BY TOTAL(a.correct) / COUNT(*), answered DESC", params)
+        self._write_pages(f, "Per-question accuracy (hardest first)",
+                          ["Question", "Topic", "Answered", "Accuracy", "Avg time"],
+                          ([q['question'] or "(text not recorded)", q['topic'], q['answered'],
+                            self._percent(q['correct'], q['answered']), f"{(q['latency'] or 0) / 1000:.1f} s"]
+                           for q in questions))
+
+        self._write_pages(f, "Sessions", ["#", "Learner", "Topic", "Difficulty", "Started", "Score", "Accuracy"],
+                          session_rows)
+        f.write("</body></html>\n")
+
+    def _write_pages(self, f, title, headers, rows):
+        header = "<tr>" + "".join(f"<th>{html.escape(h)}</th>" for h in headers) + "</tr>"
+        page, count = 0, 0
+        for row in rows:
+            if count % self.PAGE_ROWS == 0:
+                if page:
+                    f.write(f"</table><footer>{html.escape(title)} — page {page}</footer></section>\n")
+                page += 1
+                f.write(f"<section class='page'><h2>{html.escape(title)}</h2><table>{header}")
+            f.write("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>")
+            count += 1
+        if page:
+            f.write(f"</table><footer>{html.escape(title)} — page {page}</footer></section>\n")
+
+
+# --- Shared, pooled Ollama HTTP client ---
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Every endpoint's circuit breaker is open; raised without touching the network."""
+
+
+class OllamaClient:
+    """
+    One keep-alive requests.Session shared by every worker thread, spread over one or more
+    Ollama endpoints. Each request goes to the least-loaded endpoint whose circuit is closed;
+    connection errors, timeouts and 5xx/429 replies are retried with jittered exponential
+    backoff before the first byte. An endpoint that fails `failure_threshold` times in a row is
+    skipped for `reset_timeout` seconds, then gets a single trial request (half-open).
+    Latency (time to headers and total stream time) is recorded per endpoint; see stats().
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, endpoints, retries=2, backoff=0.5, max_backoff=8.0,
+                 failure_threshold=3, reset_timeout=30.0, pool_size=10):
+        if isinstance(endpoints, str):
+            endpoints = [endpoints]
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._endpoints = [{
+            'url': url,
+            'in_flight': 0,
+            'failures': 0,  # consecutive
+            'open_until': 0.0,
+            'half_open': False,
+            'requests': 0,
+            'errors': 0,
+            'ttfb': deque(maxlen=200),
+            'total': deque(maxlen=200),
+        } for url in endpoints]
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self._endpoints), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    @property
+    def endpoints(self):
+        return [ep['url'] for ep in self._endpoints]
+
+    def describe(self):
+        return ', '.join(self.endpoints)
+
+    def _acquire(self):
+        """Pick and reserve the least-loaded usable endpoint, or raise CircuitOpenError."""
+        now = time.monotonic()
+        with self._lock:
+            usable = [ep for ep in self._endpoints
+                      if ep['open_until'] <= now and not (ep['half_open'] and ep['in_flight'])]
+            if not usable:
+                wait = min(ep['open_until'] for ep in self._endpoints) - now
+                raise CircuitOpenError(f"Ollama at {self.describe()} is failing repeatedly; "
+                                       f"pausing requests for {int(max(wait, 0)) + 1}s.")
+
+            def load(ep):
+                recent = ep['ttfb'][-1] if ep['ttfb'] else 0.0
+                return ep['in_flight'], ep['failures'], recent
+
+            ep = min(usable, key=load)
+            if ep['open_until']:
+                ep['half_open'] = True  # reset window elapsed: this request is the trial
+                ep['open_until'] = 0.0
+            ep['in_flight'] += 1
+            ep['requests'] += 1
+            return ep
+
+    def _release(self, ep, ok, ttfb=None, total=None):
+        with self._lock:
+            ep['in_flight'] -= 1
+            if ttfb is not None:
+                ep['ttfb'].append(ttfb)
+            if total is not None:
+                ep['total'].append(total)
+            if ok:
+                ep['failures'] = 0
+                ep['half_open'] = False
+                return
+            ep['errors'] += 1
+            ep['failures'] += 1
+            if ep['half_open'] or ep['failures'] >= self.failure_threshold:
+                ep['open_until'] = time.monotonic() + self.reset_timeout
+                ep['half_open'] = False
+
+    def _sleep_backoff(self, attempt, should_abort):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))  # full jitter
+        deadline = time.monotonic() + delay
+        while time.monotonic() < deadline:
+            if should_abort is not None and should_abort():
+                return False
+            time.sleep(min(0.1, deadline - time.monotonic()))
+        return True
+
+    @contextmanager
+    def stream(self, payload, timeout=180, should_abort=None):
+        """
+        POST a streaming request and yield the open response (any status the caller should see).
+        Retries happen only before the response is handed out, so no chunk is ever duplicated.
+        """
+        attempt = 0
+        while True:
+            ep = self._acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.post(ep['url'], json=payload, timeout=timeout, stream=True)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._release(ep, ok=False)
+                if attempt >= self.retries or not self._sleep_backoff(attempt, should_abort):
+                    raise
+                attempt += 1
+                continue
+
+            ttfb = time.monotonic() - started
+            if response.status_code in self.RETRY_STATUSES and attempt < self.retries:
+                response.close()
+                self._release(ep, ok=False, ttfb=ttfb)
+                if not self._sleep_backoff(attempt, should_abort):
+                    raise requests.exceptions.ConnectionError("Request cancelled while retrying.")
+                attempt += 1
+                continue
+            break
+
+        ok = response.status_code < 500
+        try:
+            yield response
+        except requests.exceptions.RequestException:
+            ok = False  # broken stream counts against the endpoint; caller-side errors do not
+            raise
+        finally:
+            response.close()
+            self._release(ep, ok=ok, ttfb=ttfb, total=time.monotonic() - started)
+
+    def stats(self):
+        """Per-endpoint request/error counts, circuit state and p50/p95 latencies in seconds."""
+
+        def pct(values, q):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'url': ep['url'],
+                'requests': ep['requests'],
+                'errors': ep['errors'],
+                'in_flight': ep['in_flight'],
+                'circuit': 'open' if ep['open_until'] > now else ('half-open' if ep['half_open'] else 'closed'),
+                'ttfb_p50': pct(ep['ttfb'], 0.5),
+                'ttfb_p95': pct(ep['ttfb'], 0.95),
+                'total_p50': pct(ep['total'], 0.5),
+                'total_p95': pct(ep['total'], 0.95),
+            } for ep in self._endpoints]
+
+    def close(self):
+        self.session.close()
+
+
+class OllamaAPIError(Exception):
+    """Non-2xx reply from Ollama. `retryable` is False for errors a retry cannot fix (e.g. missing model)."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
 # --- QThread Worker for Ollama API Interaction (Best Practice) ---
 class OllamaWorker(QObject):
-    def __init__(self, signals, model, endpoint, parent=None):
+    # Large quizzes are split into shards of at most this many questions, generated in parallel
+    SHARD_SIZE = 8
+    MAX_PARALLEL_SHARDS = 4
+    SHARD_RETRIES = 2  # extra rounds for shards that failed or came back short
+
+    # Distinct angles handed to shards so parallel prompts do not all write the same questions
+    SHARD_FOCUS = [
+        "core definitions and fundamentals",
+        "practical applications and real-world examples",
+        "history, origins and key figures",
+        "common misconceptions and pitfalls",
+        "advanced details and edge cases",
+        "comparisons and relationships between concepts",
+        "terminology and notation",
+        "problem solving and worked scenarios",
+    ]
+
+    def __init__(self, signals, model, client, bank=None, parent=None):
         super().__init__(parent)
         self.signals = signals
         self.ollama_model = model
-        self.ollama_endpoint = endpoint
-
-    @pyqtSlot(str, int, str)
-    def fetch_quiz(self, topic, num_questions, difficulty):
-        """Worker function to fetch quiz data from Ollama."""
-        prompt = f"""Generate a quiz with exactly {num_questions} multiple choice questions about {topic} at {difficulty} difficulty level.
+        self.client = client  # OllamaClient shared with the other workers
+        self.bank = bank  # QuestionBank or None
+
+        # The UI thread bumps `token` to cancel; slots that take a token adopt it as _active_token
+        self.token = 0
+        self._active_token = 0
+
+    def is_cancelled(self):
+        """Polled between stream chunks and retry rounds."""
+        return self._active_token != self.token
+
+    @staticmethod
+    def _quiz_prompt(topic, num_questions, difficulty, focus=None, avoid=None):
+        focus_line = f"\n- Focus this set on {focus} of the topic" if focus else ""
+        if avoid:
+            focus_line += "\n- Do not repeat any of these existing questions:\n" + "\n".join(
+                f"  * {q}" for q in avoid[:10])
+        return f"""Generate a quiz with exactly {num_questions} multiple choice questions about {topic} at {difficulty} difficulty level.
 Format the response as a valid JSON array with this exact structure:
 [
   {{
@@ -56,69 +1012,174 @@ Rules:
 - correct_answer must be the index (0-3) of the correct option
 - Make questions clear and educational
 - Provide helpful explanations
-- Ensure proper JSON formatting and strictly adhere to the requested number of questions."""
-
-        try:
-            response = requests.post(self.ollama_endpoint,
-                                     json={
-                                         'model': self.ollama_model,
-                                         'prompt': prompt,
-                                         'stream': False,
-                                         'temperature': 0.7
-                                     },
-                                     timeout=180)
-
-            if response.status_code == 200:
-                result = response.json()
-                quiz_text = result.get('response', '')
-
-                # Robust JSON Extraction
-                quiz_text = quiz_text.strip()
-                if quiz_text.startswith('```json'):
-                    quiz_text = quiz_text[7:].strip()
-                if quiz_text.endswith('```'):
-                    quiz_text = quiz_text[:-3].strip()
-
-                start_idx = quiz_text.find('[')
-                end_idx = quiz_text.rfind(']') + 1
-
-                if start_idx != -1 and end_idx > start_idx:
-                    json_str = quiz_text[start_idx:end_idx]
-                    quiz_data = json.loads(json_str)
-
-                    if len(quiz_data) < 1 or not all(
-                            isinstance(q, dict) and 'question' in q for q in quiz_data):
-                        raise ValueError("Generated JSON array is empty or malformed structure.")
-
-                    self.signals.quiz_generated.emit(quiz_data)
-                else:
-                    self.signals.generation_error.emit(
-                        "AI response did not contain a valid JSON array structure.")
-
-            elif response.status_code == 404:
-                self.signals.generation_error.emit(
-                    f"Model '{self.ollama_model}' not found. Please pull it first.")
-            else:
-                self.signals.generation_error.emit(
+- Ensure proper JSON formatting and strictly adhere to the requested number of questions.{focus_line}"""
+
+    def _plan_shards(self, num_questions):
+        """Split a request into shards of at most SHARD_SIZE questions, each with its own focus."""
+        n_shards = max(1, -(-num_questions // self.SHARD_SIZE))
+        base, extra = divmod(num_questions, n_shards)
+        focuses = random.sample(self.SHARD_FOCUS, min(n_shards, len(self.SHARD_FOCUS)))
+        return [{
+            'count': base + (1 if i < extra else 0),
+            'focus': focuses[i % len(focuses)] if n_shards > 1 else None,
+        } for i in range(n_shards)]
+
+    def _request_questions(self, topic, count, difficulty, focus, accept, avoid=None):
+        """
+        Stream one prompt for `count` questions, passing each parsed question to accept().
+        Returns how many were accepted. Raises requests exceptions or OllamaAPIError.
+        """
+        payload = {
+            'model': self.ollama_model,
+            'prompt': self._quiz_prompt(topic, count, difficulty, focus, avoid),
+            'stream': True,
+            'temperature': 0.7,
+            # a fresh seed per shard/retry keeps parallel prompts from converging
+            'options': {'seed': random.randint(0, 2 ** 31 - 1)}
+        }
+        with self.client.stream(payload, timeout=180, should_abort=self.is_cancelled) as response:
+            if response.status_code == 404:
+                raise OllamaAPIError(f"Model '{self.ollama_model}' not found. Please pull it first.",
+                                     retryable=False)
+            if response.status_code != 200:
+                raise OllamaAPIError(
                     f"Ollama API error: Status {response.status_code}. Response: {response.text[:200]}")
 
+            parser = QuizStreamParser()
+            accepted = 0
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line.decode('utf-8'))
+                    except json.JSONDecodeError:
+                        continue
+
+                    for question in parser.feed(chunk.get('response', '')):
+                        if accepted < count and accept(question):
+                            accepted += 1
+
+                    if chunk.get('done') or accepted >= count or self.is_cancelled():
+                        break
+            finally:
+                # output cut off (length limit or dropped connection): keep a complete-enough last question
+                if accepted < count and not self.is_cancelled():
+                    for question in parser.finish():
+                        if accepted < count and accept(question):
+                            accepted += 1
+            return accepted
+
+    @pyqtSlot(str, int, str, bool, int)
+    def fetch_quiz(self, topic, num_questions, difficulty, use_bank, token):
+        """
+        Worker function to fetch quiz data: stored questions from the bank first,
+        then Ollama (sharded and streamed) only for the ones still missing.
+        Stops early once `token` is superseded.
+        """
+        self._active_token = token
+        if self.is_cancelled():
+            return
+        questions = []
+        lock = threading.Lock()
+        deduper = QuestionDeduper()
+        bank = self.bank if use_bank else None
+
+        def accept(question, from_bank=False):
+            # Called from shard threads: merge, drop invalid/near-duplicates, and show it right away
+            if self.is_cancelled() or not is_valid_question(question):
+                return False
+            with lock:
+                if len(questions) >= num_questions or not deduper.add(question):
+                    return False
+                questions.append(question)
+            if self.bank is not None and not from_bank:
+                try:
+                    self.bank.add_questions(topic, difficulty, [question])
+                except sqlite3.Error:
+                    pass  # a broken bank must never cost the user a question
+            self.signals.question_streamed.emit(token, question)
+            return True
+
+        def fail(signal, msg):
+            if self.is_cancelled():
+                return  # superseded: the newer run reports for this lane
+            # Keep whatever already streamed in; the user may be answering those questions right now
+            if questions:
+                self.signals.quiz_generated.emit(token, questions)
+                msg += f"\n\n{len(questions)} of {num_questions} question(s) were received and kept."
+            signal.emit(token, msg)
+
+        try:
+            if bank is not None:
+                try:
+                    for question in bank.search(topic, difficulty, num_questions):
+                        accept(question, from_bank=True)
+                except sqlite3.Error:
+                    pass
+                if len(questions) >= num_questions:
+                    self.signals.quiz_generated.emit(token, questions)  # fully served offline
+                    return
+
+            pending = self._plan_shards(num_questions - len(questions))
+            avoid = [q['question'] for q in questions]  # bank questions the top-up must not duplicate
+            last_error = None
+            for _ in range(self.SHARD_RETRIES + 1):
+                if not pending or self.is_cancelled():
+                    break
+                failed = []
+                with ThreadPoolExecutor(max_workers=min(len(pending), self.MAX_PARALLEL_SHARDS)) as pool:
+                    futures = {pool.submit(self._request_questions, topic, shard['count'], difficulty,
+                                           shard['focus'], accept, avoid): shard for shard in pending}
+                    for future in as_completed(futures):
+                        shard = futures[future]
+                        try:
+                            got = future.result()
+                        except OllamaAPIError as e:
+                            if not e.retryable:
+                                raise
+                            last_error, got = e, 0
+                        except (requests.exceptions.RequestException, ValueError) as e:
+                            last_error, got = e, 0
+                        if got < shard['count']:
+                            # retry only what this shard is still missing
+                            failed.append({'count': shard['count'] - got, 'focus': shard['focus']})
+                pending = failed if len(questions) < num_questions else []
+
+            if self.is_cancelled():
+                return
+            if len(questions) < num_questions and last_error is not None:
+                raise last_error  # fail() keeps what the bank and the model did deliver
+            if not questions:
+                raise ValueError("AI response did not contain any complete question objects.")
+
+            self.signals.quiz_generated.emit(token, questions)
+
+        except OllamaAPIError as e:
+            fail(self.signals.generation_error, str(e))
+        except CircuitOpenError as e:
+            fail(self.signals.connection_error, str(e))
         except requests.exceptions.ConnectionError:
-            self.signals.connection_error.emit(
-                f"Could not connect to Ollama at {self.ollama_endpoint}. Ensure Ollama is running.")
+            fail(self.signals.connection_error,
+                 f"Could not connect to Ollama at {self.client.describe()}. Ensure Ollama is running.")
         except requests.exceptions.Timeout:
-            self.signals.generation_error.emit(
-                "Ollama response timed out (180s). Try a simpler topic or fewer questions.")
+            fail(self.signals.generation_error,
+                 "Ollama response timed out (180s). Try a simpler topic or fewer questions.")
         except (json.JSONDecodeError, ValueError) as e:
-            self.signals.generation_error.emit(
-                f"Failed to parse quiz data. Malformed JSON or invalid structure: {e}. Raw response start: {quiz_text[:100]}")
+            fail(self.signals.generation_error,
+                 f"Failed to parse quiz data. Malformed JSON or invalid structure: {e}")
         except Exception as e:
-            self.signals.generation_error.emit(f"An unexpected error occurred: {str(e)}")
+            fail(self.signals.generation_error, f"An unexpected error occurred: {str(e)}")
         finally:
-            self.signals.quiz_button_state.emit(True, "🚀 Generate Quiz")
-
-    @pyqtSlot(str, dict)
-    def ask_chatbot_stream(self, user_question, current_question_data):
-        """Worker function to stream chat responses from Ollama."""
+            if not self.is_cancelled():
+                self.signals.quiz_button_state.emit(token, True, "🚀 Generate Quiz")
+
+    @pyqtSlot(str, dict, int)
+    def ask_chatbot_stream(self, user_question, current_question_data, token):
+        """Worker function to stream chat responses from Ollama. Stops early once `token` is superseded."""
+        self._active_token = token
+        if self.is_cancelled():
+            return
         q_data = current_question_data
 
         prompt = f"""You are a Quiz Assistant AI. The current question is: "{q_data.get('question', 'Unknown Question')}". 
@@ -126,49 +1187,208 @@ The options are: {q_data.get('options', [])}.
 The user is asking: "{user_question}". 
 Your primary goal is to provide **helpful context and educational details** without giving away the correct answer. Provide a conversational, brief, and insightful response."""
 
+        payload = {
+            'model': self.ollama_model,
+            'prompt': prompt,
+            'stream': True,
+            'temperature': 0.5
+        }
         try:
-            response = requests.post(self.ollama_endpoint,
-                                     json={
-                                         'model': self.ollama_model,
-                                         'prompt': prompt,
-                                         'stream': True,
-                                         'temperature': 0.5
-                                     },
-                                     timeout=60,
-                                     stream=True)
-
-            if response.status_code == 200:
-                for line in response.iter_lines():
-                    if line:
-                        try:
-                            chunk = json.loads(line.decode('utf-8'))
-                            content = chunk.get('response', '')
+            with self.client.stream(payload, timeout=60, should_abort=self.is_cancelled) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines():
+                        if line:
+                            try:
+                                chunk = json.loads(line.decode('utf-8'))
+                                content = chunk.get('response', '')
 
-                            if content:
-                                self.signals.chat_chunk_received.emit(content)
+                                if content:
+                                    self.signals.chat_chunk_received.emit(token, content)
 
-                            if chunk.get('done'):
-                                break
+                                if chunk.get('done') or self.is_cancelled():
+                                    break
 
-                        except json.JSONDecodeError:
-                            continue
+                            except json.JSONDecodeError:
+                                continue
 
-            else:
-                self.signals.chat_error.emit(f"Error querying AI: Status {response.status_code}")
+                else:
+                    self.signals.chat_error.emit(token, f"Error querying AI: Status {response.status_code}")
 
+        except CircuitOpenError as e:
+            self.signals.chat_error.emit(token, str(e))
         except requests.exceptions.ConnectionError:
-            self.signals.chat_error.emit("Connection failed. Is Ollama running and accessible?")
+            self.signals.chat_error.emit(token, "Connection failed. Is Ollama running and accessible?")
         except Exception as e:
-            self.signals.chat_error.emit(f"An internal error occurred: {str(e)}")
+            self.signals.chat_error.emit(token, f"An internal error occurred: {str(e)}")
         finally:
-            self.signals.chat_stream_finished.emit()
+            self.signals.chat_stream_finished.emit(token)
+
+
+# --- Coalescing renderer for streamed chat answers ---
+def markdown_line_to_html(line):
+    """Inline markdown for one completed chat line: headings, bullets, **bold**, *italic*, `code`."""
+    text = html.escape(line)
+    heading = re.match(r'#{1,6}\s+(.*)', text)
+    if heading:
+        text = f"<b>{heading.group(1)}</b>"
+    bullet = re.match(r'(\s*)[-*+]\s+(.*)', text)
+    if bullet:
+        text = f"{'&nbsp;' * len(bullet.group(1))}&bull; {bullet.group(2)}"
+    text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
+    text = re.sub(r'\*\*(.+?)\*\*|__(.+?)__', lambda m: f"<b>{m.group(1) or m.group(2)}</b>", text)
+    text = re.sub(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\w)', r'<i>\1</i>', text)
+    return text
+
+
+class ChatStreamRenderer(QObject):
+    """
+    Buffers streamed tokens and paints them into the chat QTextEdit at most once per frame
+    (FLUSH_INTERVAL_MS), with one insert and one scroll per flush instead of per token.
+    Completed lines are rendered as markdown once; only the unfinished last line is shown as
+    plain text and replaced on the next flush.
+    """
+    FLUSH_INTERVAL_MS = 25  # ~40 Hz
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.display = None
+        self._pending = []
+        self._tail = ''  # unfinished last line, currently shown as plain text
+        self._end = 0  # document position right after the rendered (markdown) part
+        self._tail_end = 0  # document position right after the plain-text preview
+        self._in_code = False
+        self._span_style = ''
+        self._plain_format = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def begin(self, display, position, plain_format, fg, bg):
+        """Start rendering a new answer at `position` (right after the "Assistant: " label)."""
+        self.detach()
+        self.display = display
+        self._end = position
+        self._tail_end = position
+        self._plain_format = QTextCharFormat(plain_format)
+        self._span_style = f"color: {fg}; background-color: {bg};"
+
+    def detach(self):
+        """Forget the widget (it is being deleted) and anything still buffered."""
+        self._timer.stop()
+        self.display = None
+        self._pending = []
+        self._tail = ''
+        self._in_code = False
+
+    def feed(self, chunk):
+        self._pending.append(chunk)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def finish(self):
+        """Render everything, including the unfinished last line, and stop."""
+        self.flush(final=True)
+        self.detach()
+
+    def _line_html(self, line):
+        if line.strip().startswith('```'):
+            self._in_code = not self._in_code
+            return None  # fence markers are not shown
+        if self._in_code:
+            body = f"<code>{html.escape(line).replace(' ', '&nbsp;')}</code>"
+        else:
+            body = markdown_line_to_html(line)
+        return f'<span style="{self._span_style}">{body}</span>'
+
+    def flush(self, final=False):
+        if self.display is None:
+            self._timer.stop()
+            return
+        if not self._pending and not final:
+            self._timer.stop()  # idle until the next chunk
+            return
+        text = self._tail + ''.join(self._pending)
+        self._pending = []
+        *complete, tail = text.split('\n')
+
+        try:
+            cursor = self.display.textCursor()
+            # drop the plain-text preview of the previous unfinished line; positions are in
+            # UTF-16 units, so select back to where the preview ended instead of counting len(tail)
+            cursor.setPosition(self._end)
+            cursor.setPosition(min(self._tail_end, self.display.document().characterCount() - 1),
+                               QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+
+            for line in complete:
+                rendered = self._line_html(line)
+                if rendered is not None:
+                    cursor.insertHtml(rendered)
+                    cursor.insertBlock()
+            if final and tail:
+                rendered = self._line_html(tail)
+                if rendered is not None:
+                    cursor.insertHtml(rendered)
+                tail = ''
+            self._end = cursor.position()
+
+            if tail:
+                cursor.insertText(tail, self._plain_format)
+            self._tail = tail
+            self._tail_end = cursor.position()
+
+            self.display.setTextCursor(cursor)
+            self.display.ensureCursorVisible()
+        except RuntimeError:
+            self.detach()  # widget deleted under us
+
+
+# --- Low-priority worker that pre-generates upcoming quizzes ---
+class QuizPrefetchWorker(OllamaWorker):
+    """
+    Runs fetch_quiz for the quiz the user is likely to take next, without touching the UI.
+    Results go out through prefetch_ready; the UI thread cancels everything queued or in flight
+    by bumping `token` (e.g. when the topic changes).
+    """
+    prefetch_ready = pyqtSignal(object)
+
+    def __init__(self, model, client, bank=None, parent=None):
+        super().__init__(OllamaSignals(), model, client, bank, parent)
+        self._result = None
+        self._error = None
+        # fetch_quiz emits from this thread; store results directly instead of queueing to ourselves
+        self.signals.quiz_generated.connect(self._store_result, Qt.DirectConnection)
+        self.signals.generation_error.connect(self._store_error, Qt.DirectConnection)
+        self.signals.connection_error.connect(self._store_error, Qt.DirectConnection)
+
+    def _store_result(self, token, questions):
+        self._result = list(questions)
+
+    def _store_error(self, token, msg):
+        self._error = msg
+
+    @pyqtSlot(object)
+    def prefetch(self, request):
+        self._active_token = request['token']
+        if self.is_cancelled():
+            return  # superseded while it sat in the queue
+        self._result, self._error = None, None
+        self.fetch_quiz(request['topic'], request['num'], request['difficulty'], request['use_bank'],
+                        request['token'])
+        if not self.is_cancelled():
+            self.prefetch_ready.emit(dict(request, questions=self._result or [], error=self._error))
 
 
 # --- Main Application Window ---
 class QuizMakerApp(QMainWindow):
     # Dynamic Signals to start tasks in the worker thread
-    start_quiz_fetch = pyqtSignal(str, int, str)
-    start_chat_fetch = pyqtSignal(str, dict)
+    start_quiz_fetch = pyqtSignal(str, int, str, bool, int)
+    start_chat_fetch = pyqtSignal(str, dict, int)
+    start_prefetch = pyqtSignal(object)
+    start_export = pyqtSignal(object)
+
+    DIFFICULTY_LEVELS = ['Easy', 'Medium', 'Hard']
+    PREFETCH_DEPTH = 2  # upcoming quizzes kept generated or in progress
 
     def __init__(self):
         super().__init__()
@@ -205,15 +1425,63 @@ class QuizMakerApp(QMainWindow):
 
         self.current_theme = 'dark'
         self.quiz_data = []
+        self.quiz_streaming = False  # questions are still arriving from the model
+        self.quiz_token = 0  # bumped per live generation; older results are ignored
+        self.expected_questions = 0
         self.current_question_index = 0
         self.score = 0
         self.user_answers = []
-        self.ai_stream_start_cursor_pos = 0
-        self.chatbot_text_display = None  # Initialize reference for safety checks
+        # Widgets of the current screen; clear_content() resets them when the screen is torn down
+        self.chatbot_text_display = None
+        self.chat_send_btn = None
+        self.chat_input_entry = None
+        self.generate_btn = None
+        self.status_label = None
+        self.progress_label = None
+        self.progress_bar = None
+        self.next_quiz_btn = None
+
+        # --- Next-quiz prefetch state ---
+        self.current_quiz_settings = None  # (topic, num_questions, difficulty, use_bank)
+        self.prefetch_token = 0
+        self.prefetch_pending = []  # requests handed to the prefetch worker
+        self.prefetch_ready = []  # finished quizzes waiting to be started, oldest first
+        self.adopt_prefetch_key = None  # user asked for a quiz that is still being prefetched
 
         # --- Ollama Configuration ---
         self.ollama_model = 'llama3.2'
         self.ollama_endpoint = 'http://localhost:11434/api/generate'
+        # Extra Ollama servers: OLLAMA_ENDPOINTS="http://a:11434/api/generate,http://b:11434/api/generate"
+        self.ollama_endpoints = [e.strip() for e in os.environ.get('OLLAMA_ENDPOINTS', self.ollama_endpoint).split(',')
+                                 if e.strip()]
+        self.ollama_client = OllamaClient(self.ollama_endpoints,
+                                          pool_size=2 * OllamaWorker.MAX_PARALLEL_SHARDS + 2)
+
+        self.storage_errors_reported = set()
+
+        # --- Local question bank (reused before asking the model) ---
+        try:
+            self.question_bank = QuestionBank('quiz_bank.db')
+        except sqlite3.Error as e:
+            self._report_storage_error("Question bank unavailable", e)
+            self.question_bank = None
+
+        # --- Per-user performance history and adaptive difficulty ---
+        try:
+            self.performance_store = PerformanceStore('quiz_performance.db')
+        except sqlite3.Error as e:
+            self._report_storage_error("Performance history unavailable", e)
+            self.performance_store = None
+        try:
+            self.user_name = getpass.getuser()
+        except Exception:
+            self.user_name = 'student'
+        self.adaptive_enabled = False
+        self.selector = None  # AdaptiveDifficultySelector for the running quiz
+        self.session_id = None
+        self.question_difficulty = {}  # question_key -> level it was generated at (adaptive swaps)
+        self.question_shown_at = None
+        self.served_keys = set()  # question_keys already counted in QuestionBank.times_served this quiz
 
         # --- QThread Worker Setup (FIXED ORDER) ---
 
@@ -221,17 +1489,49 @@ class QuizMakerApp(QMainWindow):
         self.ollama_signals = OllamaSignals()
         self._connect_signals()
 
-        # 2. QThread and Worker Setup SECOND
+        # 2. QThread and Worker Setup SECOND: one lane per kind of work, so an interactive chat
+        #    never queues behind a quiz generation (and vice versa)
         self.worker_thread = QThread()
         self.ollama_worker = OllamaWorker(
-            self.ollama_signals, self.ollama_model, self.ollama_endpoint
+            self.ollama_signals, self.ollama_model, self.ollama_client, self.question_bank
         )
         self.ollama_worker.moveToThread(self.worker_thread)
         self.worker_thread.start()
 
+        self.chat_thread = QThread()
+        self.chat_worker = OllamaWorker(
+            self.ollama_signals, self.ollama_model, self.ollama_client, self.question_bank
+        )
+        self.chat_worker.moveToThread(self.chat_thread)
+        self.chat_thread.start(QThread.HighPriority)
+        self.chat_token = 0
+        self.chat_active = False
+        self.chat_renderer = ChatStreamRenderer(self)
+
         # Connect Main Thread signals to Worker Slots
         self.start_quiz_fetch.connect(self.ollama_worker.fetch_quiz)
-        self.start_chat_fetch.connect(self.ollama_worker.ask_chatbot_stream)
+        self.start_chat_fetch.connect(self.chat_worker.ask_chatbot_stream)
+
+        # 3. Low-priority thread that pre-generates the next quiz while the user answers
+        self.prefetch_thread = QThread()
+        self.prefetch_worker = QuizPrefetchWorker(self.ollama_model, self.ollama_client, self.question_bank)
+        self.prefetch_worker.moveToThread(self.prefetch_thread)
+        self.prefetch_thread.start(QThread.LowestPriority)
+        self.start_prefetch.connect(self.prefetch_worker.prefetch)
+        self.prefetch_worker.prefetch_ready.connect(self._handle_prefetch_ready)
+
+        # 4. Batch export of stored sessions (CSV / JSONL / HTML) off the GUI thread
+        self.export_thread = QThread()
+        self.export_worker = SessionExportWorker(
+            self.performance_store.path if self.performance_store is not None else 'quiz_performance.db')
+        self.export_worker.moveToThread(self.export_thread)
+        self.export_thread.start(QThread.LowPriority)
+        self.start_export.connect(self.export_worker.export)
+        self.export_worker.progress.connect(self._handle_export_progress)
+        self.export_worker.finished.connect(self._handle_export_finished)
+        self.export_worker.error.connect(self._handle_export_error)
+        self.export_token = 0
+        self.export_progress = None  # QProgressDialog while an export runs
 
         self.setup_ui()
         self.apply_theme()
@@ -240,9 +1540,10 @@ class QuizMakerApp(QMainWindow):
     def _connect_signals(self):
         """Connects worker signals to UI handlers."""
         self.ollama_signals.quiz_generated.connect(self._handle_quiz_generated)
+        self.ollama_signals.question_streamed.connect(self._handle_question_streamed)
         self.ollama_signals.generation_error.connect(self._handle_generation_error_ui)
         self.ollama_signals.connection_error.connect(self._handle_connection_error_ui)
-        self.ollama_signals.quiz_button_state.connect(self._update_generate_button_ui)
+        self.ollama_signals.quiz_button_state.connect(self._handle_quiz_button_state)
 
         self.ollama_signals.chat_chunk_received.connect(self._append_chat_chunk_ui)
         self.ollama_signals.chat_stream_finished.connect(self._handle_chat_stream_finished_ui)
@@ -292,16 +1593,19 @@ class QuizMakerApp(QMainWindow):
 
     def clear_content(self):
         # Safely remove all widgets from the content layout
+        # Drop references to the screen's widgets first; they are deleted below
+        if self.chatbot_text_display is not None:
+            self.chatbot_text_display = None
+            self.chat_renderer.detach()
+        self.chat_send_btn = self.chat_input_entry = None
+        self.generate_btn = self.status_label = None
+        self.progress_label = self.progress_bar = None
+        self.next_quiz_btn = None
+
         while self.content_layout.count():
             item = self.content_layout.takeAt(0)
             if item.widget():
-                widget = item.widget()
-
-                # Check if the widget being deleted is the chatbot display
-                if widget is self.chatbot_text_display:
-                    self.chatbot_text_display = None  # Clear the reference immediately
-
-                widget.deleteLater()
+                item.widget().deleteLater()
             elif item.layout():
                 # Recursively clear sub-layouts
                 while item.layout().count():
@@ -311,6 +1615,8 @@ class QuizMakerApp(QMainWindow):
                 item.layout().deleteLater()
 
     def show_home_screen(self):
+        self.cancel_chat()
+        self.cancel_quiz_fetch()
         self.clear_content()
         self.apply_theme()
 
@@ -327,6 +1633,7 @@ class QuizMakerApp(QMainWindow):
         subtitle_label = QLabel(f"Powered by {self.ollama_model} via Ollama (Requires local setup)")
         subtitle_label.setFont(QFont('Segoe UI', 12))
         subtitle_label.setAlignment(Qt.AlignCenter)
+        subtitle_label.setToolTip(self._ollama_stats_text())
         home_layout.addWidget(subtitle_label)
 
         # Input card
@@ -371,6 +1678,45 @@ class QuizMakerApp(QMainWindow):
         difficulty_v_layout.addWidget(self.difficulty_combobox)
         options_h_layout.addLayout(difficulty_v_layout)
 
+        # Question bank reuse
+        self.use_bank_checkbox = QCheckBox("📚 Reuse saved questions for this topic (works offline)")
+        self.use_bank_checkbox.setFont(QFont('Segoe UI', 10))
+        self.use_bank_checkbox.setChecked(True)
+        self.use_bank_checkbox.setEnabled(self.question_bank is not None)
+        input_card_layout.addWidget(self.use_bank_checkbox)
+
+        # Learner name + adaptive difficulty
+        learner_h_layout = QHBoxLayout()
+        learner_h_layout.addWidget(QLabel("Your Name:", font=QFont('Segoe UI', 10, QFont.Bold)))
+        self.user_entry = QLineEdit(self.user_name)
+        self.user_entry.setFont(QFont('Segoe UI', 11))
+        learner_h_layout.addWidget(self.user_entry)
+        self.adaptive_checkbox = QCheckBox("🎯 Adapt difficulty as I answer")
+        self.adaptive_checkbox.setFont(QFont('Segoe UI', 10))
+        self.adaptive_checkbox.setChecked(self.adaptive_enabled)
+        self.adaptive_checkbox.setEnabled(self.performance_store is not None)
+        learner_h_layout.addWidget(self.adaptive_checkbox)
+        input_card_layout.addLayout(learner_h_layout)
+
+        suggestion = self._practice_suggestion()
+        if suggestion is not None:
+            topic, difficulty, accuracy = suggestion
+            suggestion_btn = QPushButton(f"📈 Practice suggestion: {topic} ({difficulty}) — {accuracy:.0f}% correct so far")
+            suggestion_btn.setFont(QFont('Segoe UI', 10))
+            suggestion_btn.setFlat(True)
+            suggestion_btn.setCursor(Qt.PointingHandCursor)
+            suggestion_btn.clicked.connect(lambda: (self.topic_entry.setPlainText(topic),
+                                                    self.difficulty_combobox.setCurrentText(difficulty)))
+            input_card_layout.addWidget(suggestion_btn)
+
+        export_btn = QPushButton("📦 Export all sessions (CSV / JSONL / HTML)")
+        export_btn.setFont(QFont('Segoe UI', 10))
+        export_btn.setFlat(True)
+        export_btn.setCursor(Qt.PointingHandCursor)
+        export_btn.setEnabled(self.performance_store is not None)
+        export_btn.clicked.connect(self.export_sessions)
+        input_card_layout.addWidget(export_btn)
+
         # Generate button
         self.generate_btn = QPushButton("🚀 Generate Quiz")
         self.generate_btn.setFont(QFont('Segoe UI', 14, QFont.Bold))
@@ -390,6 +1736,15 @@ class QuizMakerApp(QMainWindow):
         self.content_layout.addWidget(home_frame)
         self.apply_theme()
 
+    def _ollama_stats_text(self):
+        lines = []
+        for ep in self.ollama_client.stats():
+            latency = (f"first token p50 {ep['ttfb_p50']:.2f}s / p95 {ep['ttfb_p95']:.2f}s"
+                       if ep['ttfb_p50'] is not None else "no requests yet")
+            lines.append(f"{ep['url']} [{ep['circuit']}]: {ep['requests']} requests, "
+                         f"{ep['errors']} errors, {latency}")
+        return "\n".join(lines)
+
     def _clear_placeholder_on_edit(self):
         if self.topic_entry.toPlainText() == "E.g., Python Programming, World History, Biology...":
             QTimer.singleShot(0, self.topic_entry.clear)
@@ -409,35 +1764,321 @@ class QuizMakerApp(QMainWindow):
         self.generate_btn.setEnabled(False)
         self.generate_btn.setText("Generating...")
 
+        use_bank = self.question_bank is not None and self.use_bank_checkbox.isChecked()
+        self.user_name = self.user_entry.text().strip() or self.user_name
+        self.adaptive_enabled = self.performance_store is not None and self.adaptive_checkbox.isChecked()
+        settings = (topic, num_q, difficulty, use_bank)
+        if self.current_quiz_settings is None or \
+                QuestionBank.normalize(self.current_quiz_settings[0]) != QuestionBank.normalize(topic):
+            self.cancel_prefetch()  # prepared quizzes are for another topic
+        self.current_quiz_settings = settings
+
+        key = self._prefetch_key(*settings)
+        ready = next((r for r in self.prefetch_ready if r['key'] == key), None)
+        if ready is not None:
+            # Prefetched in the background: start instantly
+            self.prefetch_ready.remove(ready)
+            self.cancel_quiz_fetch()  # a new quiz supersedes any live generation
+            self._start_new_quiz(list(ready['questions']))
+            return
+        if any(r['key'] == key for r in self.prefetch_pending):
+            self.adopt_prefetch_key = key  # already being generated; wait for it instead of asking twice
+            return
+        self._fetch_live(settings)
+
+    def _fetch_live(self, settings):
+        topic, num_q, difficulty, use_bank = settings
+        self.quiz_data = []
+        self.quiz_streaming = True
+        self.expected_questions = num_q
+
         # Start the worker task via signal
-        self.start_quiz_fetch.emit(topic, num_q, difficulty)
+        self.quiz_token += 1
+        self.ollama_worker.token = self.quiz_token
+        self.start_quiz_fetch.emit(topic, num_q, difficulty, use_bank, self.quiz_token)
+
+    def cancel_quiz_fetch(self):
+        """Stop the live generation (it ends at its next chunk) and ignore anything it still sends."""
+        self.adopt_prefetch_key = None
+        self.quiz_streaming = False
+        self.quiz_token += 1
+        self.ollama_worker.token = self.quiz_token
+
+    def start_next_quiz(self):
+        """Results screen shortcut: same topic, next difficulty (instant when prefetched)."""
+        if self.current_quiz_settings is None:
+            self.show_home_screen()
+            return
+        topic, num_q, difficulty, use_bank = self.current_quiz_settings
+        self.show_home_screen()
+        self.topic_entry.setPlainText(topic)
+        self.num_questions_spinbox.setValue(num_q)
+        self.difficulty_combobox.setCurrentText(self._next_difficulty(difficulty))
+        self.use_bank_checkbox.setChecked(use_bank)
+        self.generate_quiz()
+
+    # --- Performance tracking and adaptive difficulty ---
+
+    def _question_level(self, question):
+        return self.question_difficulty.get(QuestionBank.question_key(question), self.current_quiz_settings[2])
+
+    def _start_session(self):
+        self.question_difficulty = {}
+        self.served_keys = set()
+        self.selector = None
+        self.session_id = None
+        if self.performance_store is None or self.current_quiz_settings is None:
+            return
+        topic, _, difficulty, _ = self.current_quiz_settings
+        try:
+            self.session_id = self.performance_store.start_session(self.user_name, topic, difficulty,
+                                                                   self.adaptive_enabled)
+            if self.adaptive_enabled:
+                self.selector = AdaptiveDifficultySelector(self.performance_store, self.user_name, topic, difficulty)
+        except sqlite3.Error as e:
+            self._report_storage_error("Could not record quiz session", e)
+
+    def _report_storage_error(self, what, error):
+        """Warn once per kind of local database failure; quizzes keep working without it."""
+        if what in self.storage_errors_reported:
+            return
+        self.storage_errors_reported.add(what)
+        # deferred: this can fire from __init__, before the window is shown
+        QTimer.singleShot(0, lambda: QMessageBox.warning(
+            self, "Local Storage", f"{what}: {error}\nQuizzes still work, but this is not saved."))
+
+    def _mark_served(self, q_data):
+        key = QuestionBank.question_key(q_data)
+        if self.question_bank is None or key in self.served_keys:
+            return  # re-rendering the same question (theme switch, resize) is not another serving
+        self.served_keys.add(key)
+        try:
+            self.question_bank.mark_served(q_data)
+        except sqlite3.Error:
+            pass
+
+    def _record_performance(self, q_data, selected, is_correct):
+        latency_ms = (time.monotonic() - self.question_shown_at) * 1000 if self.question_shown_at else 0
+        if self.selector is not None:
+            self.selector.record(is_correct, latency_ms)
+        if self.performance_store is None or self.session_id is None:
+            return
+        try:
+            self.performance_store.record_answer(
+                self.session_id, self.user_name, self.current_quiz_settings[0], self._question_level(q_data),
+                q_data, self.current_question_index, selected, is_correct, latency_ms)
+        except sqlite3.Error as e:
+            self._report_storage_error("Could not record answer", e)
+
+    def _adapt_upcoming_question(self, difficulty):
+        """Swap the next (not yet shown) question for one at `difficulty`, without asking the model."""
+        nxt = self.current_question_index + 1
+        if nxt >= len(self.quiz_data) or self._question_level(self.quiz_data[nxt]) == difficulty:
+            return  # nothing queued yet, or already at the right level
+        replacement = self._take_question_at(difficulty)
+        if replacement is not None:
+            self.quiz_data[nxt] = replacement
+            self.question_difficulty[QuestionBank.question_key(replacement)] = difficulty
+
+    def _take_question_at(self, difficulty):
+        """One unused question at `difficulty`: from the question bank first, else copied from a
+        prefetched quiz (left intact, so that quiz still starts complete)."""
+        topic, _, _, _ = self.current_quiz_settings
+        in_quiz = {QuestionBank.question_key(q) for q in self.quiz_data}
+        if self.question_bank is not None:
+            try:
+                found = self.question_bank.search(topic, difficulty, 1, exclude=in_quiz)
+            except sqlite3.Error:
+                found = []
+            if found:
+                return found[0]
+        for ready in self.prefetch_ready:
+            if ready['difficulty'] != difficulty:
+                continue
+            for question in ready['questions']:
+                if QuestionBank.question_key(question) not in in_quiz:
+                    return dict(question)
+        return None
+
+    def _practice_suggestion(self):
+        """(topic, difficulty, accuracy %) for the user's weakest practised topic, or None."""
+        if self.performance_store is None:
+            return None
+        try:
+            weakest = self.performance_store.topic_summary(self.user_name, min_answers=AdaptiveDifficultySelector.WINDOW)
+            if not weakest:
+                return None
+            topic = weakest[0]['topic']
+            difficulty = AdaptiveDifficultySelector.suggest_start(self.performance_store, self.user_name, topic)
+            return topic, difficulty, weakest[0]['accuracy'] * 100
+        except sqlite3.Error:
+            return None
+
+    # --- Next-quiz prefetching ---
+
+    @classmethod
+    def _next_difficulty(cls, difficulty):
+        levels = cls.DIFFICULTY_LEVELS
+        i = levels.index(difficulty) if difficulty in levels else 0
+        return levels[min(i + 1, len(levels) - 1)]
+
+    @staticmethod
+    def _prefetch_key(topic, num_q, difficulty, use_bank):
+        return QuestionBank.normalize(topic), num_q, difficulty, use_bank
+
+    def cancel_prefetch(self):
+        """Drop prepared quizzes and abandon queued/in-flight prefetches."""
+        self.prefetch_token += 1
+        self.prefetch_worker.token = self.prefetch_token
+        self.prefetch_pending = []
+        self.prefetch_ready = []
+        self.adopt_prefetch_key = None
+
+    def _pause_prefetch(self):
+        """Abandon in-flight/queued prefetches (keeping finished ones) so interactive work goes first."""
+        if not self.prefetch_pending or self.adopt_prefetch_key is not None:
+            return  # nothing running, or the user is already waiting on it
+        self.prefetch_token += 1
+        self.prefetch_worker.token = self.prefetch_token
+        self.prefetch_pending = []
+
+    def _schedule_prefetch(self):
+        """Keep the next PREFETCH_DEPTH quizzes (same topic, rising difficulty) generated or queued."""
+        if self.current_quiz_settings is None or self.quiz_streaming or self.chat_active:
+            return  # live generation and chat get the model first
+        topic, num_q, difficulty, use_bank = self.current_quiz_settings
+        upcoming = []
+        for _ in range(self.PREFETCH_DEPTH):
+            difficulty = self._next_difficulty(difficulty)
+            key = self._prefetch_key(topic, num_q, difficulty, use_bank)
+            if key not in upcoming:  # difficulty tops out at Hard
+                upcoming.append(key)
+
+        self.prefetch_ready = [r for r in self.prefetch_ready if r['key'] in upcoming]
+        queued = [r['key'] for r in self.prefetch_pending + self.prefetch_ready]
+        for key in upcoming:
+            if key in queued:
+                queued.remove(key)
+                continue
+            if len(self.prefetch_pending) + len(self.prefetch_ready) >= self.PREFETCH_DEPTH:
+                break
+            request = {'key': key, 'topic': topic, 'num': num_q, 'difficulty': key[2],
+                       'use_bank': use_bank, 'token': self.prefetch_token}
+            self.prefetch_pending.append(request)
+            self.start_prefetch.emit(request)
+
+    def _handle_prefetch_ready(self, result):
+        if result['token'] != self.prefetch_token:
+            return  # cancelled
+        for request in self.prefetch_pending:
+            if request['key'] == result['key']:
+                self.prefetch_pending.remove(request)
+                break
+
+        if self.adopt_prefetch_key == result['key']:
+            self.adopt_prefetch_key = None
+            self._update_generate_button_ui(True, "🚀 Generate Quiz")
+            if result['questions']:
+                self.cancel_quiz_fetch()
+                self._start_new_quiz(list(result['questions']))
+            else:
+                self._fetch_live(self.current_quiz_settings)  # prefetch failed; retry in the foreground
+            return
+
+        if result['questions']:
+            self.prefetch_ready.append(result)
+        self._refresh_next_quiz_button()
 
     # --- Quiz Generation UI Handlers (Connected to Worker Signals) ---
 
-    def _handle_quiz_generated(self, quiz_data):
+    def _start_new_quiz(self, quiz_data):
         self.quiz_data = quiz_data
         self.current_question_index = 0
         self.score = 0
         self.user_answers = []
+        self._start_session()
         self.show_quiz()
+        self._schedule_prefetch()
+
+    def _handle_question_streamed(self, token, question):
+        if token != self.quiz_token or not self.quiz_streaming:
+            return  # cancelled or superseded generation
+        self.quiz_data.append(question)
+        if len(self.quiz_data) == 1:
+            # Start as soon as question 1 is in; the rest keep streaming behind it
+            self._start_new_quiz(self.quiz_data)
+        elif self.current_question_index == len(self.quiz_data) - 1:
+            # The user was waiting for exactly this question
+            self.show_quiz()
+
+    def _handle_quiz_generated(self, token, quiz_data):
+        if token != self.quiz_token:
+            return  # cancelled or superseded generation
+        was_streaming = self.quiz_streaming
+        self.quiz_streaming = False
+        if was_streaming and self.quiz_data:
+            # Quiz already running from streamed questions; just settle the final count
+            # Keep the list we already have (adaptive swaps live in it); only settle its length
+            del self.quiz_data[len(quiz_data):]
+            self.quiz_data.extend(quiz_data[len(self.quiz_data):])
+            if self.current_question_index >= len(self.quiz_data):
+                self.show_quiz()  # user is on the waiting screen -> results
+            else:
+                self._refresh_progress()
+            self._schedule_prefetch()
+            return
+        self._start_new_quiz(list(quiz_data))
 
-    def _handle_generation_error_ui(self, msg):
+    def _handle_generation_error_ui(self, token, msg):
+        if token != self.quiz_token:
+            return
+        self._stop_streaming_on_error()
         QMessageBox.warning(self, "Quiz Generation Error", msg)
 
-    def _handle_connection_error_ui(self, msg):
+    def _handle_connection_error_ui(self, token, msg):
+        if token != self.quiz_token:
+            return
+        self._stop_streaming_on_error()
         QMessageBox.critical(self, "Connection Error", msg)
 
+    def _stop_streaming_on_error(self):
+        # Partial results (if any) arrive through quiz_generated before the error
+        if self.quiz_streaming and not self.quiz_data:
+            self.quiz_streaming = False
+
+    def _handle_quiz_button_state(self, token, enable, text):
+        if token == self.quiz_token:
+            self._update_generate_button_ui(enable, text)
+
     def _update_generate_button_ui(self, enable, text):
+        if self.generate_btn is None:
+            return  # home screen was already replaced by the (streamed) quiz
         self.generate_btn.setEnabled(enable)
         self.generate_btn.setText(text)
         self.status_label.setStyleSheet("")
 
+    def _total_questions(self):
+        """Question count to show: the requested count while streaming, the actual count afterwards."""
+        if self.quiz_streaming:
+            return max(self.expected_questions, len(self.quiz_data))
+        return len(self.quiz_data)
+
+    def _refresh_progress(self):
+        if self.progress_label is None:
+            return  # not on a question screen
+        total = self._total_questions()
+        self.progress_label.setText(f"Question {self.current_question_index + 1} of {total}")
+        self.progress_bar.setRange(0, total)
+
     # --- Quiz Screen Setup ---
     def show_quiz(self):
         self.clear_content()
 
         if self.current_question_index >= len(self.quiz_data):
-            self.show_results()
+            if self.quiz_streaming:
+                self._show_waiting_for_question()
+            else:
+                self.show_results()
             return
 
         quiz_main_h_layout = QHBoxLayout()
@@ -454,14 +2095,14 @@ class QuizMakerApp(QMainWindow):
         progress_layout = QVBoxLayout(progress_frame)
         progress_layout.setContentsMargins(0, 0, 0, 0)
 
-        progress_text = f"Question {self.current_question_index + 1} of {len(self.quiz_data)}"
-        progress_label = QLabel(progress_text)
-        progress_label.setFont(QFont('Segoe UI', 12, QFont.Bold))
-        progress_label.setAlignment(Qt.AlignCenter)
-        progress_layout.addWidget(progress_label)
+        progress_text = f"Question {self.current_question_index + 1} of {self._total_questions()}"
+        self.progress_label = QLabel(progress_text)
+        self.progress_label.setFont(QFont('Segoe UI', 12, QFont.Bold))
+        self.progress_label.setAlignment(Qt.AlignCenter)
+        progress_layout.addWidget(self.progress_label)
 
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, len(self.quiz_data))
+        self.progress_bar.setRange(0, self._total_questions())
         self.progress_bar.setValue(self.current_question_index + 1)
         self.progress_bar.setTextVisible(False)
         self.progress_bar.setObjectName("QuizProgressBar")
@@ -477,6 +2118,8 @@ class QuizMakerApp(QMainWindow):
         quiz_v_layout.addWidget(question_card, 1)
 
         q_data = self.quiz_data[self.current_question_index]
+        self.question_shown_at = time.monotonic()  # answer latency is measured from here
+        self._mark_served(q_data)
 
         q_label = QLabel(q_data.get('question', 'Error: Question text missing.'))
         q_label.setFont(QFont('Segoe UI', 16, QFont.Bold))
@@ -527,6 +2170,26 @@ class QuizMakerApp(QMainWindow):
         self.option_button_group.buttonClicked.connect(lambda: self.submit_btn.setEnabled(True))
         self.apply_theme()
 
+    def _show_waiting_for_question(self):
+        wait_frame = QFrame()
+        wait_layout = QVBoxLayout(wait_frame)
+        wait_layout.setAlignment(Qt.AlignCenter)
+
+        wait_label = QLabel(f"⏳ Question {self.current_question_index + 1} is still being generated...")
+        wait_label.setFont(QFont('Segoe UI', 16, QFont.Bold))
+        wait_label.setAlignment(Qt.AlignCenter)
+        wait_layout.addWidget(wait_label)
+
+        cancel_btn = QPushButton("✖ Cancel Quiz")
+        cancel_btn.setFont(QFont('Segoe UI', 12, QFont.Bold))
+        cancel_btn.setFixedSize(200, 45)
+        cancel_btn.clicked.connect(self.show_home_screen)
+        cancel_btn.setCursor(Qt.PointingHandCursor)
+        wait_layout.addWidget(cancel_btn, alignment=Qt.AlignCenter)
+
+        self.content_layout.addWidget(wait_frame)
+        self.apply_theme()
+
     def check_answer(self):
         selected_id = self.option_button_group.checkedId()
         if selected_id == -1:
@@ -537,6 +2200,12 @@ class QuizMakerApp(QMainWindow):
         selected = selected_id
 
         self.user_answers.append(selected)
+        if self.question_bank is not None:
+            try:
+                self.question_bank.record_answer(q_data, selected == correct)
+            except sqlite3.Error:
+                pass
+        self._record_performance(q_data, selected, selected == correct)
 
         for btn in self.option_buttons:
             btn.setEnabled(False)
@@ -614,8 +2283,8 @@ class QuizMakerApp(QMainWindow):
 
         result_dialog_layout.addWidget(exp_frame)
 
-        next_btn = QPushButton("Next Question →" if self.current_question_index < len(
-            self.quiz_data) - 1 else "Finish Quiz")
+        next_btn = QPushButton("Next Question →" if self.current_question_index < self._total_questions() - 1
+                               else "Finish Quiz")
         next_btn.setFont(QFont('Segoe UI', 12, QFont.Bold))
         next_btn.setFixedSize(200, 45)
         next_btn.clicked.connect(lambda: [result_dialog.accept(), self.next_question()])
@@ -626,6 +2295,9 @@ class QuizMakerApp(QMainWindow):
         result_dialog.exec_()
 
     def next_question(self):
+        self.cancel_chat()  # the answer being streamed was about the previous question
+        if self.selector is not None:
+            self._adapt_upcoming_question(self.selector.next_difficulty())
         self.current_question_index += 1
         self.show_quiz()
 
@@ -692,9 +2364,27 @@ class QuizMakerApp(QMainWindow):
 
         self.ollama_signals.chat_button_state.emit(False, "...")
 
-        # Start the worker task via signal
+        # Start the worker task via signal; chat preempts background prefetching
         q_data = self.quiz_data[self.current_question_index]
-        self.start_chat_fetch.emit(user_message, q_data)
+        self.chat_token += 1
+        self.chat_worker.token = self.chat_token
+        self.chat_active = True
+        self._pause_prefetch()
+        self.start_chat_fetch.emit(user_message, q_data, self.chat_token)
+
+    def cancel_chat(self):
+        """Stop the in-flight chat stream (it ends at its next chunk) and ignore anything it still sends."""
+        if not self.chat_active:
+            return
+        self.chat_token += 1
+        self.chat_worker.token = self.chat_token
+        self.chat_renderer.finish()
+        self._finish_chat()
+
+    def _finish_chat(self):
+        self.chat_active = False
+        self.ollama_signals.chat_button_state.emit(True, "Send")
+        self._schedule_prefetch()  # resume background work paused for the chat
 
     # --- Chatbot UI Handlers (Connected to Worker Signals) ---
 
@@ -715,9 +2405,10 @@ class QuizMakerApp(QMainWindow):
         format.setFontWeight(QFont.Normal)
         cursor.setCharFormat(format)
 
-        self.ai_stream_start_cursor_pos = cursor.position()
         self.chatbot_text_display.setTextCursor(cursor)
         self.chatbot_text_display.ensureCursorVisible()
+        self.chat_renderer.begin(self.chatbot_text_display, cursor.position(), format,
+                                 colors['fg'], colors['chat_ai_bg'])
 
     def append_chat_message(self, sender, message, tag_name):
         if self.chatbot_text_display is None: return  # Safety check
@@ -746,34 +2437,31 @@ class QuizMakerApp(QMainWindow):
         self.chatbot_text_display.setTextCursor(cursor)
         self.chatbot_text_display.ensureCursorVisible()
 
-    def _append_chat_chunk_ui(self, chunk):
+    def _append_chat_chunk_ui(self, token, chunk):
+        if token != self.chat_token: return  # cancelled stream
         if self.chatbot_text_display is None: return  # Safety check
-        cursor = self.chatbot_text_display.textCursor()
-        cursor.setPosition(self.ai_stream_start_cursor_pos)
+        self.chat_renderer.feed(chunk)  # painted on the renderer's next frame, not per token
 
-        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.MoveAnchor)
-
-        cursor.insertText(chunk)
-
-        self.ai_stream_start_cursor_pos = cursor.position()
-        self.chatbot_text_display.setTextCursor(cursor)
-        self.chatbot_text_display.ensureCursorVisible()
-
-    def _handle_chat_stream_finished_ui(self):
+    def _handle_chat_stream_finished_ui(self, token):
+        if token != self.chat_token: return  # cancelled stream
+        self._finish_chat()
         if self.chatbot_text_display is None: return  # Safety check
+        self.chat_renderer.finish()
         cursor = self.chatbot_text_display.textCursor()
         cursor.movePosition(QTextCursor.End)
         cursor.insertBlock()
         self.chatbot_text_display.setTextCursor(cursor)
         self.chatbot_text_display.ensureCursorVisible()
 
-        self.ollama_signals.chat_button_state.emit(True, "Send")
-
-    def _handle_chat_error_ui(self, msg):
+    def _handle_chat_error_ui(self, token, msg):
+        if token != self.chat_token: return  # cancelled stream
+        self.chat_renderer.finish()
         self.append_chat_message("Assistant (Error)", msg, 'ai')
         self.ollama_signals.chat_button_state.emit(True, "Send")
 
     def _update_chat_button_ui(self, enable, text):
+        if self.chat_send_btn is None:
+            return  # chat panel not built yet or already torn down
         self.chat_send_btn.setEnabled(enable)
         self.chat_send_btn.setText(text)
         self.chat_input_entry.setEnabled(enable)
@@ -789,6 +2477,12 @@ class QuizMakerApp(QMainWindow):
         self.content_layout.addWidget(results_frame)
 
         total_questions = len(self.quiz_data)
+        if self.performance_store is not None and self.session_id is not None:
+            try:
+                self.performance_store.finish_session(self.session_id, self.score, total_questions)
+            except sqlite3.Error as e:
+                self._report_storage_error("Could not record quiz session", e)
+            self.session_id = None  # recorded; re-showing the results must not finish it again
         percentage = (self.score / total_questions) * 100 if total_questions > 0 else 0
 
         tk_label = QLabel("🎉 Quiz Complete!")
@@ -826,6 +2520,23 @@ class QuizMakerApp(QMainWindow):
         download_btn.clicked.connect(self.download_report)
         btn_h_layout.addWidget(download_btn)
 
+        export_btn = QPushButton("📦 Export Sessions")
+        export_btn.setFont(QFont('Segoe UI', 12, QFont.Bold))
+        export_btn.setFixedSize(200, 45)
+        export_btn.setObjectName("AccentButton")
+        export_btn.setEnabled(self.performance_store is not None)
+        export_btn.clicked.connect(self.export_sessions)
+        btn_h_layout.addWidget(export_btn)
+
+        self.next_quiz_btn = QPushButton()
+        self.next_quiz_btn.setFont(QFont('Segoe UI', 12, QFont.Bold))
+        self.next_quiz_btn.setFixedSize(240, 45)
+        self.next_quiz_btn.setObjectName("AccentButton")
+        self.next_quiz_btn.clicked.connect(self.start_next_quiz)
+        self.next_quiz_btn.setVisible(self.current_quiz_settings is not None)
+        btn_h_layout.addWidget(self.next_quiz_btn)
+        self._refresh_next_quiz_button()
+
         new_quiz_btn = QPushButton("🏠 New Quiz")
         new_quiz_btn.setFont(QFont('Segoe UI', 12, QFont.Bold))
         new_quiz_btn.setFixedSize(200, 45)
@@ -837,6 +2548,16 @@ class QuizMakerApp(QMainWindow):
         results_layout.addStretch()
         self.apply_theme()
 
+    def _refresh_next_quiz_button(self):
+        if self.current_quiz_settings is None or self.next_quiz_btn is None:
+            return
+        topic, num_q, difficulty, use_bank = self.current_quiz_settings
+        next_difficulty = self._next_difficulty(difficulty)
+        key = self._prefetch_key(topic, num_q, next_difficulty, use_bank)
+        ready = any(r['key'] == key for r in self.prefetch_ready)
+        self.next_quiz_btn.setText(f"⚡ Next: {next_difficulty} (ready)" if ready
+                                   else f"⏭ Next: {next_difficulty}")
+
     def download_report(self):
         if not self.quiz_data:
             return
@@ -891,6 +2612,67 @@ class QuizMakerApp(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save report: {str(e)}")
 
+    def export_sessions(self):
+        """Exports stored sessions for one learner or everyone; the writing happens on export_thread."""
+        if self.performance_store is None:
+            return
+        if self.export_progress is not None:
+            self.export_progress.raise_()
+            return
+        mine = f"My sessions ({self.user_name})"
+        scope, ok = QInputDialog.getItem(self, "Export Sessions", "Export:", [mine, "All learners"], 0, False)
+        if not ok:
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Export Sessions To")
+        if not directory:
+            return
+
+        self.export_token += 1
+        self.export_worker.token = self.export_token
+        self.export_progress = QProgressDialog("Exporting sessions...", "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export Sessions")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(300)
+        self.export_progress.canceled.connect(self.cancel_export)
+        self.start_export.emit({
+            'token': self.export_token,
+            'directory': directory,
+            'stem': f"quiz_sessions_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'user': self.user_name if scope == mine else None,
+        })
+
+    def cancel_export(self):
+        self.export_token += 1
+        self.export_worker.token = self.export_token  # worker stops at its next batch
+        self._close_export_progress()
+
+    def _close_export_progress(self):
+        if self.export_progress is not None:
+            self.export_progress.canceled.disconnect(self.cancel_export)
+            self.export_progress.close()
+            self.export_progress.deleteLater()
+            self.export_progress = None
+
+    def _handle_export_progress(self, done, total):
+        if self.export_progress is not None:
+            self.export_progress.setMaximum(max(total, 1))
+            self.export_progress.setValue(done)
+            self.export_progress.setLabelText(f"Exporting sessions... {done} / {total}")
+
+    def _handle_export_finished(self, result):
+        if result['token'] != self.export_token:
+            return  # finished just as it was cancelled
+        self._close_export_progress()
+        QMessageBox.information(self, "Export Complete",
+                                f"Exported {result['sessions']} sessions ({result['answers']} answers):\n"
+                                + "\n".join(result['files']))
+
+    def _handle_export_error(self, token, msg):
+        if token != self.export_token:
+            return
+        self._close_export_progress()
+        QMessageBox.critical(self, "Error", msg)
+
     # --- Theming and Styling ---
     def toggle_theme(self):
         self.current_theme = 'dark' if self.current_theme == 'light' else 'light'
@@ -1041,13 +2823,10 @@ class QuizMakerApp(QMainWindow):
 
         # 3. Apply chat background colors (Safe Widget Access Fix)
         if self.chatbot_text_display is not None:
-            try:
-                chat_palette = QPalette(self.chatbot_text_display.palette())
-                chat_palette.setColor(QPalette.Base, QColor(colors['bg']))
-                chat_palette.setColor(QPalette.Text, QColor(colors['fg']))
-                self.chatbot_text_display.setPalette(chat_palette)
-            except RuntimeError:
-                pass
+            chat_palette = QPalette(self.chatbot_text_display.palette())
+            chat_palette.setColor(QPalette.Base, QColor(colors['bg']))
+            chat_palette.setColor(QPalette.Text, QColor(colors['fg']))
+            self.chatbot_text_display.setPalette(chat_palette)
 
             # --- Main function setup ---
 
@@ -1060,9 +2839,20 @@ def main():
 
     # Ensure worker thread is quit gracefully when the app closes
     def cleanup():
-        if window.worker_thread.isRunning():
-            window.worker_thread.quit()
-            window.worker_thread.wait()
+        # in-flight streams stop at their next chunk
+        window.cancel_prefetch()
+        window.cancel_chat()
+        window.ollama_worker.token += 1
+        window.export_worker.token += 1
+        for thread in (window.worker_thread, window.chat_thread, window.prefetch_thread, window.export_thread):
+            if thread.isRunning():
+                thread.quit()
+                thread.wait()
+        if window.question_bank is not None:
+            window.question_bank.close()
+        if window.performance_store is not None:
+            window.performance_store.close()
+        window.ollama_client.close()
 
     app.aboutToQuit.connect(cleanup)
 
@@ -0,0 +1,261 @@
+# quiz_bench.py — generation latency / chat rendering benchmarks for quiz.py
+#
+# Usage:
+#   python quiz_bench.py                                   # default sweep
+#   python quiz_bench.py --tokens-per-sec 50 500 0 --questions 10 30 --repeat 3
+#   python quiz_bench.py --malformed-rate 0.3 --truncate-rate 0.2 --json > bench_output.txt
+#
+# Runs on Qt's offscreen platform against ollama_mock.MockOllamaServer, so neither a display
+# nor a real model is needed. Measures time to first question, total generation throughput,
+# chat tokens rendered per second and how long the GUI event loop stalled meanwhile.
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QTextEdit
+from PyQt5.QtCore import QObject, QThread, QTimer, QEventLoop, pyqtSignal
+from PyQt5.QtGui import QTextCursor, QTextCharFormat
+
+import quiz
+import ollama_mock
+
+RUN_TIMEOUT_MS = 300000
+
+
+# ---------------- Event-loop stall meter ----------------
+class StallMeter(QObject):
+    """Fires a 5 ms heartbeat and records how late each tick is: time the GUI thread was blocked."""
+    INTERVAL_MS = 5
+
+    def __init__(self):
+        super().__init__()
+        self.gaps = []
+        self._last = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.INTERVAL_MS)
+        self.timer.timeout.connect(self._tick)
+
+    def start(self):
+        self.gaps = []
+        self._last = time.perf_counter()
+        self.timer.start()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.gaps.append(max(0.0, now - self._last - self.INTERVAL_MS / 1000))
+        self._last = now
+
+    def stop(self):
+        self.timer.stop()
+        gaps = sorted(self.gaps) or [0.0]
+        return {
+            "stall_max_ms": gaps[-1] * 1000,
+            "stall_p99_ms": gaps[min(len(gaps) - 1, int(0.99 * len(gaps)))] * 1000,
+            "stall_total_ms": sum(gaps) * 1000,
+        }
+
+
+class Driver(QObject):
+    """Queues work onto the worker thread exactly like QuizMakerApp's start_* signals."""
+    start_quiz = pyqtSignal(str, int, str, bool, int)
+    start_chat = pyqtSignal(str, dict, int)
+
+
+def run_loop_until(signal, timeout_ms=RUN_TIMEOUT_MS):
+    loop = QEventLoop()
+    signal.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec_()
+    signal.disconnect(loop.quit)
+
+
+# ---------------- Benchmarks ----------------
+def bench_generation(worker, driver, meter, n_questions, repeat):
+    """Time to first streamed question, total time and questions/sec for fetch_quiz."""
+    signals = worker.signals
+    runs = []
+    for i in range(repeat):
+        run = {"questions": 0, "error": None}
+        t0 = time.perf_counter()
+
+        def on_first(_token, _question):
+            run.setdefault("first_question_s", time.perf_counter() - t0)
+
+        def on_done(_token, questions):
+            run["questions"] = len(questions)
+            run["total_s"] = time.perf_counter() - t0
+
+        def on_error(_token, msg):
+            run["error"] = msg
+
+        signals.question_streamed.connect(on_first)
+        signals.quiz_generated.connect(on_done)
+        signals.generation_error.connect(on_error)
+        signals.connection_error.connect(on_error)
+        meter.start()
+        driver.start_quiz.emit(f"Benchmark topic {i}", n_questions, "Medium", False, worker.token)
+        run_loop_until(signals.quiz_button_state)  # emitted last, success or failure
+        run.update(meter.stop())
+        for sig, slot in ((signals.question_streamed, on_first), (signals.quiz_generated, on_done),
+                          (signals.generation_error, on_error), (signals.connection_error, on_error)):
+            sig.disconnect(slot)
+        run.setdefault("total_s", time.perf_counter() - t0)
+        runs.append(run)
+
+    firsts = [r["first_question_s"] for r in runs if "first_question_s" in r]
+    return {
+        "first_question_s": statistics.median(firsts) if firsts else None,
+        "total_s": statistics.median(r["total_s"] for r in runs),
+        "questions_per_s": statistics.median(r["questions"] / r["total_s"] for r in runs if r["total_s"] > 0),
+        "questions_received": statistics.median(r["questions"] for r in runs),
+        "errors": sum(1 for r in runs if r["error"]),
+        "stall_max_ms": max(r["stall_max_ms"] for r in runs),
+        "stall_p99_ms": statistics.median(r["stall_p99_ms"] for r in runs),
+    }
+
+
+def bench_chat(worker, driver, meter, repeat, coalesced=True):
+    """Chat tokens rendered per second into a QTextEdit, via ChatStreamRenderer or per-token inserts."""
+    signals = worker.signals
+    display = QTextEdit()
+    display.setReadOnly(True)
+    display.resize(350, 500)
+    display.show()
+    renderer = quiz.ChatStreamRenderer()
+    runs = []
+
+    for token in range(1, repeat + 1):
+        run = {"tokens": 0}
+        display.clear()
+        cursor = display.textCursor()
+        cursor.insertText("Assistant: ")
+        plain = QTextCharFormat()
+        renderer.begin(display, cursor.position(), plain, "#000000", "#FFFFFF")
+        t0 = time.perf_counter()
+
+        def on_chunk(tok, chunk):
+            if tok != token:
+                return
+            run["tokens"] += 1
+            run.setdefault("first_token_s", time.perf_counter() - t0)
+            if coalesced:
+                renderer.feed(chunk)
+            else:
+                # the pre-renderer path: one cursor move, insert and scroll per token
+                c = display.textCursor()
+                c.movePosition(QTextCursor.End)
+                c.insertText(chunk)
+                display.setTextCursor(c)
+                display.ensureCursorVisible()
+
+        def on_finished(tok):
+            if tok == token:
+                renderer.finish()
+                run["total_s"] = time.perf_counter() - t0
+
+        signals.chat_chunk_received.connect(on_chunk)
+        signals.chat_stream_finished.connect(on_finished)
+        meter.start()
+        worker.token = token
+        driver.start_chat.emit("Can you give me a hint?", {"question": "Benchmark?", "options": []}, token)
+        run_loop_until(signals.chat_stream_finished)
+        QApplication.processEvents()
+        run.update(meter.stop())
+        signals.chat_chunk_received.disconnect(on_chunk)
+        signals.chat_stream_finished.disconnect(on_finished)
+        run.setdefault("total_s", time.perf_counter() - t0)
+        runs.append(run)
+
+    display.close()
+    return {
+        "tokens": statistics.median(r["tokens"] for r in runs),
+        "first_token_s": statistics.median(r.get("first_token_s", r["total_s"]) for r in runs),
+        "tokens_per_s": statistics.median(r["tokens"] / r["total_s"] for r in runs if r["total_s"] > 0),
+        "stall_max_ms": max(r["stall_max_ms"] for r in runs),
+        "stall_p99_ms": statistics.median(r["stall_p99_ms"] for r in runs),
+    }
+
+
+def run_suite(args):
+    app = QApplication.instance() or QApplication(sys.argv)
+    meter = StallMeter()
+    driver = Driver()
+    results = []
+
+    for rate in args.tokens_per_sec:
+        config = ollama_mock.MockConfig(rate, args.latency, args.error_rate, args.truncate_rate,
+                                        args.malformed_rate, args.chunk_chars, args.seed, args.chat_repeat)
+        server = ollama_mock.MockOllamaServer(config).start()
+        client = quiz.OllamaClient([server.url], backoff=0.05)
+        signals = quiz.OllamaSignals()
+        worker = quiz.OllamaWorker(signals, "mock", client)
+        thread = QThread()
+        worker.moveToThread(thread)
+        thread.start()
+        driver.start_quiz.connect(worker.fetch_quiz)
+        driver.start_chat.connect(worker.ask_chatbot_stream)
+
+        for n in args.questions:
+            row = {"tokens_per_sec": rate, "questions": n}
+            row["generation"] = bench_generation(worker, driver, meter, n, args.repeat)
+            results.append(row)
+            if not args.json:
+                print_row(row)
+
+        row = {"tokens_per_sec": rate, "chat": bench_chat(worker, driver, meter, args.repeat, coalesced=True)}
+        if args.naive_chat:
+            row["chat_per_token"] = bench_chat(worker, driver, meter, args.repeat, coalesced=False)
+        row["client"] = client.stats()
+        row["mock_requests"] = config.requests
+        results.append(row)
+        if not args.json:
+            print_row(row)
+
+        driver.start_quiz.disconnect(worker.fetch_quiz)
+        driver.start_chat.disconnect(worker.ask_chatbot_stream)
+        thread.quit()
+        thread.wait()
+        app.processEvents()  # drain signals the stopped worker still had queued for this thread
+        client.close()
+        server.stop()
+    return results
+
+
+def print_row(row):
+    rate = "unthrottled" if not row["tokens_per_sec"] else f"{row['tokens_per_sec']:g} tok/s"
+    if "generation" in row:
+        g = row["generation"]
+        first = f"{g['first_question_s'] * 1000:9.1f} ms" if g["first_question_s"] is not None else "      n/a"
+        print(f"[{rate}] quiz of {row['questions']:>3}: first question {first}  total {g['total_s']:7.2f} s"
+              f"  {g['questions_per_s']:6.2f} q/s  got {g['questions_received']:g}  errors {g['errors']}"
+              f"  stall max {g['stall_max_ms']:6.1f} ms / p99 {g['stall_p99_ms']:5.1f} ms")
+    for key in ("chat", "chat_per_token"):
+        c = row.get(key)
+        if c:
+            print(f"[{rate}] {key:<14}: {c['tokens_per_s']:8.1f} tok/s rendered  first token "
+                  f"{c['first_token_s'] * 1000:7.1f} ms  stall max {c['stall_max_ms']:6.1f} ms"
+                  f" / p99 {c['stall_p99_ms']:5.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quiz.py generation and chat streaming against a mock Ollama.")
+    parser.add_argument("--questions", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--naive-chat", action="store_true", help="also time the per-token chat insert path")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    ollama_mock.add_config_args(parser, sweep=True)
+    parser.set_defaults(chat_repeat=20)  # long answers, so rendering cost dominates
+    args = parser.parse_args(argv)
+
+    results = run_suite(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,16 @@ import json
 import math
 import random
 import io
+import gzip
+import textwrap
+import heapq
+import time
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
 from datetime import datetime
+from xml.sax.saxutils import escape
 from typing import Optional, List, Dict, Tuple
 
 # PyQt6 imports
@@ -17,20 +26,12 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import (
     Qt, QSize, QThreadPool, QRunnable, pyqtSignal, QObject,
-    QRect, QPointF, QPoint, pyqtSlot
+    QRect, QPointF, QPoint, pyqtSlot, QTimer
 )
 from PyQt6.QtGui import (
-    QColor, QPainter, QBrush, QPen, QFont, QPolygonF, QPixmap, QPainterPath
+    QColor, QPainter, QBrush, QPen, QFont, QPolygonF, QPainterPath, QImage
 )
 
-# try importing QtSvg for SVG export
-try:
-    from PyQt6.QtSvg import QSvgGenerator
-
-    SVG_AVAILABLE = True
-except Exception:
-    SVG_AVAILABLE = False
-
 # generative API (best-effort import — usage may need SDK-specific adjustments)
 try:
     import google.generativeai as genai
@@ -157,6 +158,587 @@ def auto_layout(diagram, width=1000, height=1000, iterations=300, dist=250):
     return diagram
 
 
+# ---------------- Utility: Node styling ----------------
+# Fill color per node category: (light theme, dark theme)
+NODE_COLORS = {
+    "terminator": ("#3498DB", "#4A8ECF"),
+    "decision": ("#E74C3C", "#C25446"),
+    "data": ("#9B59B6", "#8A67B2"),
+    "database": ("#F39C12", "#D88500"),  # Deep Orange / Darker Orange
+    "document": ("#8E44AD", "#7B3D9D"),  # Purple / Darker Purple
+    "process": ("#2ECC71", "#3DAF6C"),
+}
+
+# category: (explicit node types, keywords that classify generic nodes by their text)
+_NODE_CATEGORY_RULES = {
+    "terminator": (('start', 'end', 'terminator', 'ellipse'), ('start', 'end', 'exit')),
+    "decision": (('decision', 'rhombus', 'diamond'), ('?', 'if', 'decision', 'loop')),
+    "data": (('data', 'input', 'output', 'parallelogram'), ('explore', 'data', 'read', 'get', 'input')),
+    "database": (('database', 'db', 'storage'), ('sql', 'database', 'store', 'storage')),
+    "document": (('document', 'report', 'output_file'), ('document', 'report', 'file', 'pdf')),
+}
+# Colors prefer terminator matches, shapes prefer decision matches (e.g. "End?" is a blue diamond)
+_NODE_COLOR_ORDER = ("terminator", "decision", "data", "database", "document")
+_NODE_SHAPE_ORDER = ("decision", "terminator", "data", "database", "document")
+
+
+def node_visual(node):
+    """Return (shape, color category) for a node based on its type and, for generic nodes, its text."""
+    typ = node.get('type', 'process').lower()
+    text = node.get('text', '').lower()
+    is_generic = typ in ['process', 'box', 'text', 'rectangle', '']
+    matches = set()
+    for category, (types, keywords) in _NODE_CATEGORY_RULES.items():
+        if typ in types or (is_generic and any(k in text for k in keywords)):
+            matches.add(category)
+    color = next((c for c in _NODE_COLOR_ORDER if c in matches), "process")
+    shape = next((c for c in _NODE_SHAPE_ORDER if c in matches), "process")
+    return shape, color
+
+
+# ---------------- Utility: Link index ----------------
+class LinkIndex:
+    """
+    Adjacency index kept next to a diagram's links list.
+    Gives O(1) (from, to) existence checks and per-node outgoing/incoming lookups.
+    All link mutations should go through the index so the list and index stay in sync.
+    """
+
+    def __init__(self, links: List[Dict]):
+        self.links = links  # the diagram['links'] list this index mirrors (mutated in place)
+        self._pairs = set()
+        self._out: Dict[str, List[Dict]] = {}
+        self._in: Dict[str, List[Dict]] = {}
+        self._count = 0
+        for link in links:
+            self._register(link)
+
+    def _register(self, link):
+        f, t = link.get('from'), link.get('to')
+        self._pairs.add((f, t))
+        self._out.setdefault(f, []).append(link)
+        self._in.setdefault(t, []).append(link)
+        self._count += 1
+
+    def in_sync(self, links) -> bool:
+        """True if this index still mirrors `links` (same list object, same length)."""
+        return self.links is links and self._count == len(links)
+
+    def exists(self, from_id, to_id) -> bool:
+        return (from_id, to_id) in self._pairs
+
+    def outgoing(self, node_id) -> List[Dict]:
+        return self._out.get(node_id, [])
+
+    def incoming(self, node_id) -> List[Dict]:
+        return self._in.get(node_id, [])
+
+    def add(self, from_id, to_id, label="") -> Optional[Dict]:
+        """Append a link unless the (from, to) pair already exists. Returns the new link or None."""
+        if (from_id, to_id) in self._pairs:
+            return None
+        link = {"from": from_id, "to": to_id, "label": label}
+        self.links.append(link)
+        self._register(link)
+        return link
+
+    def remove(self, from_id, to_id) -> bool:
+        """Remove every link from -> to. Returns False (and does nothing) if there is none."""
+        if (from_id, to_id) not in self._pairs:
+            return False
+        doomed = [l for l in self._out.get(from_id, []) if l.get('to') == to_id]
+        self._drop(doomed)
+        return True
+
+    def remove_node(self, node_id) -> int:
+        """Remove every link touching node_id. Returns the number of links removed."""
+        return self.remove_nodes([node_id])
+
+    def remove_nodes(self, node_ids) -> int:
+        """Remove every link touching any of node_ids in one pass. Returns the number removed."""
+        doomed = {}
+        for nid in node_ids:
+            for l in self._out.get(nid, []) + self._in.get(nid, []):
+                doomed[id(l)] = l
+        if doomed:
+            self._drop(list(doomed.values()))
+        return len(doomed)
+
+    def _drop(self, doomed):
+        doomed_ids = {id(l) for l in doomed}
+        self.links[:] = [l for l in self.links if id(l) not in doomed_ids]
+        for f in {l.get('from') for l in doomed}:
+            self._out[f] = [x for x in self._out.get(f, []) if id(x) not in doomed_ids]
+        for t in {l.get('to') for l in doomed}:
+            self._in[t] = [x for x in self._in.get(t, []) if id(x) not in doomed_ids]
+        for l in doomed:
+            f, t = l.get('from'), l.get('to')
+            if not any(x.get('to') == t for x in self._out.get(f, [])):
+                self._pairs.discard((f, t))
+        self._count = len(self.links)
+
+
+# ---------------- Utility: Spatial index ----------------
+class NodeGrid:
+    """
+    Uniform bucket grid over node centers in diagram (0..1000) coordinates.
+    Answers rectangle queries (hit-testing, rubber-band selection) without scanning every node.
+    """
+
+    def __init__(self, nodes: List[Dict], bucket=50):
+        self.nodes = nodes  # the diagram['nodes'] list this grid was built from
+        self.bucket = bucket
+        self._count = len(nodes)
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        for i, node in enumerate(nodes):
+            key = (int(node.get('x', 500)) // bucket, int(node.get('y', 500)) // bucket)
+            self._buckets.setdefault(key, []).append(i)
+
+    def in_sync(self, nodes) -> bool:
+        return self.nodes is nodes and self._count == len(nodes)
+
+    def query(self, x0, y0, x1, y1) -> List[int]:
+        """List positions (ascending, i.e. paint order) of nodes whose centers lie in the rectangle."""
+        b = self.bucket
+        out = []
+        for bx in range(int(max(0, x0)) // b, int(min(1000, x1)) // b + 1):
+            for by in range(int(max(0, y0)) // b, int(min(1000, y1)) // b + 1):
+                for i in self._buckets.get((bx, by), ()):
+                    node = self.nodes[i]
+                    if x0 <= node['x'] <= x1 and y0 <= node['y'] <= y1:
+                        out.append(i)
+        out.sort()
+        return out
+
+
+# ---------------- Utility: Edge routing ----------------
+class EdgeRouter:
+    """
+    Orthogonal link router: A* over a coarse occupancy grid of (inflated) node boxes.
+    Routes are cached per (from, to) link. When a node moves, only routes attached to it or
+    running through its new box are dropped, so live dragging re-routes a handful of links.
+    Coordinates are canvas pixels (nodes mapped from 0..1000 onto the w x h canvas).
+    """
+    # (d_col, d_row) for right, left, down, up
+    _DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+    def __init__(self, cell=20, clearance=8, bend_cost=3, max_expansions=30000):
+        self.cell = cell
+        self.clearance = clearance
+        self.bend_cost = bend_cost
+        self.max_expansions = max_expansions
+        self.pending = 0  # routes skipped in the last pass because the time budget ran out
+        self.reset()
+
+    def reset(self):
+        self._geom = None  # (w, h, node_w, node_h) the grid was built for
+        self._cols = self._rows = 0
+        self._ox = self._oy = 0.0
+        self._occ = array('H')  # per-cell count of node boxes covering it
+        self._boxes: Dict[str, Tuple[float, float, float, float]] = {}  # node id -> pixel box
+        self._cells: Dict[str, Tuple[int, int, int, int]] = {}  # node id -> inflated cell bounds
+        self._routes: Dict[Tuple[str, str], Tuple] = {}  # key -> (src cells, dst cells, points, path cells)
+        self._cell_routes: Dict[int, set] = {}  # cell index -> keys of routes passing through it
+        self._failed: set = set()  # keys cached as unroutable; retried whenever any obstacle changes
+
+    # ----- grid maintenance -----
+    def sync(self, nodes, w, h, node_w, node_h):
+        """Bring the occupancy grid in line with current node positions, invalidating affected routes."""
+        self.pending = 0
+        geom = (w, h, node_w, node_h)
+        if geom != self._geom:
+            self.reset()
+            self._geom = geom
+            # leave room for node boxes hanging over the canvas edges
+            self._ox = -node_w
+            self._oy = -node_h
+            self._cols = int((w + 2 * node_w) // self.cell) + 1
+            self._rows = int((h + 2 * node_h) // self.cell) + 1
+            self._occ = array('H', bytes(2 * self._cols * self._rows))
+
+        seen = set()
+        changed = False
+        for node in nodes:
+            nid = node['id']
+            seen.add(nid)
+            cx = node['x'] * w / 1000
+            cy = node['y'] * h / 1000
+            box = (cx - node_w / 2, cy - node_h / 2, cx + node_w / 2, cy + node_h / 2)
+            if self._boxes.get(nid) == box:
+                continue
+            changed = True
+            old = self._cells.get(nid)
+            if old is not None:
+                self._release(old)
+            cells = self._cell_bounds(box)
+            self._mark(cells, 1)
+            self._boxes[nid] = box
+            self._cells[nid] = cells
+            self._invalidate_cells(cells)
+
+        removed = [n for n in self._boxes if n not in seen]
+        if removed:
+            changed = True
+            gone = set(removed)
+            for nid in removed:
+                self._release(self._cells.pop(nid))
+                del self._boxes[nid]
+            for key in [k for k in self._routes if k[0] in gone or k[1] in gone]:
+                self._drop_route(key)
+
+        if changed:
+            # a failed search has no cells to be invalidated through; any moved obstacle may free it
+            for key in list(self._failed):
+                self._drop_route(key)
+
+    def _release(self, cells):
+        """Take a node box off the grid."""
+        self._mark(cells, -1)
+        # routes hugging the old box were probably detouring around it; let them straighten out
+        self._invalidate_cells((max(0, cells[0] - 1), max(0, cells[1] - 1),
+                                min(self._cols - 1, cells[2] + 1), min(self._rows - 1, cells[3] + 1)))
+
+    def _cell_bounds(self, box):
+        c = self.cell
+        x0, y0, x1, y1 = box
+        pad = self.clearance
+        c0 = max(0, int((x0 - pad - self._ox) // c))
+        r0 = max(0, int((y0 - pad - self._oy) // c))
+        c1 = min(self._cols - 1, int((x1 + pad - self._ox) // c))
+        r1 = min(self._rows - 1, int((y1 + pad - self._oy) // c))
+        return c0, r0, c1, r1
+
+    def _mark(self, cells, delta):
+        c0, r0, c1, r1 = cells
+        occ = self._occ
+        for r in range(r0, r1 + 1):
+            base = r * self._cols
+            for i in range(base + c0, base + c1 + 1):
+                occ[i] += delta
+
+    def _invalidate_cells(self, cells):
+        c0, r0, c1, r1 = cells
+        for r in range(r0, r1 + 1):
+            base = r * self._cols
+            for i in range(base + c0, base + c1 + 1):
+                keys = self._cell_routes.pop(i, None)
+                if keys:
+                    for key in list(keys):
+                        self._drop_route(key)
+
+    def _drop_route(self, key):
+        self._failed.discard(key)
+        entry = self._routes.pop(key, None)
+        if entry is None:
+            return
+        for i in entry[3]:
+            keys = self._cell_routes.get(i)
+            if keys is not None:
+                keys.discard(key)
+
+    # ----- routing -----
+    def route(self, from_id, to_id, compute=True):
+        """
+        Return the routed polyline [(x, y), ...] for a link, or None if the endpoints are unknown,
+        no route exists, or it is not cached and compute is False.
+        """
+        src = self._cells.get(from_id)
+        dst = self._cells.get(to_id)
+        if src is None or dst is None or from_id == to_id:
+            return None
+        key = (from_id, to_id)
+        entry = self._routes.get(key)
+        if entry is not None and entry[0] == src and entry[1] == dst:
+            return entry[2]
+        if not compute:
+            self.pending += 1
+            return None
+
+        self._drop_route(key)
+        path = self._search(src, dst)
+        points = self._to_points(path, self._boxes[from_id], self._boxes[to_id]) if path else None
+        self._routes[key] = (src, dst, points, path or [])
+        if points is None:
+            self._failed.add(key)
+        for i in path or []:
+            self._cell_routes.setdefault(i, set()).add(key)
+        return points
+
+    def _search(self, src, dst):
+        """A* from the center cell of src to the center cell of dst. Returns a list of cell indices."""
+        cols, rows = self._cols, self._rows
+        occ = self._occ
+        start_c, start_r = (src[0] + src[2]) // 2, (src[1] + src[3]) // 2
+        goal_c, goal_r = (dst[0] + dst[2]) // 2, (dst[1] + dst[3]) // 2
+        start = start_r * cols + start_c
+        goal = goal_r * cols + goal_c
+
+        def inside(c, r, b):
+            return b[0] <= c <= b[2] and b[1] <= r <= b[3]
+
+        def free(c, r):
+            return occ[r * cols + c] == 0 or inside(c, r, src) or inside(c, r, dst)
+
+        # Fast path: a straight or single-bend route that is already clear
+        for corner in ((goal_c, start_r), (start_c, goal_r)):
+            cells = self._line_cells(start_c, start_r, corner[0], corner[1]) + \
+                    self._line_cells(corner[0], corner[1], goal_c, goal_r)[1:]
+            if all(free(i % cols, i // cols) for i in cells):
+                return cells
+
+        # state = cell * 4 + incoming direction; start has no direction (-1)
+        bend = self.bend_cost
+        g_best = {start * 4 + d: 0 for d in range(4)}
+        came = {}
+        heap = [(abs(goal_c - start_c) + abs(goal_r - start_r), 0, start, -1)]
+        expansions = 0
+        while heap:
+            _, g, idx, d_in = heapq.heappop(heap)
+            if idx == goal:
+                path = [idx]
+                state = (idx, d_in)
+                while state in came:
+                    state = came[state]
+                    path.append(state[0])
+                path.reverse()
+                return path
+            expansions += 1
+            if expansions > self.max_expansions:
+                return None
+            c, r = idx % cols, idx // cols
+            for d, (dc, dr) in enumerate(self._DIRS):
+                nc, nr = c + dc, r + dr
+                if not (0 <= nc < cols and 0 <= nr < rows) or not free(nc, nr):
+                    continue
+                ng = g + 1 + (bend if d_in not in (-1, d) else 0)
+                nidx = nr * cols + nc
+                skey = nidx * 4 + d
+                if ng >= g_best.get(skey, math.inf):
+                    continue
+                g_best[skey] = ng
+                came[(nidx, d)] = (idx, d_in)
+                heapq.heappush(heap, (ng + abs(goal_c - nc) + abs(goal_r - nr), ng, nidx, d))
+        return None
+
+    def _line_cells(self, c0, r0, c1, r1):
+        """Cell indices along an axis-aligned run from (c0, r0) to (c1, r1), inclusive."""
+        cols = self._cols
+        if r0 == r1:
+            step = 1 if c1 >= c0 else -1
+            return [r0 * cols + c for c in range(c0, c1 + step, step)]
+        step = 1 if r1 >= r0 else -1
+        return [r * cols + c0 for r in range(r0, r1 + step, step)]
+
+    def _to_points(self, path, src_box, dst_box):
+        """Turn a cell path into a corner-only polyline clipped to the source/target node boxes."""
+        cols, c = self._cols, self.cell
+        centers = [(self._ox + (i % cols + 0.5) * c, self._oy + (i // cols + 0.5) * c) for i in path]
+
+        def in_box(p, b):
+            return b[0] <= p[0] <= b[2] and b[1] <= p[1] <= b[3]
+
+        def exit_point(a, b, box):
+            # a inside box, b outside; the run is axis-aligned so only one coordinate changes
+            if a[1] == b[1]:
+                return (box[2] if b[0] > a[0] else box[0]), a[1]
+            return a[0], (box[3] if b[1] > a[1] else box[1])
+
+        first = next((k for k, p in enumerate(centers) if not in_box(p, src_box)), None)
+        last = next((k for k in range(len(centers) - 1, -1, -1) if not in_box(centers[k], dst_box)), None)
+        if first is None or last is None or first == 0 or last == len(centers) - 1 or first > last:
+            return None
+        pts = [exit_point(centers[first - 1], centers[first], src_box)]
+        pts.extend(centers[first:last + 1])
+        pts.append(exit_point(centers[last + 1], centers[last], dst_box))
+
+        # keep only corners
+        out = [pts[0]]
+        for k in range(1, len(pts) - 1):
+            px, py = out[-1]
+            nx, ny = pts[k + 1]
+            x, y = pts[k]
+            if (px == x == nx) or (py == y == ny):
+                continue
+            out.append(pts[k])
+        out.append(pts[-1])
+        return out
+
+
+# ---------------- Utility: Diagram file I/O ----------------
+# Compact columnar format (.vsk):
+#   header  = magic(4s) version(H) reserved(H)
+#   payload = zlib( counts(IIII) | string offsets(I*) | utf-8 string blob |
+#                   node id/text/type string indices(I*) | node x/y(h*) |
+#                   link from/to/label string indices(I*) )
+# Every string (ids, texts, types, labels, title) lives once in the string table;
+# all other columns are fixed-width little-endian arrays read with array.frombytes.
+VSK_MAGIC = b"VSKD"
+VSK_VERSION = 1
+_VSK_HEADER = struct.Struct("<4sHH")
+_VSK_COUNTS = struct.Struct("<IIII")  # strings, nodes, links, title string index
+
+
+def _le_array(typecode, values=()):
+    """Array in little-endian byte order regardless of host."""
+    arr = array(typecode, values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _read_le_array(typecode, buf, offset, count):
+    """Read `count` items of `typecode` from buf at offset. Returns (array, new_offset)."""
+    arr = array(typecode)
+    end = offset + count * arr.itemsize
+    arr.frombytes(buf[offset:end])
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr, end
+
+
+class _StringTable:
+    """Interns strings on write; on read, each distinct string is decoded once and then cached."""
+
+    def __init__(self, blob=b"", offsets=None):
+        self._blob = blob
+        self._offsets = offsets if offsets is not None else [0]
+        self._cache: Dict[int, str] = {}
+        self._index: Dict[str, int] = {}
+        self._parts: List[bytes] = []
+
+    def intern(self, s) -> int:
+        s = "" if s is None else str(s)
+        idx = self._index.get(s)
+        if idx is None:
+            idx = len(self._offsets) - 1
+            data = s.encode("utf-8")
+            self._parts.append(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+            self._index[s] = idx
+        return idx
+
+    def __getitem__(self, idx) -> str:
+        s = self._cache.get(idx)
+        if s is None:
+            s = self._blob[self._offsets[idx]:self._offsets[idx + 1]].decode("utf-8")
+            self._cache[idx] = s
+        return s
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def to_bytes(self) -> Tuple[bytes, bytes]:
+        offsets = _le_array("I", self._offsets)
+        return offsets.tobytes(), b"".join(self._parts)
+
+
+def encode_diagram_binary(diagram) -> bytes:
+    """Serialize a diagram dict to the compact .vsk representation."""
+    strings = _StringTable()
+    nodes = diagram.get("nodes", [])
+    links = diagram.get("links", [])
+
+    title_idx = strings.intern(diagram.get("title", ""))
+    node_ids = _le_array("I", (strings.intern(n.get("id")) for n in nodes))
+    node_texts = _le_array("I", (strings.intern(n.get("text", "")) for n in nodes))
+    node_types = _le_array("I", (strings.intern(n.get("type", "process")) for n in nodes))
+    node_x = _le_array("h", (int(max(0, min(1000, int(n.get("x", 500))))) for n in nodes))
+    node_y = _le_array("h", (int(max(0, min(1000, int(n.get("y", 500))))) for n in nodes))
+    link_from = _le_array("I", (strings.intern(l.get("from")) for l in links))
+    link_to = _le_array("I", (strings.intern(l.get("to")) for l in links))
+    link_labels = _le_array("I", (strings.intern(l.get("label", "")) for l in links))
+
+    offsets, blob = strings.to_bytes()
+    payload = b"".join([
+        _VSK_COUNTS.pack(len(strings), len(nodes), len(links), title_idx),
+        offsets, blob,
+        node_ids.tobytes(), node_texts.tobytes(), node_types.tobytes(),
+        node_x.tobytes(), node_y.tobytes(),
+        link_from.tobytes(), link_to.tobytes(), link_labels.tobytes(),
+    ])
+    return _VSK_HEADER.pack(VSK_MAGIC, VSK_VERSION, 0) + zlib.compress(payload, 6)
+
+
+def decode_diagram_binary(data: bytes):
+    """
+    Parse .vsk bytes back into a diagram dict. Strings are decoded once per distinct value;
+    node and link dicts are built eagerly, since the canvas indexes and paints every node
+    right after loading anyway.
+    """
+    if len(data) < _VSK_HEADER.size:
+        raise ValueError("File is too short to be a VenomSketch diagram.")
+    magic, version, _ = _VSK_HEADER.unpack_from(data, 0)
+    if magic != VSK_MAGIC:
+        raise ValueError("Not a VenomSketch diagram file (bad magic).")
+    if version > VSK_VERSION:
+        raise ValueError(f"Unsupported diagram file version: {version}")
+
+    buf = memoryview(zlib.decompress(data[_VSK_HEADER.size:]))
+    n_strings, n_nodes, n_links, title_idx = _VSK_COUNTS.unpack_from(buf, 0)
+    pos = _VSK_COUNTS.size
+    offsets, pos = _read_le_array("I", buf, pos, n_strings + 1)
+    blob_len = offsets[-1]
+    strings = _StringTable(bytes(buf[pos:pos + blob_len]), offsets)
+    pos += blob_len
+
+    node_ids, pos = _read_le_array("I", buf, pos, n_nodes)
+    node_texts, pos = _read_le_array("I", buf, pos, n_nodes)
+    node_types, pos = _read_le_array("I", buf, pos, n_nodes)
+    node_x, pos = _read_le_array("h", buf, pos, n_nodes)
+    node_y, pos = _read_le_array("h", buf, pos, n_nodes)
+    link_from, pos = _read_le_array("I", buf, pos, n_links)
+    link_to, pos = _read_le_array("I", buf, pos, n_links)
+    link_labels, pos = _read_le_array("I", buf, pos, n_links)
+
+    s = strings.__getitem__
+    nodes = [
+        {"id": s(i), "text": s(t), "type": s(ty), "x": x, "y": y}
+        for i, t, ty, x, y in zip(node_ids, node_texts, node_types, node_x, node_y)
+    ]
+    links = [
+        {"from": s(f), "to": s(t), "label": s(lb)}
+        for f, t, lb in zip(link_from, link_to, link_labels)
+    ]
+    return {"title": s(title_idx), "nodes": nodes, "links": links}
+
+
+def save_diagram(diagram, path):
+    """Save diagram to path. `.vsk` uses the binary format, `.json.gz` gzip JSON, anything else plain JSON."""
+    lower = path.lower()
+    if lower.endswith(".vsk"):
+        with open(path, "wb") as f:
+            f.write(encode_diagram_binary(diagram))
+    elif lower.endswith(".gz"):
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(diagram, f, separators=(",", ":"))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(diagram, f, indent=2)
+
+
+def load_diagram(path):
+    """
+    Load a diagram saved by save_diagram. The format is detected from the file contents.
+    Gzip and plain JSON are parsed in one pass with json.load, not incrementally.
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == VSK_MAGIC:
+        with open(path, "rb") as f:
+            return decode_diagram_binary(f.read())
+    if head[:2] == b"\x1f\x8b":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if not isinstance(data, dict) or "nodes" not in data:
+        raise ValueError("File does not contain a diagram object.")
+    data.setdefault("title", os.path.splitext(os.path.basename(path))[0])
+    data.setdefault("links", [])
+    return data
+
+
 # ---------------- Canvas with Drag & Drop and Link Creation ----------------
 class DiagramCanvas(QWidget):
     # Emits when the internal diagram data changes (dict)
@@ -180,11 +762,29 @@ class DiagramCanvas(QWidget):
         self.add_link_source = None  # node id when creating a link
         self.highlight_node = None  # node id to highlight (for selection)
         self.curved_links = True  # default to curved
+        self.routed_links = False  # route links around node boxes (EdgeRouter)
+        self.router = EdgeRouter()
+        self.route_budget_ms = 25  # max routing time per frame; the rest is finished on later frames
         self.node_w = 150
         self.node_h = 50
+        self._link_index: Optional[LinkIndex] = None
+
+        # Multi-selection state
+        self.selected = set()  # ids of selected nodes
+        self.marquee_start = QPoint()
+        self.marquee_rect: Optional[QRect] = None  # rubber band in widget coords while dragging
+        self._node_grid: Optional[NodeGrid] = None
+        self._drag_nodes: List[Dict] = []  # nodes moved by the current drag (the selection)
+        self._drag_origin: Dict[str, Tuple[int, int]] = {}
+        self._drag_bounds = (0, 0, 1000, 1000)
+        self._drag_moved = False
+        self.setFocusPolicy(Qt.FocusPolicy.ClickFocus)  # for Delete / Escape / Ctrl+A
 
     def set_diagram_data(self, data):
         self.diagram_data = data
+        self.router.reset()
+        self.selected = set()
+        self._node_grid = None
         # emit one-time update so parent can sync JSON/logs
         if self.diagram_data is not None:
             # send a shallow copy to avoid accidental external mutation
@@ -202,6 +802,31 @@ class DiagramCanvas(QWidget):
         self.update()
 
     # ---------- Node/Link helper methods ----------
+    def _spatial_index(self) -> NodeGrid:
+        """Bucket grid over the current nodes, rebuilt when nodes were added, removed or moved."""
+        nodes = self.diagram_data.setdefault('nodes', [])
+        if self._node_grid is None or not self._node_grid.in_sync(nodes):
+            self._node_grid = NodeGrid(nodes)
+        return self._node_grid
+
+    def _nodes_in_widget_rect(self, x0, y0, x1, y1) -> List[Dict]:
+        """Nodes (in paint order) whose boxes intersect the un-panned widget rectangle."""
+        w = self.width()
+        h = self.height()
+        # node box half-extents in 0..1000 units, plus one unit for int rounding
+        hx = self.node_w / 2 * 1000 / w + 1
+        hy = self.node_h / 2 * 1000 / h + 1
+        nodes = self.diagram_data.get('nodes', [])
+        hits = []
+        for i in self._spatial_index().query(x0 * 1000 / w - hx, y0 * 1000 / h - hy,
+                                             x1 * 1000 / w + hx, y1 * 1000 / h + hy):
+            node = nodes[i]
+            x = int(node['x'] * w / 1000 - self.node_w / 2)
+            y = int(node['y'] * h / 1000 - self.node_h / 2)
+            if x <= x1 and x + self.node_w >= x0 and y <= y1 and y + self.node_h >= y0:
+                hits.append(node)
+        return hits
+
     def _find_node_at_pos(self, px, py):
         """Return node dict under widget coords px,py or None. Takes widget coords."""
         if not self.diagram_data:
@@ -213,7 +838,8 @@ class DiagramCanvas(QWidget):
         px = px - self.diagram_offset.x()
         py = py - self.diagram_offset.y()
 
-        for node in reversed(self.diagram_data.get('nodes', [])):
+        # Topmost (last painted) candidate first
+        for node in reversed(self._nodes_in_widget_rect(px, py, px, py)):
             # Convert node 0..1000 coordinate to widget coordinates, then offset by pan
             x = int(node['x'] * w / 1000 - self.node_w / 2)
             y = int(node['y'] * h / 1000 - self.node_h / 2)
@@ -223,6 +849,102 @@ class DiagramCanvas(QWidget):
                 return node
         return None
 
+    # ---------- Selection and batched group operations ----------
+    def _commit_change(self):
+        """Single change notification and repaint after a (batched) edit."""
+        self._node_grid = None
+        if self.diagram_data is not None:
+            self.diagram_changed.emit(json.loads(json.dumps(self.diagram_data)))
+        self.update()
+
+    def _selected_nodes(self) -> List[Dict]:
+        if not self.diagram_data or not self.selected:
+            return []
+        return [n for n in self.diagram_data.get('nodes', []) if n['id'] in self.selected]
+
+    def select_all(self):
+        if self.diagram_data:
+            self.selected = {n['id'] for n in self.diagram_data.get('nodes', [])}
+            self.update()
+
+    def clear_selection(self):
+        if self.selected:
+            self.selected = set()
+            self.update()
+
+    def delete_nodes(self, node_ids):
+        """Delete nodes and every link touching them as one edit."""
+        if self.diagram_data is None:
+            return
+        ids = set(node_ids)
+        nodes = self.diagram_data.get('nodes', [])
+        remaining = [n for n in nodes if n['id'] not in ids]
+        if len(remaining) == len(nodes):
+            return
+        self.diagram_data['nodes'] = remaining
+        self.link_index().remove_nodes(ids)
+        self.selected -= ids
+        if self.highlight_node in ids:
+            self.highlight_node = None
+        self._commit_change()
+
+    def align_selected(self, mode):
+        """Align selected nodes: 'left', 'hcenter', 'right', 'top', 'vcenter' or 'bottom'."""
+        nodes = self._selected_nodes()
+        if len(nodes) < 2:
+            return
+        axis = 'x' if mode in ('left', 'hcenter', 'right') else 'y'
+        values = [n[axis] for n in nodes]
+        if mode in ('left', 'top'):
+            target = min(values)
+        elif mode in ('right', 'bottom'):
+            target = max(values)
+        else:
+            target = int(round(sum(values) / len(values)))
+        for n in nodes:
+            n[axis] = target
+        self._commit_change()
+
+    def distribute_selected(self, axis):
+        """Space selected nodes evenly between the outermost two along 'x' or 'y'."""
+        nodes = sorted(self._selected_nodes(), key=lambda n: n[axis])
+        if len(nodes) < 3:
+            return
+        lo, hi = nodes[0][axis], nodes[-1][axis]
+        step = (hi - lo) / (len(nodes) - 1)
+        for i, n in enumerate(nodes):
+            n[axis] = int(round(lo + i * step))
+        self._commit_change()
+
+    def _add_selection_actions(self, menu):
+        """Add group operations for the current selection to a context menu. Returns action -> callback."""
+        count = len(self.selected)
+        if count < 2:
+            return {}
+        menu.addSeparator()
+        actions = {
+            menu.addAction(f"Delete Selected ({count})"): lambda: self.delete_nodes(self.selected),
+        }
+        align_menu = menu.addMenu("Align Selected")
+        for label, mode in (("Left", "left"), ("Center", "hcenter"), ("Right", "right"),
+                            ("Top", "top"), ("Middle", "vcenter"), ("Bottom", "bottom")):
+            actions[align_menu.addAction(label)] = lambda m=mode: self.align_selected(m)
+        if count >= 3:
+            actions[menu.addAction("Distribute Horizontally")] = lambda: self.distribute_selected('x')
+            actions[menu.addAction("Distribute Vertically")] = lambda: self.distribute_selected('y')
+        return actions
+
+    def keyPressEvent(self, event):
+        key = event.key()
+        if key in (Qt.Key.Key_Delete, Qt.Key.Key_Backspace) and self.selected:
+            self.delete_nodes(self.selected)
+        elif key == Qt.Key.Key_Escape:
+            self.clear_selection()
+        elif key == Qt.Key.Key_A and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.select_all()
+        else:
+            super().keyPressEvent(event)
+
     def add_node_at(self, x_widget, y_widget, typ="process", text=None):
         """Place a new node at widget coordinates and emit change."""
         if self.diagram_data is None:
@@ -250,25 +972,29 @@ class DiagramCanvas(QWidget):
         center_y = self.height() / 2
         self.add_node_at(center_x, center_y, typ, text)
 
+    def link_index(self) -> LinkIndex:
+        """Adjacency index for the current diagram's links, rebuilt if the list was replaced externally."""
+        links = self.diagram_data.setdefault('links', [])
+        if self._link_index is None or not self._link_index.in_sync(links):
+            self._link_index = LinkIndex(links)
+        return self._link_index
+
     def add_link_between(self, from_id, to_id, label=""):
         if self.diagram_data is None:
             return
         if from_id == to_id:
             return
-        links = self.diagram_data.setdefault('links', [])
         # avoid duplicates
-        for l in links:
-            if l.get('from') == from_id and l.get('to') == to_id:
-                return
-        links.append({"from": from_id, "to": to_id, "label": label})
+        if self.link_index().add(from_id, to_id, label) is None:
+            return
         self.diagram_changed.emit(json.loads(json.dumps(self.diagram_data)))
         self.update()
 
     def remove_link_between(self, from_id, to_id):
         if self.diagram_data is None:
             return
-        links = self.diagram_data.get('links', [])
-        self.diagram_data['links'] = [l for l in links if not (l.get('from') == from_id and l.get('to') == to_id)]
+        if not self.link_index().remove(from_id, to_id):
+            return
         self.diagram_changed.emit(json.loads(json.dumps(self.diagram_data)))
         self.update()
 
@@ -282,23 +1008,24 @@ class DiagramCanvas(QWidget):
         self.curved_links = on
         self.update()
 
+    def set_routed_links(self, on: bool):
+        self.routed_links = on
+        self.update()
+
     # ---------- Paint ----------
+    def _theme_colors(self):
+        """Return (instruction text, link, canvas background) colors for the current theme."""
+        if self.dark_mode:
+            return QColor(100, 100, 100), QColor("#5A9BD6"), QColor(26, 26, 26)
+        return QColor(150, 150, 150), QColor("#34495E"), QColor(244, 244, 244)
+
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         painter.setFont(self.font)
 
         # Determine base colors for canvas content
-        if self.dark_mode:
-            instruction_color = QColor(100, 100, 100)
-            link_color = QColor("#5A9BD6")
-            node_text_color = QColor("#FFFFFF")
-            canvas_bg = QColor(26, 26, 26)
-        else:
-            instruction_color = QColor(150, 150, 150)
-            link_color = QColor("#34495E")
-            node_text_color = QColor("#FFFFFF")
-            canvas_bg = QColor(244, 244, 244)
+        instruction_color, _, canvas_bg = self._theme_colors()
 
         # Fill background
         painter.fillRect(self.rect(), canvas_bg)
@@ -314,13 +1041,173 @@ class DiagramCanvas(QWidget):
                              "Conceptualizer Ready.\nEnter a prompt and click Generate or add nodes.")
             return
 
-        # map 0..1000 coords to widget
-        w = self.width()
-        h = self.height()
+        # Only the part of the diagram currently scrolled into view needs drawing
+        visible = (-self.diagram_offset.x(), -self.diagram_offset.y(),
+                   self.width() - self.diagram_offset.x(), self.height() - self.diagram_offset.y())
+        router = self.router if self.routed_links else None
+        self._paint_diagram(painter, self.diagram_data, self.width(), self.height(),
+                            highlight_node=self.highlight_node, visible=visible,
+                            router=router, route_budget_ms=self.route_budget_ms, selected=self.selected)
+
+        # rubber band (widget coords, drawn over everything)
+        if self.marquee_rect is not None:
+            painter.resetTransform()
+            painter.setPen(QPen(QColor("#FFD166"), 1, Qt.PenStyle.DashLine))
+            painter.setBrush(QBrush(QColor(255, 209, 102, 40)))
+            painter.drawRect(self.marquee_rect)
+        if router is not None and router.pending:
+            # Some routes did not fit in this frame's budget; finish them on the next one
+            QTimer.singleShot(0, self.update)
+
+    def _paint_diagram(self, painter, diagram, w, h, highlight_node=None, visible=None,
+                       router=None, route_budget_ms=None, selected=None, link_geometry=None):
+        """
+        Draw links and nodes of `diagram`, mapping 0..1000 coords onto a w x h area.
+        `visible` is an optional (x0, y0, x1, y1) cull box in the same coordinates.
+        `router` (an EdgeRouter) routes links around nodes; see _link_geometry for the budget.
+        `link_geometry` reuses a _link_geometry result (tiled exports paint the same links per tile).
+        Only reads canvas style attributes, so export workers can call it on a CanvasRenderSnapshot.
+        """
+        _, link_color, _ = self._theme_colors()
+        nodes = diagram.get("nodes", [])
+        links = diagram.get("links", [])
+
+        if visible is not None:
+            # Pad by a node size so partially visible shapes and labels are kept
+            pad_x = self.node_w
+            pad_y = self.node_h
+            vx0, vy0, vx1, vy1 = visible[0] - pad_x, visible[1] - pad_y, visible[2] + pad_x, visible[3] + pad_y
+        else:
+            vx0 = vy0 = -math.inf
+            vx1 = vy1 = math.inf
+
+        # --- Draw links (behind nodes) ---
+        painter.setPen(QPen(link_color, 2))
+        if link_geometry is None:
+            link_geometry = self._link_geometry(nodes, links, w, h, router=router, route_budget_ms=route_budget_ms)
+        for geo in link_geometry:
+            if geo['route']:
+                xs = [p[0] for p in geo['route']]
+                ys = [p[1] for p in geo['route']]
+            else:
+                xs = (geo['x1'], geo['x2'], geo['cx'])
+                ys = (geo['y1'], geo['y2'], geo['cy'])
+            if max(xs) < vx0 or min(xs) > vx1 or max(ys) < vy0 or min(ys) > vy1:
+                continue
+
+            if geo['route']:
+                painter.drawPath(self._route_path(geo['route']))
+            elif geo['curved']:
+                path = QPainterPath(QPointF(geo['x1'], geo['y1']))
+                path.quadTo(QPointF(geo['cx'], geo['cy']), QPointF(geo['x2'], geo['y2']))
+                painter.drawPath(path)
+            else:
+                painter.drawLine(QPointF(geo['x1'], geo['y1']), QPointF(geo['x2'], geo['y2']))
+            self._draw_arrowhead(painter, *geo['arrow'])
+
+            if geo['label']:
+                # place label near midpoint
+                painter.setPen(QPen(QColor("#FFD166")))
+                painter.drawText(int(geo['label_x']), int(geo['label_y']), geo['label'])
+                painter.setPen(QPen(link_color, 2))
+
+        # draw nodes
+        if self.dark_mode:
+            border_color = QColor("#CCCCCC")  # Light border
+        else:
+            border_color = QColor("#2C3E50")  # Dark border
+        node_text_color = QColor("#FFFFFF")  # White text works best on the strong fill colors
+        for node in nodes:
+            x = int(node['x'] * w / 1000 - self.node_w / 2)
+            y = int(node['y'] * h / 1000 - self.node_h / 2)
+            if x + self.node_w < vx0 or x > vx1 or y + self.node_h < vy0 or y > vy1:
+                continue
+
+            shape, color_key = node_visual(node)
+            color = QColor(NODE_COLORS[color_key][1 if self.dark_mode else 0])
+
+            # Highlighting for selection / add-link-mode
+            if node.get('id') == highlight_node or (selected and node.get('id') in selected):
+                # bright border to indicate selection
+                painter.setPen(QPen(QColor("#FFD166"), 3))
+            else:
+                painter.setPen(QPen(border_color, 2))
+
+            painter.setBrush(QBrush(color))
+            self._draw_node_shape(painter, shape, x, y)
+
+            painter.setPen(QPen(node_text_color))
+            text_rect = QRect(x + 6, y + 6, self.node_w - 12, self.node_h - 12)
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, node.get('text', ''))
+
+    def _draw_node_shape(self, painter, shape, x, y):
+        """Draw the outline/fill of a node shape with its top-left corner at x, y."""
+        if shape == "decision":
+            pts = [
+                QPointF(x + self.node_w / 2, y),
+                QPointF(x + self.node_w, y + self.node_h / 2),
+                QPointF(x + self.node_w / 2, y + self.node_h),
+                QPointF(x, y + self.node_h / 2)
+            ]
+            painter.drawPolygon(QPolygonF(pts))
+        elif shape == "terminator":
+            painter.drawEllipse(x, y, self.node_w, self.node_h)
+        elif shape == "data":
+            # Draw parallelogram (Input/Output)
+            pts = [
+                QPointF(x + 10, y),
+                QPointF(x + self.node_w, y),
+                QPointF(x + self.node_w - 10, y + self.node_h),
+                QPointF(x, y + self.node_h)
+            ]
+            painter.drawPolygon(QPolygonF(pts))
+        elif shape == "database":
+            # Draw Database (Cylinder shape)
+            cy_h = self.node_h * 0.8  # Body height
+            cy_e = self.node_h * 0.2  # Ellipse height
+
+            # Bottom ellipse (filled body color)
+            painter.drawRect(x, int(y + cy_e / 2), self.node_w, int(cy_h))
+            painter.drawEllipse(x, int(y + cy_h), self.node_w, int(cy_e))
+
+            # Top ellipse (filled body color)
+            painter.drawEllipse(x, y, self.node_w, int(cy_e))
+        elif shape == "document":
+            # Draw Document (Rectangle with folded corner)
+            fold_size = 15
+            pts = [
+                QPointF(x, y),
+                QPointF(x + self.node_w - fold_size, y),
+                QPointF(x + self.node_w, y + fold_size),
+                QPointF(x + self.node_w, y + self.node_h),
+                QPointF(x, y + self.node_h),
+            ]
+            painter.drawPolygon(QPolygonF(pts))
+
+            # Draw the corner fold line
+            original_brush = painter.brush()
+            painter.setBrush(QBrush(QColor(0, 0, 0, 0)))  # Transparent fill for the corner fold lines
+            painter.drawLine(x + self.node_w - fold_size, y, x + self.node_w - fold_size, y + fold_size)
+            painter.drawLine(x + self.node_w - fold_size, y + fold_size, x + self.node_w, y + fold_size)
+            painter.setBrush(original_brush)  # Restore fill brush
+        else:
+            # Default to rounded rectangle (Process/Action)
+            painter.drawRoundedRect(x, y, self.node_w, self.node_h, 12, 12)
 
-        nodes = self.diagram_data.get("nodes", [])
-        links = self.diagram_data.get("links", [])
+    def _link_geometry(self, nodes, links, w, h, router=None, route_budget_ms=None) -> List[Dict]:
+        """
+        Compute drawable geometry for every link whose endpoints exist: endpoints (offset for
+        parallel-link separation), quadratic control point, arrowhead segment and label position.
+        With a router, links get an orthogonal 'route' polyline around node boxes instead. Routes not
+        cached yet are computed until route_budget_ms runs out (None = no limit); links left over fall
+        back to the plain curve/line for this call and are counted in router.pending.
+        """
         node_map = {n['id']: n for n in nodes}
+        deadline = None
+        if router is not None:
+            router.sync(nodes, w, h, self.node_w, self.node_h)
+            if route_budget_ms is not None:
+                deadline = time.perf_counter() + route_budget_ms / 1000
 
         # --- Pre-calculate link geometry for collision avoidance ---
         link_geometry: List[Dict] = []
@@ -351,10 +1238,7 @@ class DiagramCanvas(QWidget):
         # 1. Group links by their non-directional (sorted) pair key
         link_groups: Dict[Tuple[str, str], List[Dict]] = {}
         for geo in link_geometry:
-            pair = geo['key']
-            if pair not in link_groups:
-                link_groups[pair] = []
-            link_groups[pair].append(geo)
+            link_groups.setdefault(geo['key'], []).append(geo)
 
         # 2. Assign offset indices within groups
         for pair, group in link_groups.items():
@@ -365,35 +1249,45 @@ class DiagramCanvas(QWidget):
                     # Offsets: 0, 1, -1, 2, -2, ... (center, then alternating sides)
                     geo['offset_index'] = (i - mid_index)
 
-        # --- Draw links (behind nodes) ---
-        painter.setPen(QPen(link_color, 2))
+        # 3. Resolve curve control points, arrowheads and label anchors
         for geo in link_geometry:
             x1, y1, x2, y2 = geo['x1'], geo['y1'], geo['x2'], geo['y2']
             link = geo['link']
+            geo['label'] = link.get('label') or ''
+            geo['route'] = None
+
+            if router is not None:
+                compute = deadline is None or time.perf_counter() < deadline
+                route = router.route(link['from'], link['to'], compute=compute)
+                if route:
+                    mid_x, mid_y = self._polyline_midpoint(route)
+                    geo.update(curved=False, route=route,
+                               x1=route[0][0], y1=route[0][1], x2=route[-1][0], y2=route[-1][1],
+                               cx=mid_x, cy=mid_y, arrow=(*route[-2], *route[-1]),
+                               label_x=mid_x + 6, label_y=mid_y - 10)
+                    continue
 
             # Base offset magnitude for separation
             link_sep_mag = 10 * geo['offset_index']
 
-            # Initialize separation offsets to float 0.0 before conditional assignment
+            dx = x2 - x1
+            dy = y2 - y1
+            dist = math.hypot(dx, dy) + 1e-6
+            # perpendicular vector (unit vector)
+            px_unit = -dy / dist
+            py_unit = dx / dist
+
+            # Label separation offset (stays 0.0 for curved links, which are centered)
             px, py = 0.0, 0.0
 
-            # compute control point for curved or straight line
             if self.curved_links:
                 # midpoint
                 mx = (x1 + x2) / 2
                 my = (y1 + y2) / 2
-                # perpendicular offset based on distance
-                dx = x2 - x1
-                dy = y2 - y1
-                dist = math.hypot(dx, dy) + 1e-6
 
                 # BASE curve offset magnitude (independent of separation)
                 base_curve_mag = min(80, max(20, dist * 0.12))
 
-                # perpendicular vector (unit vector)
-                px_unit = -dy / dist
-                py_unit = dx / dist
-
                 # Use a deterministic sign for base curve offset
                 sign = 1 if (hash(link['from']) - hash(link['to'])) % 2 == 0 else -1
 
@@ -401,197 +1295,203 @@ class DiagramCanvas(QWidget):
                 cx = mx + px_unit * (base_curve_mag * sign + link_sep_mag)
                 cy = my + py_unit * (base_curve_mag * sign + link_sep_mag)
 
-                path = QPainterPath(QPointF(x1, y1))
-                path.quadTo(QPointF(cx, cy), QPointF(x2, y2))
-                painter.drawPath(path)
-
-                # arrowhead calculation...
+                # arrowhead tangent from the curve derivative near the end (t = 0.98)
                 tval = 0.98
-                A = QPointF(x1, y1)
-                B = QPointF(cx, cy)
-                C = QPointF(x2, y2)
-                dx_d = 2 * (1 - tval) * (B.x() - A.x()) + 2 * tval * (C.x() - B.x())
-                dy_d = 2 * (1 - tval) * (B.y() - A.y()) + 2 * tval * (C.y() - B.y())
-                ex = x2
-                ey = y2
-                self._draw_arrowhead(painter, ex - dx_d, ey - dy_d, ex, ey)
-                # px and py remain 0.0 for labels (center position)
-
+                dx_d = 2 * (1 - tval) * (cx - x1) + 2 * tval * (x2 - cx)
+                dy_d = 2 * (1 - tval) * (cy - y1) + 2 * tval * (y2 - cy)
+                geo.update(curved=True, cx=cx, cy=cy, arrow=(x2 - dx_d, y2 - dy_d, x2, y2))
             else:
                 # Straight line (apply perpendicular offset for separation)
-
-                # perpendicular vector (unit vector)
-                dx = x2 - x1
-                dy = y2 - y1
-                dist = math.hypot(dx, dy) + 1e-6
-                px = -dy / dist * link_sep_mag
-                py = dx / dist * link_sep_mag
-
-                x1_off = x1 + px
-                y1_off = y1 + py
-                x2_off = x2 + px
-                y2_off = y2 + py
-
-                painter.drawLine(QPointF(x1_off, y1_off), QPointF(x2_off, y2_off))
-
-                # Arrowhead uses the slightly offset line segment
-                self._draw_arrowhead(painter, x1_off, y1_off, x2_off, y2_off)
-
-            if link.get('label'):
-                # place label near midpoint
-                painter.setPen(QPen(QColor("#FFD166")))
-
-                # Apply separation offset (px, py) to the label position.
-                label_x = (x1 + x2) // 2 + 6 + px
-                label_y = (y1 + y2) // 2 - 10 + py
-
-                painter.drawText(int(label_x), int(label_y), link['label'])
-                painter.setPen(QPen(link_color, 2))
-
-        # draw nodes
-        for node in nodes:
-            x = int(node['x'] * w / 1000 - self.node_w / 2)
-            y = int(node['y'] * h / 1000 - self.node_h / 2)
-            typ = node.get('type', 'process').lower()
-            text = node.get('text', '')
-
-            # --- Node Color Logic (Consistent logic, theme-specific final colors) ---
-            is_generic = typ in ['process', 'box', 'text', 'rectangle', '']
-
-            # Base Colors (neutral)
-            if typ in ['start', 'end', 'terminator', 'ellipse'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['start', 'end', 'exit'])):
-                base_color = QColor("#3498DB")
-            elif typ in ['decision', 'rhombus', 'diamond'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['?', 'if', 'decision', 'loop'])):
-                base_color = QColor("#E74C3C")
-            elif typ in ['data', 'input', 'output', 'parallelogram'] or (
-                    is_generic and any(
-                keyword in text.lower() for keyword in ['explore', 'data', 'read', 'get', 'input'])):
-                base_color = QColor("#9B59B6")
-            elif typ in ['database', 'db', 'storage'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['sql', 'database', 'store', 'storage'])):
-                base_color = QColor("#F39C12")  # Deep Orange
-            elif typ in ['document', 'report', 'output_file'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['document', 'report', 'file', 'pdf'])):
-                base_color = QColor("#8E44AD")  # Purple
-            else:
-                base_color = QColor("#2ECC71")
-
-            # Apply theme adjustment
-            if self.dark_mode:
-                # Slightly desaturated colors for dark theme (Professional)
-                if base_color == QColor("#3498DB"):
-                    color = QColor("#4A8ECF")
-                elif base_color == QColor("#E74C3C"):
-                    color = QColor("#C25446")
-                elif base_color == QColor("#9B59B6"):
-                    color = QColor("#8A67B2")
-                elif base_color == QColor("#F39C12"):
-                    color = QColor("#D88500")  # Darker Orange
-                elif base_color == QColor("#8E44AD"):
-                    color = QColor("#7B3D9D")  # Darker Purple
-                else:
-                    color = QColor("#3DAF6C")
-                border_color = QColor("#CCCCCC")  # Light border
-                node_text_color = QColor("#FFFFFF")
-            else:
-                # Slightly stronger colors for light theme
-                color = base_color
-                border_color = QColor("#2C3E50")  # Dark border
-                node_text_color = QColor("#FFFFFF")  # White text still works best on strong colors
-
-            # Highlighting for selection / add-link-mode
-            if node.get('id') == self.highlight_node:
-                # bright border to indicate selection
-                highlight_border = QColor("#FFD166")
-                painter.setPen(QPen(highlight_border, 3))
-            else:
-                painter.setPen(QPen(border_color, 2))
-
-            painter.setBrush(QBrush(color))
-
-            # Draw shape based on type
-            if typ in ['decision', 'rhombus', 'diamond'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['?', 'if', 'decision', 'loop'])):
-                pts = [
-                    QPointF(x + self.node_w / 2, y),
-                    QPointF(x + self.node_w, y + self.node_h / 2),
-                    QPointF(x + self.node_w / 2, y + self.node_h),
-                    QPointF(x, y + self.node_h / 2)
-                ]
-                painter.drawPolygon(QPolygonF(pts))
-            elif typ in ['start', 'end', 'terminator', 'ellipse'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['start', 'end', 'exit'])):
-                painter.drawEllipse(x, y, self.node_w, self.node_h)
-            elif typ in ['data', 'input', 'output', 'parallelogram'] or (
-                    is_generic and any(
-                keyword in text.lower() for keyword in ['explore', 'data', 'read', 'get', 'input'])):
-                # Draw parallelogram (Input/Output)
-                pts = [
-                    QPointF(x + 10, y),
-                    QPointF(x + self.node_w, y),
-                    QPointF(x + self.node_w - 10, y + self.node_h),
-                    QPointF(x, y + self.node_h)
-                ]
-                painter.drawPolygon(QPolygonF(pts))
-            elif typ in ['database', 'db', 'storage'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['sql', 'database', 'store', 'storage'])):
-                # Draw Database (Cylinder shape)
-                cy_h = self.node_h * 0.8  # Body height
-                cy_e = self.node_h * 0.2  # Ellipse height
-
-                # Bottom ellipse (filled body color)
-                painter.drawRect(x, int(y + cy_e / 2), self.node_w, int(cy_h))
-                painter.drawEllipse(x, int(y + cy_h), self.node_w, int(cy_e))
-
-                # Top ellipse (filled body color)
-                painter.drawEllipse(x, y, self.node_w, int(cy_e))
-            elif typ in ['document', 'report', 'output_file'] or (
-                    is_generic and any(keyword in text.lower() for keyword in ['document', 'report', 'file', 'pdf'])):
-                # Draw Document (Rectangle with folded corner)
-                fold_size = 15
-                pts = [
-                    QPointF(x, y),
-                    QPointF(x + self.node_w - fold_size, y),
-                    QPointF(x + self.node_w, y + fold_size),
-                    QPointF(x + self.node_w, y + self.node_h),
-                    QPointF(x, y + self.node_h),
-                ]
-                painter.drawPolygon(QPolygonF(pts))
-
-                # Draw the corner fold line
-                original_brush = painter.brush()
-                painter.setBrush(QBrush(QColor(0, 0, 0, 0)))  # Transparent fill for the corner fold lines
-                painter.drawLine(x + self.node_w - fold_size, y, x + self.node_w - fold_size, y + fold_size)
-                painter.drawLine(x + self.node_w - fold_size, y + fold_size, x + self.node_w, y + fold_size)
-                painter.setBrush(original_brush)  # Restore fill brush
+                px = px_unit * link_sep_mag
+                py = py_unit * link_sep_mag
+                x1_off, y1_off = x1 + px, y1 + py
+                x2_off, y2_off = x2 + px, y2 + py
+                geo.update(curved=False, x1=x1_off, y1=y1_off, x2=x2_off, y2=y2_off,
+                           cx=(x1_off + x2_off) / 2, cy=(y1_off + y2_off) / 2,
+                           # Arrowhead uses the slightly offset line segment
+                           arrow=(x1_off, y1_off, x2_off, y2_off))
+
+            # Apply separation offset (px, py) to the label position.
+            geo['label_x'] = (x1 + x2) // 2 + 6 + px
+            geo['label_y'] = (y1 + y2) // 2 - 10 + py
+
+        return link_geometry
+
+    @staticmethod
+    def _polyline_midpoint(points):
+        """Point halfway along a polyline (by length)."""
+        seg_lengths = [math.hypot(bx - ax, by - ay) for (ax, ay), (bx, by) in zip(points, points[1:])]
+        remaining = sum(seg_lengths) / 2
+        for (ax, ay), (bx, by), length in zip(points, points[1:], seg_lengths):
+            if remaining <= length and length > 0:
+                t = remaining / length
+                return ax + (bx - ax) * t, ay + (by - ay) * t
+            remaining -= length
+        return points[-1]
+
+    def _route_corners(self, points):
+        """
+        Yield drawing steps for a routed polyline: ('line', x, y) or, with curved links on,
+        ('quad', cx, cy, x, y) to round each corner into a short spline.
+        """
+        if not self.curved_links or len(points) < 3:
+            for x, y in points[1:]:
+                yield 'line', x, y
+            return
+        for k in range(1, len(points) - 1):
+            (ax, ay), (bx, by), (nx, ny) = points[k - 1], points[k], points[k + 1]
+            len_in = math.hypot(bx - ax, by - ay)
+            len_out = math.hypot(nx - bx, ny - by)
+            radius = min(12.0, len_in / 2, len_out / 2)
+            if radius <= 0:
+                yield 'line', bx, by
+                continue
+            yield 'line', bx - (bx - ax) / len_in * radius, by - (by - ay) / len_in * radius
+            yield 'quad', bx, by, bx + (nx - bx) / len_out * radius, by + (ny - by) / len_out * radius
+        yield 'line', points[-1][0], points[-1][1]
+
+    def _route_path(self, points):
+        path = QPainterPath(QPointF(*points[0]))
+        for step in self._route_corners(points):
+            if step[0] == 'quad':
+                path.quadTo(QPointF(step[1], step[2]), QPointF(step[3], step[4]))
             else:
-                # Default to rounded rectangle (Process/Action)
-                painter.drawRoundedRect(x, y, self.node_w, self.node_h, 12, 12)
+                path.lineTo(QPointF(step[1], step[2]))
+        return path
 
-            painter.setPen(QPen(node_text_color))
-            text_rect = QRect(x + 6, y + 6, self.node_w - 12, self.node_h - 12)
-            painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, node.get('text', ''))
-
-    def _draw_arrowhead(self, painter, x1, y1, x2, y2):
-        """Draws a directional arrowhead at the (x2, y2) endpoint using tangent vector from (x1,y1)->(x2,y2)."""
+    @staticmethod
+    def _arrowhead_points(x1, y1, x2, y2):
+        """Triangle points of an arrowhead at (x2, y2) using tangent vector from (x1,y1)->(x2,y2)."""
         dx = x2 - x1
         dy = y2 - y1
         angle = math.atan2(dy, dx)
         arrow_size = 12
-        p1 = QPointF(x2, y2)
-        p2 = QPointF(x2 - arrow_size * math.cos(angle - math.pi / 6),
-                     y2 - arrow_size * math.sin(angle - math.pi / 6))
-        p3 = QPointF(x2 - arrow_size * math.cos(angle + math.pi / 6),
-                     y2 - arrow_size * math.sin(angle + math.pi / 6))
+        return [
+            (x2, y2),
+            (x2 - arrow_size * math.cos(angle - math.pi / 6), y2 - arrow_size * math.sin(angle - math.pi / 6)),
+            (x2 - arrow_size * math.cos(angle + math.pi / 6), y2 - arrow_size * math.sin(angle + math.pi / 6)),
+        ]
 
+    def _draw_arrowhead(self, painter, x1, y1, x2, y2):
+        """Draws a directional arrowhead at the (x2, y2) endpoint using tangent vector from (x1,y1)->(x2,y2)."""
         # Use filled triangle for a solid arrowhead
         painter.setBrush(QBrush(painter.pen().color()))
-        poly = QPolygonF([p1, p2, p3])
+        poly = QPolygonF([QPointF(px, py) for px, py in self._arrowhead_points(x1, y1, x2, y2)])
         painter.drawPolygon(poly)
         painter.setBrush(Qt.BrushStyle.NoBrush)
 
+    # ---------- Export helpers ----------
+    def _diagram_bounds(self, diagram, w, h, margin=40, router=None, link_geometry=None):
+        """Bounding box (x0, y0, x1, y1) of all nodes and link curves in w x h canvas coords."""
+        if link_geometry is None:
+            link_geometry = self._link_geometry(diagram.get('nodes', []), diagram.get('links', []), w, h,
+                                                router=router)
+        xs: List[float] = []
+        ys: List[float] = []
+        for node in diagram.get('nodes', []):
+            cx = node['x'] * w / 1000
+            cy = node['y'] * h / 1000
+            xs.extend((cx - self.node_w / 2, cx + self.node_w / 2))
+            ys.extend((cy - self.node_h / 2, cy + self.node_h / 2))
+        for geo in link_geometry:
+            xs.append(geo['cx'])
+            ys.append(geo['cy'])
+            for px, py in geo['route'] or ():
+                xs.append(px)
+                ys.append(py)
+            if geo['label']:
+                # rough label extent: 7px per character to the right of the anchor
+                xs.append(geo['label_x'] + 7 * len(geo['label']))
+                ys.append(geo['label_y'] - 14)
+        if not xs:
+            return 0, 0, w, h
+        return min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin
+
+    def _svg_document(self, diagram, w, h, scale=1.0, router=None):
+        """Build an SVG document for `diagram` directly from the model (no widget paint replay)."""
+        nodes = diagram.get('nodes', [])
+        geometry = self._link_geometry(nodes, diagram.get('links', []), w, h, router=router)
+        x0, y0, x1, y1 = self._diagram_bounds(diagram, w, h, link_geometry=geometry)
+        bw, bh = x1 - x0, y1 - y0
+        _, link_color, canvas_bg = self._theme_colors()
+        link_hex = link_color.name()
+        border_hex = "#CCCCCC" if self.dark_mode else "#2C3E50"
+
+        def pts(points):
+            return " ".join(f"{px:.1f},{py:.1f}" for px, py in points)
+
+        out = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{bw * scale:.0f}" height="{bh * scale:.0f}" '
+            f'viewBox="{x0:.1f} {y0:.1f} {bw:.1f} {bh:.1f}" font-family="{escape(self.font.family())}" '
+            f'font-size="{self.font.pointSize() * 4 / 3:.1f}">',
+            f'<title>{escape(diagram.get("title") or "VenomSketch Diagram")}</title>',
+            f'<rect x="{x0:.1f}" y="{y0:.1f}" width="{bw:.1f}" height="{bh:.1f}" fill="{canvas_bg.name()}"/>',
+            f'<g stroke="{link_hex}" stroke-width="2" fill="none">',
+        ]
+        labels = []
+        for geo in geometry:
+            if geo['route']:
+                d = [f'M{geo["route"][0][0]:.1f},{geo["route"][0][1]:.1f}']
+                for step in self._route_corners(geo['route']):
+                    if step[0] == 'quad':
+                        d.append(f'Q{step[1]:.1f},{step[2]:.1f} {step[3]:.1f},{step[4]:.1f}')
+                    else:
+                        d.append(f'L{step[1]:.1f},{step[2]:.1f}')
+                out.append(f'<path d="{" ".join(d)}"/>')
+            elif geo['curved']:
+                out.append(f'<path d="M{geo["x1"]:.1f},{geo["y1"]:.1f} Q{geo["cx"]:.1f},{geo["cy"]:.1f} '
+                           f'{geo["x2"]:.1f},{geo["y2"]:.1f}"/>')
+            else:
+                out.append(f'<line x1="{geo["x1"]:.1f}" y1="{geo["y1"]:.1f}" '
+                           f'x2="{geo["x2"]:.1f}" y2="{geo["y2"]:.1f}"/>')
+            out.append(f'<polygon fill="{link_hex}" points="{pts(self._arrowhead_points(*geo["arrow"]))}"/>')
+            if geo['label']:
+                labels.append(f'<text x="{geo["label_x"]:.1f}" y="{geo["label_y"]:.1f}" fill="#FFD166" '
+                              f'stroke="none">{escape(geo["label"])}</text>')
+        out.append('</g>')
+        out.extend(labels)
+
+        nw, nh = self.node_w, self.node_h
+        out.append(f'<g stroke="{border_hex}" stroke-width="2">')
+        for node in nodes:
+            x = int(node['x'] * w / 1000 - nw / 2)
+            y = int(node['y'] * h / 1000 - nh / 2)
+            shape, color_key = node_visual(node)
+            fill = NODE_COLORS[color_key][1 if self.dark_mode else 0]
+            if shape == "decision":
+                out.append(f'<polygon fill="{fill}" points="{pts([(x + nw / 2, y), (x + nw, y + nh / 2), (x + nw / 2, y + nh), (x, y + nh / 2)])}"/>')
+            elif shape == "terminator":
+                out.append(f'<ellipse fill="{fill}" cx="{x + nw / 2}" cy="{y + nh / 2}" rx="{nw / 2}" ry="{nh / 2}"/>')
+            elif shape == "data":
+                out.append(f'<polygon fill="{fill}" points="{pts([(x + 10, y), (x + nw, y), (x + nw - 10, y + nh), (x, y + nh)])}"/>')
+            elif shape == "database":
+                cy_h, cy_e = nh * 0.8, nh * 0.2
+                out.append(f'<rect fill="{fill}" x="{x}" y="{y + cy_e / 2:.1f}" width="{nw}" height="{cy_h:.1f}"/>')
+                out.append(f'<ellipse fill="{fill}" cx="{x + nw / 2}" cy="{y + cy_h + cy_e / 2:.1f}" rx="{nw / 2}" ry="{cy_e / 2:.1f}"/>')
+                out.append(f'<ellipse fill="{fill}" cx="{x + nw / 2}" cy="{y + cy_e / 2:.1f}" rx="{nw / 2}" ry="{cy_e / 2:.1f}"/>')
+            elif shape == "document":
+                fold = 15
+                out.append(f'<polygon fill="{fill}" points="{pts([(x, y), (x + nw - fold, y), (x + nw, y + fold), (x + nw, y + nh), (x, y + nh)])}"/>')
+                out.append(f'<polyline fill="none" points="{pts([(x + nw - fold, y), (x + nw - fold, y + fold), (x + nw, y + fold)])}"/>')
+            else:
+                out.append(f'<rect fill="{fill}" x="{x}" y="{y}" width="{nw}" height="{nh}" rx="12" ry="12"/>')
+        out.append('</g>')
+
+        # Node text: centered, word-wrapped to roughly the node width
+        chars_per_line = max(4, int((nw - 12) / 7))
+        out.append('<g fill="#FFFFFF" text-anchor="middle" dominant-baseline="central">')
+        for node in nodes:
+            lines = textwrap.wrap(node.get('text', ''), chars_per_line) or ['']
+            cx = node['x'] * w / 1000
+            cy = node['y'] * h / 1000 - (len(lines) - 1) * 7
+            spans = "".join(f'<tspan x="{cx:.1f}" y="{cy + i * 14:.1f}">{escape(line)}</tspan>'
+                            for i, line in enumerate(lines))
+            out.append(f'<text>{spans}</text>')
+        out.append('</g>')
+        out.append('</svg>')
+        return "\n".join(out)
+
     # ---------- Mouse interactions ----------
     def mousePressEvent(self, event):
         pos = event.position()
@@ -644,11 +1544,29 @@ class DiagramCanvas(QWidget):
             if not self.diagram_data:
                 return
 
+            # Shift/Ctrl extend the selection instead of replacing it
+            additive = bool(event.modifiers() & (Qt.KeyboardModifier.ShiftModifier |
+                                                 Qt.KeyboardModifier.ControlModifier))
+
             # Check for node drag first (node drag takes priority)
             node_to_drag = self._find_node_at_pos(x, y)
             if node_to_drag:
-                # Start dragging node
+                if additive:
+                    # toggle membership without starting a drag
+                    self.selected ^= {node_to_drag['id']}
+                    self.update()
+                    return
+                if node_to_drag['id'] not in self.selected:
+                    self.selected = {node_to_drag['id']}
+
+                # Start dragging node (the rest of the selection moves with it)
                 self.dragging = node_to_drag['id']
+                self._drag_nodes = self._selected_nodes()
+                self._drag_origin = {n['id']: (n['x'], n['y']) for n in self._drag_nodes}
+                xs = [p[0] for p in self._drag_origin.values()]
+                ys = [p[1] for p in self._drag_origin.values()]
+                self._drag_bounds = (min(xs), min(ys), max(xs), max(ys))
+                self._drag_moved = False
                 # Calculate drag offset relative to the node's top-left corner (un-panned)
                 node_x = int(node_to_drag['x'] * self.width() / 1000 - self.node_w / 2)
                 node_y = int(node_to_drag['y'] * self.height() / 1000 - self.node_h / 2)
@@ -659,6 +1577,15 @@ class DiagramCanvas(QWidget):
                 self.panning = False
                 return
 
+            if additive:
+                # Shift/Ctrl-drag on empty canvas draws a selection rectangle
+                self.marquee_start = pos.toPoint()
+                self.marquee_rect = QRect(self.marquee_start, self.marquee_start)
+                return
+
+            # plain click on empty canvas drops the selection
+            self.clear_selection()
+
             # If no node found, start panning the canvas
             if not self.dragging:
                 self.panning = True
@@ -685,17 +1612,28 @@ class DiagramCanvas(QWidget):
             nx = int(max(0, min(1000, new_x_center * 1000 / w)))
             ny = int(max(0, min(1000, new_y_center * 1000 / h)))
 
+            # Move the whole selection by the dragged node's delta, clamped so all of it stays in 0..1000
+            ox, oy = self._drag_origin[self.dragging]
+            min_x, min_y, max_x, max_y = self._drag_bounds
+            dx = max(-min_x, min(1000 - max_x, nx - ox))
+            dy = max(-min_y, min(1000 - max_y, ny - oy))
+
             changed = False
-            for node in self.diagram_data['nodes']:
-                if node['id'] == self.dragging:
-                    if node.get('x') != nx or node.get('y') != ny:
-                        node['x'] = nx
-                        node['y'] = ny
-                        changed = True
-                    break
+            for node in self._drag_nodes:
+                ox, oy = self._drag_origin[node['id']]
+                if node['x'] != ox + dx or node['y'] != oy + dy:
+                    node['x'] = ox + dx
+                    node['y'] = oy + dy
+                    changed = True
             if changed:
-                # emit copy to avoid external mutation
-                self.diagram_changed.emit(json.loads(json.dumps(self.diagram_data)))
+                # The change notification (full JSON copy) is sent once, on release
+                self._drag_moved = True
+                self._node_grid = None
+                self.update()
+
+        elif self.marquee_rect is not None:
+            # --- Rubber-band selection ---
+            self.marquee_rect = QRect(self.marquee_start, pos.toPoint()).normalized()
             self.update()
 
         elif self.panning:
@@ -740,12 +1678,21 @@ class DiagramCanvas(QWidget):
                     self.setCursor(Qt.CursorShape.ArrowCursor)
 
     def mouseReleaseEvent(self, event):
+        if self.marquee_rect is not None:
+            rect = self.marquee_rect.translated(-self.diagram_offset)
+            if self.diagram_data:
+                hits = self._nodes_in_widget_rect(rect.left(), rect.top(), rect.right(), rect.bottom())
+                self.selected |= {n['id'] for n in hits}
+            self.marquee_rect = None
+            self.update()
+
         if self.dragging:
             self.dragging = None
+            self._drag_nodes = []
             self.setCursor(Qt.CursorShape.ArrowCursor)
-            # final notify (emit current diagram)
-            if self.diagram_data is not None:
-                self.diagram_changed.emit(json.loads(json.dumps(self.diagram_data)))
+            # final notify (emit current diagram) — one per drag, however many nodes moved
+            if self.diagram_data is not None and self._drag_moved:
+                self._commit_change()
             # Do not clear highlight until new press if we were in link mode
             if not self.add_link_mode:
                 self.highlight_node = None
@@ -780,7 +1727,11 @@ class DiagramCanvas(QWidget):
         edit_text = menu.addAction("Edit Text")
         add_arrow_from = menu.addAction("Add Arrow From This Node")
         delete_node = menu.addAction("Delete Node")
+        group_actions = self._add_selection_actions(menu) if node['id'] in self.selected else {}
         action = menu.exec(global_pos)
+        if action in group_actions:
+            group_actions[action]()
+            return
         if action == edit_text:
             text, ok = QInputDialog.getText(self, "Edit Node Text", "Text:", text=node.get('text', ''))
             if ok:
@@ -796,12 +1747,7 @@ class DiagramCanvas(QWidget):
             self.update()
         elif action == delete_node:
             # remove node and related links
-            nid = node['id']
-            self.diagram_data['nodes'] = [n for n in self.diagram_data['nodes'] if n['id'] != nid]
-            self.diagram_data['links'] = [l for l in self.diagram_data['links'] if l['from'] != nid and l['to'] != nid]
-            self.update()
-            if self.diagram_data is not None:
-                self.diagram_changed.emit(json.loads(json.dumps(self.diagram_data)))
+            self.delete_nodes([node['id']])
 
     def show_canvas_menu(self, global_pos, x_widget, y_widget):
         # ensure dragging/panning is off when menu shows
@@ -821,7 +1767,11 @@ class DiagramCanvas(QWidget):
         add_db = menu.addAction("Add Database")
         add_term = menu.addAction("Add Terminator")
         add_doc = menu.addAction("Add Document")
+        group_actions = self._add_selection_actions(menu)
         action = menu.exec(global_pos)
+        if action in group_actions:
+            group_actions[action]()
+            return
         typ_map = {
             add_process: ("process", "Process"),
             add_decision: ("decision", "Decision"),
@@ -1028,6 +1978,155 @@ class GeminiWorker(QRunnable):
             self.signals.finished.emit()
 
 
+# ---------------- Export Worker ----------------
+class ExportWorkerSignals(QObject):
+    progress = pyqtSignal(int)
+    result = pyqtSignal(str, str)  # path, note for the user ('' if none)
+    error = pyqtSignal(str)
+    finished = pyqtSignal()
+
+
+class CanvasRenderSnapshot:
+    """
+    The style state DiagramCanvas's paint/SVG code reads (theme, link style, node size, font),
+    copied on the GUI thread. The drawing methods are shared with the canvas, so an export
+    worker renders exactly like the widget without touching it while the user keeps editing.
+    """
+    _theme_colors = DiagramCanvas._theme_colors
+    _paint_diagram = DiagramCanvas._paint_diagram
+    _draw_node_shape = DiagramCanvas._draw_node_shape
+    _link_geometry = DiagramCanvas._link_geometry
+    _polyline_midpoint = staticmethod(DiagramCanvas._polyline_midpoint)
+    _route_corners = DiagramCanvas._route_corners
+    _route_path = DiagramCanvas._route_path
+    _arrowhead_points = staticmethod(DiagramCanvas._arrowhead_points)
+    _draw_arrowhead = DiagramCanvas._draw_arrowhead
+    _diagram_bounds = DiagramCanvas._diagram_bounds
+    _svg_document = DiagramCanvas._svg_document
+
+    def __init__(self, canvas):
+        self.dark_mode = canvas.dark_mode
+        self.curved_links = canvas.curved_links
+        self.node_w = canvas.node_w
+        self.node_h = canvas.node_h
+        self.font = QFont(canvas.font)
+
+
+class DiagramExportWorker(QRunnable):
+    """
+    Renders a snapshot of a diagram off the GUI thread.
+    PNG: the full diagram bounds at `scale`, painted band by band into a small QImage and streamed
+    straight into the PNG file, so memory stays at one band however large the export is.
+    SVG: generated directly from the diagram model.
+    """
+    TILE_ROWS = 256  # PNG rows per painted band: at most MAX_IMAGE_SIDE x TILE_ROWS pixels in memory
+    MAX_IMAGE_SIDE = 32000  # PNG viewers' practical limit per side
+
+    def __init__(self, canvas, diagram, fname, fmt="png", scale=2.0):
+        super().__init__()
+        # Capture everything that needs the GUI thread now; the diagram and canvas style are
+        # copied so further edits while exporting do not race with the worker.
+        self.canvas = CanvasRenderSnapshot(canvas)
+        self.diagram = json.loads(json.dumps(diagram))
+        self.width = canvas.width()
+        self.height = canvas.height()
+        self.font = QFont(canvas.font)
+        # The canvas router belongs to the GUI thread; exports route with their own
+        self.router = EdgeRouter() if canvas.routed_links else None
+        self.fname = fname
+        self.fmt = fmt
+        self.scale = scale
+        self.note = ""
+        self.signals = ExportWorkerSignals()
+
+    def run(self):
+        try:
+            if self.fmt == "svg":
+                self._export_svg()
+            else:
+                self._export_png()
+            self.signals.result.emit(self.fname, self.note)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        finally:
+            self.signals.finished.emit()
+
+    def _export_svg(self):
+        self.signals.progress.emit(10)
+        svg = self.canvas._svg_document(self.diagram, self.width, self.height, self.scale, router=self.router)
+        self.signals.progress.emit(80)
+        with open(self.fname, "w", encoding="utf-8") as f:
+            f.write(svg)
+        self.signals.progress.emit(100)
+
+    def _export_png(self):
+        # Link geometry (and routing) is computed once and shared by the bounds and every band
+        geometry = self.canvas._link_geometry(self.diagram.get('nodes', []), self.diagram.get('links', []),
+                                              self.width, self.height, router=self.router)
+        x0, y0, x1, y1 = self.canvas._diagram_bounds(self.diagram, self.width, self.height, link_geometry=geometry)
+        scale = self.scale
+        if max(x1 - x0, y1 - y0) * scale > self.MAX_IMAGE_SIDE:
+            scale = self.MAX_IMAGE_SIDE / max(x1 - x0, y1 - y0)
+            self.note = (f"The diagram is too large for scale {self.scale:g}; it was exported at "
+                         f"{scale:.2f} to stay within {self.MAX_IMAGE_SIDE} px per side.")
+        img_w = int(math.ceil((x1 - x0) * scale))
+        img_h = int(math.ceil((y1 - y0) * scale))
+        background = self.canvas._theme_colors()[2]
+        # Record the effective DPI so viewers print at the intended physical size
+        dots_per_meter = int(96 * scale / 0.0254)
+
+        bands = range(0, img_h, self.TILE_ROWS)
+        compressor = zlib.compressobj(6)
+        try:
+            with open(self.fname, "wb") as f:
+                f.write(b"\x89PNG\r\n\x1a\n")
+                _write_png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", img_w, img_h, 8, 2, 0, 0, 0))  # 8-bit RGB
+                _write_png_chunk(f, b"pHYs", struct.pack(">IIB", dots_per_meter, dots_per_meter, 1))
+                for i, ty in enumerate(bands):
+                    rows = min(self.TILE_ROWS, img_h - ty)
+                    band = self._paint_band(geometry, x0, y0, x1, scale, ty, img_w, rows, background)
+                    data = band.constBits().asstring(band.sizeInBytes())
+                    stride, row_bytes = band.bytesPerLine(), img_w * 3
+                    # filter type 0 (None) before every scanline
+                    raw = b"".join(b"\x00" + data[r * stride:r * stride + row_bytes] for r in range(rows))
+                    _write_png_chunk(f, b"IDAT", compressor.compress(raw))
+                    self.signals.progress.emit(int((i + 1) * 95 / len(bands)))
+                _write_png_chunk(f, b"IDAT", compressor.flush())
+                _write_png_chunk(f, b"IEND", b"")
+        except BaseException:
+            try:
+                os.remove(self.fname)  # never leave a truncated PNG behind
+            except OSError:
+                pass
+            raise
+        self.signals.progress.emit(100)
+
+    def _paint_band(self, geometry, x0, y0, x1, scale, ty, img_w, rows, background):
+        """Rows ty .. ty + rows of the export as an RGB888 QImage."""
+        band = QImage(img_w, rows, QImage.Format.Format_RGB32)
+        if band.isNull():
+            raise MemoryError(f"Could not allocate a {img_w}x{rows} image band; try a smaller scale.")
+        band.fill(background)
+        painter = QPainter(band)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setFont(self.font)
+            painter.scale(scale, scale)
+            painter.translate(-x0, -(y0 + ty / scale))
+            # Cull to the band in diagram coordinates
+            visible = (x0, y0 + ty / scale, x1, y0 + (ty + rows) / scale)
+            self.canvas._paint_diagram(painter, self.diagram, self.width, self.height, visible=visible,
+                                       link_geometry=geometry)
+        finally:
+            painter.end()
+        return band.convertToFormat(QImage.Format.Format_RGB888)
+
+
+def _write_png_chunk(f, tag, payload):
+    f.write(struct.pack(">I", len(payload)) + tag + payload)
+    f.write(struct.pack(">I", zlib.crc32(payload, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+
 # ---------------- Main UI ----------------
 class VenomSketchApp(QMainWindow):
     def __init__(self):
@@ -1183,6 +2282,16 @@ class VenomSketchApp(QMainWindow):
         self.log_toggle_main_btn.clicked.connect(self.toggle_current_log)
         action_row.addWidget(self.log_toggle_main_btn)
 
+        self.open_btn = QPushButton("📂 Open")
+        self.open_btn.setObjectName("actionButton")
+        self.open_btn.clicked.connect(self.open_diagram_file)
+        action_row.addWidget(self.open_btn)
+
+        self.save_diagram_btn = QPushButton("💾 Save Diagram")
+        self.save_diagram_btn.setObjectName("saveButton")
+        self.save_diagram_btn.clicked.connect(self.save_diagram_file)
+        action_row.addWidget(self.save_diagram_btn)
+
         self.save_png_btn = QPushButton("💾 Save PNG")
         self.save_png_btn.setObjectName("saveButton")
         self.save_png_btn.clicked.connect(self.save_png)
@@ -1240,6 +2349,13 @@ class VenomSketchApp(QMainWindow):
         self.toggle_curve_btn.clicked.connect(self._toggle_curve_ui)
         node_button_row.addWidget(self.toggle_curve_btn)
 
+        # Route links around nodes toggle
+        self.toggle_route_btn = QPushButton("Route Links: OFF")
+        self.toggle_route_btn.setObjectName("toggleButton")
+        self.toggle_route_btn.setCheckable(True)
+        self.toggle_route_btn.clicked.connect(self._toggle_route_ui)
+        node_button_row.addWidget(self.toggle_route_btn)
+
         # Add these horizontal groups to the content_layout
         content_layout.addLayout(action_row)
         content_layout.addLayout(node_button_row)
@@ -1247,7 +2363,8 @@ class VenomSketchApp(QMainWindow):
         # Row 3: Drag Hint
         drag_hint_row = QHBoxLayout()
         self.drag_hint = QLabel(
-            "Drag node to move (Right-click menu). Drag EMPTY space to pan/shift the whole diagram.")
+            "Drag node to move (Right-click menu). Drag EMPTY space to pan/shift the whole diagram. "
+            "Shift+drag to select several nodes; Delete removes the selection.")
         self.drag_hint.setObjectName("hintLabel")
         drag_hint_row.addWidget(self.drag_hint)
         drag_hint_row.addStretch(1)
@@ -1261,6 +2378,7 @@ class VenomSketchApp(QMainWindow):
         self.tab_widget.currentChanged.connect(lambda: self.log_toggle_main_btn.setText(
             "Toggle Log View (Visible)" if self.current_tab() and self.current_tab().log_is_visible else "Toggle Log View (Hidden)"
         ))
+        self.tab_widget.currentChanged.connect(self._sync_route_btn)
 
         content_layout.addWidget(self.tab_widget, 1)
 
@@ -1293,6 +2411,21 @@ class VenomSketchApp(QMainWindow):
         canvas.set_curved_links(on)
         self.toggle_curve_btn.setText("Curved Links: ON" if on else "Curved Links: OFF")
 
+    def _toggle_route_ui(self):
+        canvas = self.current_canvas()
+        if not canvas:
+            return
+        on = self.toggle_route_btn.isChecked()
+        canvas.set_routed_links(on)
+        self.toggle_route_btn.setText("Route Links: ON" if on else "Route Links: OFF")
+
+    def _sync_route_btn(self):
+        """Show the routing state of the canvas in the newly selected tab."""
+        canvas = self.current_canvas()
+        on = bool(canvas and canvas.routed_links)
+        self.toggle_route_btn.setChecked(on)
+        self.toggle_route_btn.setText("Route Links: ON" if on else "Route Links: OFF")
+
     # ---------- Actions (Modified to use current_tab) ----------
     def set_dark_mode(self, on: bool):
         self.dark_mode = on
@@ -1518,54 +2651,78 @@ class VenomSketchApp(QMainWindow):
         auto_layout(diagram, iterations=300)  # Using aggressive iteration count
         self.current_tab().set_diagram_data(diagram)
 
+    def save_diagram_file(self):
+        diagram = self.current_diagram()
+        if not diagram:
+            QMessageBox.information(self, "Nothing to save", "Generate a diagram first.")
+            return
+        fname, _ = QFileDialog.getSaveFileName(
+            self, "Save Diagram", "diagram.vsk",
+            "VenomSketch Diagram (*.vsk);;Gzipped JSON (*.json.gz);;JSON Files (*.json)")
+        if not fname:
+            return
+        try:
+            save_diagram(diagram, fname)
+        except Exception as e:
+            QMessageBox.warning(self, "Save failed", f"Failed to save diagram to: {fname}\n{e}")
+            return
+        QMessageBox.information(self, "Saved", f"Saved diagram to: {fname}")
+
+    def open_diagram_file(self):
+        fname, _ = QFileDialog.getOpenFileName(
+            self, "Open Diagram", "",
+            "Diagram Files (*.vsk *.json.gz *.json);;All Files (*)")
+        if not fname:
+            return
+        try:
+            data = load_diagram(fname)
+        except Exception as e:
+            QMessageBox.warning(self, "Open failed", f"Failed to open diagram: {fname}\n{e}")
+            return
+
+        # Reuse the current tab if it is still empty, otherwise open in a new tab
+        current = self.current_diagram()
+        if current and (current.get('nodes') or current.get('links')):
+            self.new_diagram()
+        self.current_tab().set_diagram_data(data)
+
     def save_png(self):
-        canvas = self.current_canvas()
         if not self.current_diagram():
             QMessageBox.information(self, "Nothing to save", "Generate a diagram first.")
             return
         fname, _ = QFileDialog.getSaveFileName(self, "Save Diagram as PNG", "diagram.png", "PNG Files (*.png)")
         if not fname:
             return
-        # Render the canvas into a QPixmap using painter (reliable)
-        pix = QPixmap(canvas.size())
-        # Ensure the canvas background color is used for the pixmap
-        if self.dark_mode:
-            pix.fill(QColor(26, 26, 26))
-        else:
-            pix.fill(QColor(244, 244, 244))
-
-        painter = QPainter(pix)
-        canvas.render(painter)  # Use current canvas
-        painter.end()
-        saved = pix.save(fname, "PNG")
-        if saved:
-            QMessageBox.information(self, "Saved", f"Saved PNG to: {fname}")
-        else:
-            QMessageBox.warning(self, "Save failed", f"Failed to save PNG to: {fname}")
+        scale, ok = QInputDialog.getDouble(self, "Export Resolution", "Scale (1.0 = screen size):",
+                                           2.0, 0.25, 16.0, 2)
+        if not ok:
+            return
+        self._start_export(fname, "png", scale, self.save_png_btn)
 
     def save_svg(self):
-        canvas = self.current_canvas()
         if not self.current_diagram():
             QMessageBox.information(self, "Nothing to save", "Generate a diagram first.")
             return
-        if not SVG_AVAILABLE:
-            QMessageBox.warning(self, "SVG unsupported", "PyQt6.QtSvg not available. Saving PNG instead.")
-            self.save_png()
-            return
         fname, _ = QFileDialog.getSaveFileName(self, "Save Diagram as SVG", "diagram.svg", "SVG Files (*.svg)")
         if not fname:
             return
-        # Use QSvgGenerator
-        gen = QSvgGenerator()
-        gen.setFileName(fname)
-        gen.setSize(canvas.size())
-        gen.setViewBox(canvas.rect())
-        gen.setTitle("VenomSketch Diagram")
-        painter = QPainter()
-        painter.begin(gen)
-        canvas.render(painter)  # Use current canvas
-        painter.end()
-        QMessageBox.information(self, "Saved", f"Saved SVG to: {fname}")
+        self._start_export(fname, "svg", 1.0, self.save_svg_btn)
+
+    def _start_export(self, fname, fmt, scale, button):
+        """Run a DiagramExportWorker for the current tab, showing progress on the triggering button."""
+        canvas = self.current_canvas()
+        label = button.text()
+        button.setEnabled(False)
+
+        worker = DiagramExportWorker(canvas, self.current_diagram(), fname, fmt=fmt, scale=scale)
+        worker.signals.progress.connect(lambda p: button.setText(f"Exporting… {p}%"))
+        worker.signals.result.connect(
+            lambda path, note: QMessageBox.information(
+                self, "Saved", f"Saved {fmt.upper()} to: {path}" + (f"\n\n{note}" if note else "")))
+        worker.signals.error.connect(
+            lambda err: QMessageBox.warning(self, "Save failed", f"Failed to save {fmt.upper()}:\n{err}"))
+        worker.signals.finished.connect(lambda: (button.setText(label), button.setEnabled(True)))
+        self.threadpool.start(worker)
 
     # ---------- Auto data-flow heuristics ----------
     def _auto_create_flow_links(self, diagram):
@@ -1573,7 +2730,7 @@ class VenomSketchApp(QMainWindow):
         Simple heuristic to create data flow arrows automatically:
         - Sort nodes by x then y and connect sequentially
         - For decision nodes, attempt to connect to two nearest nodes on the right
-        - Prevent duplicates
+        - Prevent duplicates (via LinkIndex, so this stays near-linear for large diagrams)
         """
         if not diagram:
             return
@@ -1581,44 +2738,42 @@ class VenomSketchApp(QMainWindow):
         if not nodes:
             diagram['links'] = []
             return
-        # Map nodes by id for quick access
-        node_map = {n['id']: n for n in nodes}
         # Sort nodes left->right then top->bottom
         sorted_nodes = sorted(nodes, key=lambda n: (n.get('x', 500), n.get('y', 500)))
-        links = diagram.setdefault('links', [])
+        sorted_xs = [n.get('x', 500) for n in sorted_nodes]
 
-        def exists(f, t):
-            return any(l for l in links if l.get('from') == f and l.get('to') == t)
+        # remove obvious duplicates (safety) while building the adjacency index
+        unique = []
+        seen = set()
+        for l in diagram.get('links', []):
+            key = (l.get('from'), l.get('to'))
+            if key not in seen:
+                unique.append(l)
+                seen.add(key)
+        diagram['links'] = unique
+        index = LinkIndex(unique)
 
         # Connect sequentially
         for i in range(len(sorted_nodes) - 1):
-            a = sorted_nodes[i]
-            b = sorted_nodes[i + 1]
-            if not exists(a['id'], b['id']):
-                links.append({'from': a['id'], 'to': b['id'], 'label': ''})
+            index.add(sorted_nodes[i]['id'], sorted_nodes[i + 1]['id'])
 
         # For decision nodes, connect to two nearest nodes to the right (if available)
-        for i, n in enumerate(sorted_nodes):
+        for n in sorted_nodes:
             typ = n.get('type', '').lower()
             if typ in ['decision', 'rhombus', 'diamond'] or any(
                     k in n.get('text', '').lower() for k in ['?', 'if', 'decision', 'loop']):
-                # find up to two nodes whose x > n.x
-                right_nodes = [m for m in sorted_nodes if m['x'] > n['x']]
+                # Nodes with x > n.x start at this index of the x-sorted list. Only the leading
+                # x-groups can hold the two closest by (x distance, y distance), so stop scanning
+                # once two candidates are found and x moves past the second one.
+                j = bisect_right(sorted_xs, n.get('x', 500))
+                right_nodes = []
+                while j < len(sorted_nodes) and (len(right_nodes) < 2 or sorted_xs[j] == right_nodes[1]['x']):
+                    right_nodes.append(sorted_nodes[j])
+                    j += 1
                 # choose two closest by x distance then y distance
-                right_nodes = sorted(right_nodes, key=lambda m: (m['x'] - n['x'], abs(m['y'] - n['y'])))
+                right_nodes.sort(key=lambda m: (m['x'] - n['x'], abs(m['y'] - n['y'])))
                 for target in right_nodes[:2]:
-                    if not exists(n['id'], target['id']):
-                        links.append({'from': n['id'], 'to': target['id'], 'label': ''})
-
-        # remove obvious duplicates (safety)
-        unique = []
-        seen = set()
-        for l in links:
-            key = (l.get('from'), l.get('to'))
-            if key not in seen:
-                unique.append(l)
-                seen.add(key)
-        diagram['links'] = unique
+                    index.add(n['id'], target['id'])
 
 
 # ---------------- Run ----------------
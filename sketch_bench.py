@@ -0,0 +1,188 @@
+# sketch_bench.py — headless layout / linking / hit-test / paint benchmarks for sketch.py
+#
+# Usage:
+#   python sketch_bench.py                         # default size sweep
+#   python sketch_bench.py --sizes 100 5000 --density 1 4 --repeat 5
+#   python sketch_bench.py --json > bench_output.txt
+#
+# Runs on Qt's offscreen platform and paints into QImage, so no display is needed.
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QImage, QPainter, QColor
+
+import sketch
+
+CANVAS_W = 1400
+CANVAS_H = 900
+NODE_TYPES = ["process", "decision", "data", "database", "terminator", "document"]
+
+
+# ---------------- Synthetic diagrams ----------------
+def make_diagram(n_nodes, links_per_node, seed=0):
+    """Random diagram with n_nodes nodes and about n_nodes * links_per_node links (mostly local)."""
+    rng = random.Random(seed)
+    nodes = [{
+        "id": f"n{i}",
+        "text": f"Step {i}" if rng.random() < 0.8 else f"Check {i}?",
+        "type": rng.choice(NODE_TYPES),
+        "x": rng.randint(0, 1000),
+        "y": rng.randint(0, 1000),
+    } for i in range(n_nodes)]
+    links = []
+    if n_nodes > 1:
+        for _ in range(int(n_nodes * links_per_node)):
+            a = rng.randrange(n_nodes)
+            # neighbours in id order are usually spatially unrelated, mix in some long edges
+            b = (a + rng.randint(1, 20)) % n_nodes if rng.random() < 0.8 else rng.randrange(n_nodes)
+            if a != b:
+                links.append({"from": f"n{a}", "to": f"n{b}", "label": "yes" if rng.random() < 0.1 else ""})
+    return {"title": f"bench-{n_nodes}", "nodes": nodes, "links": links}
+
+
+# ---------------- Measurement helpers ----------------
+def measure(fn, repeat=3, ops=1):
+    """Run fn `repeat` times untraced, then once more under tracemalloc (which slows allocation
+    down many times over). Returns best wall time (s), ops/sec at that time and peak traced KiB."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "ops_per_sec": ops / best if best > 0 else float("inf"), "peak_kib": peak / 1024}
+
+
+def max_rss_mib():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    except Exception:
+        return None
+
+
+# ---------------- Benchmarks ----------------
+def bench_layout(diagram, iterations, repeat):
+    base = json.dumps(diagram)
+    return measure(lambda: sketch.auto_layout(json.loads(base), iterations=iterations), repeat, ops=iterations)
+
+
+def bench_flow_links(app, diagram, repeat):
+    base = json.dumps(diagram)
+    return measure(lambda: app._auto_create_flow_links(json.loads(base)), repeat)
+
+
+def bench_hit_test(canvas, n_queries, repeat):
+    rng = random.Random(1)
+    points = [(rng.uniform(0, CANVAS_W), rng.uniform(0, CANVAS_H)) for _ in range(n_queries)]
+
+    def run():
+        for x, y in points:
+            canvas._find_node_at_pos(x, y)
+
+    return measure(run, repeat, ops=n_queries)
+
+
+def bench_paint(canvas, diagram, repeat, routed=False):
+    image = QImage(CANVAS_W, CANVAS_H, QImage.Format.Format_ARGB32_Premultiplied)
+    visible = (0, 0, CANVAS_W, CANVAS_H)
+    router = sketch.EdgeRouter() if routed else None
+
+    def run():
+        image.fill(QColor(244, 244, 244))
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(canvas.font)
+        canvas._paint_diagram(painter, diagram, CANVAS_W, CANVAS_H, visible=visible, router=router)
+        painter.end()
+
+    if routed:
+        # first call computes every route; report it separately from cached repaints
+        cold = measure(run, 1)
+        warm = measure(run, repeat)
+        warm["cold_seconds"] = cold["seconds"]
+        return warm
+    return measure(run, repeat)
+
+
+def run_suite(args):
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = sketch.VenomSketchApp()  # provides the flow-link heuristic exactly as the app runs it
+    canvas = sketch.DiagramCanvas()
+    canvas.resize(CANVAS_W, CANVAS_H)
+
+    results = []
+    for n in args.sizes:
+        for density in args.density:
+            diagram = make_diagram(n, density, seed=args.seed)
+            row = {"nodes": n, "links": len(diagram["links"]), "density": density}
+
+            if n <= args.layout_max_nodes:
+                row["auto_layout"] = bench_layout(diagram, args.layout_iterations, args.repeat)
+            row["flow_links"] = bench_flow_links(window, diagram, args.repeat)
+
+            canvas.set_diagram_data(diagram)
+            row["hit_test"] = bench_hit_test(canvas, args.hit_queries, args.repeat)
+            row["paint"] = bench_paint(canvas, diagram, args.repeat)
+            if args.routed and len(diagram["links"]) <= args.routed_max_links:
+                row["paint_routed"] = bench_paint(canvas, diagram, args.repeat, routed=True)
+            row["max_rss_mib"] = max_rss_mib()
+            results.append(row)
+            if not args.json:
+                print_row(row)
+    window.close()
+    app.processEvents()  # deliver the close before returning; `app` must stay referenced until here
+    return results
+
+
+def print_row(row):
+    print(f"nodes={row['nodes']:>6} links={row['links']:>6} (density {row['density']})")
+    for key in ("auto_layout", "flow_links", "hit_test", "paint", "paint_routed"):
+        r = row.get(key)
+        if not r:
+            continue
+        extra = f"  cold {r['cold_seconds'] * 1000:9.1f} ms" if "cold_seconds" in r else ""
+        print(f"    {key:<13} {r['seconds'] * 1000:10.2f} ms  {r['ops_per_sec']:12.1f} ops/s"
+              f"  peak {r['peak_kib']:10.1f} KiB{extra}")
+    if row.get("max_rss_mib") is not None:
+        print(f"    max RSS {row['max_rss_mib']:.1f} MiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sketch.py layout, flow-linking, hit-testing and painting.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 20000])
+    parser.add_argument("--density", type=float, nargs="+", default=[1.0, 3.0], help="links per node")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hit-queries", type=int, default=2000)
+    parser.add_argument("--layout-iterations", type=int, default=20)
+    parser.add_argument("--layout-max-nodes", type=int, default=2000,
+                        help="auto_layout is O(n^2) per iteration; skip it above this size")
+    parser.add_argument("--routed", action="store_true", help="also time painting with EdgeRouter")
+    parser.add_argument("--routed-max-links", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()